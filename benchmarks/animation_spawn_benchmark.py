@@ -0,0 +1,87 @@
+"""
+Measures how long spawning many explosions in one frame takes:
+creating the animation from its sprite sheet for every explosion (as `AnimationGraphics` used to), spawning them
+through `AnimationGraphics.spawn` for the first time (the frames are shared, the objects are new), and spawning them
+again after they finished (the objects are taken from the pool).
+
+This needs a display (it opens a hidden window for its GL context).
+
+Run from the root of the project:
+    python -m benchmarks.animation_spawn_benchmark
+"""
+import time
+
+import pyglet
+
+from consts import *
+
+SPAWN_COUNTS = [100, 500, 2_000]
+FRAME_RATE = 0.001  # the animations are made short, so they are done (and their sprites stop animating) right away
+
+
+def create_legacy_sprite(x, y):
+    """
+    The old `AnimationGraphics.get_animation_sprite`: decodes the sheet and creates its textures and animation again.
+    """
+    image = pyglet.image.load(IMAGES.format(EXPLOSION_ANIMATION))
+    sequence = pyglet.image.ImageGrid(image, ANIMATION_X_COUNT, ANIMATION_Y_COUNT,
+                                      item_width=IMAGES_SIZE, item_height=IMAGES_SIZE)
+    textures = pyglet.image.TextureGrid(sequence)
+    animation = pyglet.image.Animation.from_image_sequence(textures[:], FRAME_RATE, loop=False)
+    return pyglet.sprite.Sprite(animation, x, y)
+
+
+def finish(animations):
+    """
+    Waits until the animations are done and lets them move, so they are unregistered and put in the pool.
+    """
+    for _ in range(ANIMATION_X_COUNT * ANIMATION_Y_COUNT):  # every tick moves the sprites one frame forward
+        time.sleep(FRAME_RATE)
+        pyglet.clock.tick()
+    for animation in animations:
+        animation.move()
+
+
+def measure(spawn, spawn_count):
+    """
+    :return: the time (in milliseconds) it takes to call `spawn` `spawn_count` times, and what the calls returned.
+    """
+    start_time = time.perf_counter()
+    spawned = [spawn(index, index) for index in range(spawn_count)]
+    return (time.perf_counter() - start_time) * 1000, spawned
+
+
+def main():
+    window = pyglet.window.Window(WINDOW_WIDTH, WINDOW_HEIGHT, visible=False)
+
+    from src.abstracts.animation_graphics import AnimationGraphics
+    from src.asset_cache import asset_cache
+    from src.headless_window import HeadlessWindow
+    from src.main_loop import MainLoop
+    from src.user_interface.user_interface import UserInterface
+
+    MainLoop(HeadlessWindow(UserInterface()), is_headless=True)
+    asset_cache.get_image(IMAGES.format(EXPLOSION_ANIMATION))  # the sheet is decoded once in both cases
+
+    def spawn(x, y):
+        return AnimationGraphics.spawn(EXPLOSION_ANIMATION, x, y, frame_rate=FRAME_RATE)
+
+    print(f"{'explosions':>12}{'legacy ms':>12}{'first spawn ms':>16}{'pooled spawn ms':>17}")
+    for spawn_count in SPAWN_COUNTS:
+        legacy_time, sprites = measure(create_legacy_sprite, spawn_count)
+        for sprite in sprites:
+            sprite.delete()
+
+        AnimationGraphics.pool.clear()
+        first_time, animations = measure(spawn, spawn_count)
+        finish(animations)
+        pooled_time, animations = measure(spawn, spawn_count)
+        finish(animations)
+
+        print(f"{spawn_count:>12}{legacy_time:>12.1f}{first_time:>16.1f}{pooled_time:>17.1f}")
+
+    window.close()
+
+
+if __name__ == '__main__':
+    main()
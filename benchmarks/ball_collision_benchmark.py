@@ -0,0 +1,64 @@
+"""
+Measures the collisions between the balls of the `BallWorld`: how many pairs the broad phase tests, how many of them
+actually collide, and how long a whole step (with the collisions) takes.
+
+The balls are spread over an area that grows with their amount, so the density of the balls stays the same and the
+amount of pairs should grow linearly, not quadratically.
+The amount of pairs every ball would be tested against without a broad phase is printed for comparison.
+
+Run from the root of the project:
+    python -m benchmarks.ball_collision_benchmark
+"""
+import time
+
+import numpy as np
+import pyglet
+
+BALL_COUNTS = [1_000, 10_000, 100_000]
+STEP_COUNT = 20
+BALL_RADIUS = 5
+BALLS_PER_SQUARE_PIXEL = 1 / 400
+
+
+def create_world(ball_count):
+    """
+    Creates a headless `MainLoop` with a `BallWorld` of randomly placed balls without gravity.
+    :param ball_count: the amount of rows in the world
+    :return: the `BallWorld`
+    """
+    from src.headless_window import HeadlessWindow
+    from src.main_loop import MainLoop
+    from src.objects.ball_world import BallWorld
+    from src.user_interface.user_interface import UserInterface
+
+    MainLoop(HeadlessWindow(UserInterface()), is_headless=True)
+    world = BallWorld.get_instance()
+
+    side = (ball_count / BALLS_PER_SQUARE_PIXEL) ** 0.5
+    random = np.random.default_rng(0)
+    positions = random.uniform(BALL_RADIUS, side, (ball_count, 2))
+    velocities = random.uniform(-2, 2, (ball_count, 2))
+    world.add_rows(positions, velocities, BALL_RADIUS, 0, 0.9)
+    return world
+
+
+def main():
+    print(f"{'balls':>10}{'all pairs':>16}{'tested pairs':>16}{'colliding':>12}{'ms per step':>14}")
+    for ball_count in BALL_COUNTS:
+        world = create_world(ball_count)
+
+        tested_pair_count = colliding_pair_count = 0
+        start_time = time.perf_counter()
+        for _ in range(STEP_COUNT):
+            world.step()
+            tested_pair_count += world.last_tested_pair_count
+            colliding_pair_count += world.last_colliding_pair_count
+        step_time = (time.perf_counter() - start_time) / STEP_COUNT
+
+        print(f"{ball_count:>10}{ball_count * (ball_count - 1) // 2:>16,}{tested_pair_count // STEP_COUNT:>16,}"
+              f"{colliding_pair_count // STEP_COUNT:>12,}{step_time * 1000:>14.3f}")
+
+
+if __name__ == '__main__':
+    pyglet.options['shadow_window'] = False
+    main()
@@ -0,0 +1,105 @@
+"""
+Measures how long drawing all of the balls of a `BallWorld` takes: with a `draw_rect` for every ball through the
+`ShapeBatch` (as `Ball.draw` used to), with the `BallRenderer` of the world (one draw call from the arrays), and with
+the `BallHeatmap` the renderer switches to when there are too many balls on the screen.
+Every frame the world is stepped first, so the positions change like they do in the program.
+
+This needs a display (it opens a hidden window for its GL context). Software GL (Mesa) is enough.
+
+Run from the root of the project:
+    python -m benchmarks.ball_render_benchmark
+"""
+import time
+
+import numpy as np
+import pyglet
+
+from consts import *
+
+BALL_COUNTS = [10_000, 100_000, 250_000]
+LEGACY_MAX_BALL_COUNT = 100_000  # drawing every ball in python is much slower, it is only measured for fewer balls
+BALL_RADIUS = 2
+FRAME_COUNT = 10
+
+
+def create_world(ball_count):
+    """
+    Creates a headless `MainLoop` with a `BallWorld` of randomly placed balls.
+    :param ball_count: the amount of rows in the world
+    :return: the `BallWorld`
+    """
+    from src.headless_window import HeadlessWindow
+    from src.main_loop import MainLoop
+    from src.objects.ball_world import BallWorld
+    from src.user_interface.user_interface import UserInterface
+
+    MainLoop(HeadlessWindow(UserInterface()), is_headless=True)
+    world = BallWorld.get_instance()
+    world.is_colliding = False
+
+    random = np.random.default_rng(0)
+    positions = random.uniform((0, 0), (WINDOW_WIDTH, WINDOW_HEIGHT), (ball_count, 2))
+    velocities = random.uniform(-5, 5, (ball_count, 2))
+    colors = random.integers(0, 256, (ball_count, 3))
+    world.add_rows(positions, velocities, BALL_RADIUS, 0, 1, colors)
+    return world
+
+
+def draw_legacy(world):
+    """
+    Draws every ball with `draw_rect` (as `Ball.draw` used to), through the `ShapeBatch`.
+    """
+    from src.shape_drawing import draw_rect, shape_batch
+
+    shape_batch.start_frame()
+    for (x, y), radius, color in zip(world.positions[:world.count].tolist(), world.radii[:world.count].tolist(),
+                                     world.colors[:world.count].tolist()):
+        draw_rect(x - radius, y - radius, radius * 2, radius * 2, tuple(color))
+    shape_batch.end_frame()
+
+
+def draw_points(world):
+    world.renderer.heatmap_ball_count = float('inf')
+    world.renderer.draw()
+
+
+def draw_heatmap(world):
+    world.renderer.heatmap_ball_count = 0
+    world.renderer.draw()
+
+
+def measure(world, draw):
+    """
+    Steps the world and draws it a few times.
+    :return: the average time of a frame (in milliseconds)
+    """
+    start_time = time.perf_counter()
+    for _ in range(FRAME_COUNT):
+        world.step()
+        pyglet.gl.glClear(pyglet.gl.GL_COLOR_BUFFER_BIT)
+        draw(world)
+        pyglet.gl.glFinish()
+    return (time.perf_counter() - start_time) / FRAME_COUNT * 1000
+
+
+def main():
+    window = pyglet.window.Window(WINDOW_WIDTH, WINDOW_HEIGHT, visible=False)
+    window.on_resize(WINDOW_WIDTH, WINDOW_HEIGHT)  # a hidden window does not get the event that sets its projection
+
+    print(f"{'balls':>10}{'legacy ms':>12}{'renderer ms':>14}{'renderer fps':>15}{'heatmap ms':>13}")
+    for ball_count in BALL_COUNTS:
+        world = create_world(ball_count)
+
+        legacy = ''
+        if ball_count <= LEGACY_MAX_BALL_COUNT:
+            legacy = f"{measure(world, draw_legacy):.1f}"
+        renderer_time = measure(world, draw_points)
+        heatmap_time = measure(world, draw_heatmap)
+
+        print(f"{ball_count:>10}{legacy:>12}{renderer_time:>14.1f}{1000 / renderer_time:>15.1f}{heatmap_time:>13.1f}")
+
+    window.close()
+
+
+if __name__ == '__main__':
+    main()
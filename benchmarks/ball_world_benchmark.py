@@ -0,0 +1,57 @@
+"""
+Measures how many ball-steps per second the `BallWorld` makes, for worlds of different sizes.
+The rows are added with `BallWorld.add_rows`, without `Ball` objects, so only the vectorized step is measured.
+The collisions between the balls are turned off, they are measured in `ball_collision_benchmark`.
+
+Run from the root of the project:
+    python -m benchmarks.ball_world_benchmark
+"""
+import time
+
+import numpy as np
+import pyglet
+
+from consts import *
+
+BALL_COUNTS = [1_000, 10_000, 100_000, 1_000_000]
+STEP_COUNT = 100
+
+
+def create_world(ball_count):
+    """
+    Creates a headless `MainLoop` with a `BallWorld` of randomly placed balls.
+    :param ball_count: the amount of rows in the world
+    :return: the `BallWorld`
+    """
+    from src.headless_window import HeadlessWindow
+    from src.main_loop import MainLoop
+    from src.objects.ball_world import BallWorld
+    from src.user_interface.user_interface import UserInterface
+
+    MainLoop(HeadlessWindow(UserInterface()), is_headless=True)
+    world = BallWorld.get_instance()
+    world.is_colliding = False
+
+    random = np.random.default_rng(0)
+    positions = random.uniform((0, 0), (WINDOW_WIDTH, WINDOW_HEIGHT), (ball_count, 2))
+    velocities = random.uniform(-5, 5, (ball_count, 2))
+    world.add_rows(positions, velocities, 20, -0.5, 0.9)
+    return world
+
+
+def main():
+    print(f"{'balls':>10}{'ms per step':>14}{'ball-steps per second':>24}")
+    for ball_count in BALL_COUNTS:
+        world = create_world(ball_count)
+
+        start_time = time.perf_counter()
+        for _ in range(STEP_COUNT):
+            world.step()
+        step_time = (time.perf_counter() - start_time) / STEP_COUNT
+
+        print(f"{ball_count:>10}{step_time * 1000:>14.3f}{ball_count / step_time:>24,.0f}")
+
+
+if __name__ == '__main__':
+    pyglet.options['shadow_window'] = False
+    main()
@@ -0,0 +1,128 @@
+"""
+Measures the cost of registering, unregistering and dispatching graphics objects in the main loop, using the same
+calls `MainLoop.register_graphics_object`, `MainLoop.unregister_graphics_object` and `MainLoop.main_loop` perform.
+
+The old tuple-list implementation is measured as well (only for the smaller sizes, it is quadratic).
+
+Run from the root of the project:
+    python -m benchmarks.callback_scheduler_benchmark
+"""
+import time
+
+from src.callback_scheduler import CallbackScheduler
+from usefuls import DoubleEndedOrderedSet
+
+OBJECT_COUNTS = [1_000, 10_000, 100_000]
+LEGACY_MAX_OBJECT_COUNT = 10_000
+DISPATCH_REPETITIONS = 20
+
+
+class BenchmarkObject:
+    """
+    A bare graphics object with `draw` and `move` methods that do nothing.
+    """
+    def draw(self):
+        pass
+
+    def move(self):
+        pass
+
+
+class IndexedLoop:
+    """
+    The registration part of `MainLoop` on top of the `CallbackScheduler`.
+    """
+    def __init__(self):
+        self.scheduler = CallbackScheduler()
+        self.graphics_objects = DoubleEndedOrderedSet()
+
+    def register(self, graphics_object):
+        self.graphics_objects.append(graphics_object)
+        self.scheduler.insert(graphics_object.draw)
+        self.scheduler.insert(graphics_object.move, can_be_paused=True)
+
+    def unregister(self, graphics_object):
+        self.graphics_objects.discard(graphics_object)
+        self.scheduler.remove_function(graphics_object.draw)
+        self.scheduler.remove_function(graphics_object.move)
+
+    def dispatch(self, is_paused):
+        self.scheduler.call(is_paused)
+
+
+class LegacyLoop:
+    """
+    The registration part of `MainLoop` as it was with a flat list of (function, args, kwargs, can_be_paused) tuples.
+    """
+    def __init__(self):
+        self.call_functions = []
+        self.graphics_objects = []
+
+    def register(self, graphics_object):
+        self.graphics_objects.append(graphics_object)
+        self.call_functions.append((graphics_object.draw, (), {}, False))
+        self.call_functions.append((graphics_object.move, (), {}, True))
+
+    def remove_from_loop(self, function):
+        to_remove = [function_and_args for function_and_args in self.call_functions if function_and_args[0] == function]
+        for function_and_args in to_remove:
+            self.call_functions.remove(function_and_args)
+
+    def unregister(self, graphics_object):
+        self.graphics_objects.remove(graphics_object)
+        self.remove_from_loop(graphics_object.draw)
+        self.remove_from_loop(graphics_object.move)
+
+    def dispatch(self, is_paused):
+        for function, args, kwargs, can_be_paused in self.call_functions:
+            if is_paused and can_be_paused:
+                continue
+            function(*args, **kwargs)
+
+
+def timed(function, *args):
+    """
+    Calls a function with the given arguments and returns the time it took in seconds.
+    """
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def measure(loop_class, object_count):
+    """
+    Measures one implementation of the loop with a given amount of objects.
+    :param loop_class: `IndexedLoop` or `LegacyLoop`
+    :param object_count: the amount of objects to register
+    :return: a tuple of the costs (in microseconds) of (register, unregister, dispatch, paused dispatch) per object,
+        The dispatch costs are per tick.
+    """
+    loop = loop_class()
+    objects = [BenchmarkObject() for _ in range(object_count)]
+
+    register_time = timed(lambda: [loop.register(object_) for object_ in objects])
+    dispatch_time = timed(lambda: [loop.dispatch(False) for _ in range(DISPATCH_REPETITIONS)]) / DISPATCH_REPETITIONS
+    paused_time = timed(lambda: [loop.dispatch(True) for _ in range(DISPATCH_REPETITIONS)]) / DISPATCH_REPETITIONS
+    unregister_time = timed(lambda: [loop.unregister(object_) for object_ in objects])
+
+    return (
+        (register_time / object_count) * 1e6,
+        (unregister_time / object_count) * 1e6,
+        dispatch_time * 1e3,
+        paused_time * 1e3,
+    )
+
+
+def main():
+    print(f"{'implementation':<10} {'objects':>8} {'register us/obj':>16} {'unregister us/obj':>18} "
+          f"{'tick ms':>9} {'paused tick ms':>15}")
+    for object_count in OBJECT_COUNTS:
+        for name, loop_class in [("indexed", IndexedLoop), ("legacy", LegacyLoop)]:
+            if loop_class is LegacyLoop and object_count > LEGACY_MAX_OBJECT_COUNT:
+                continue
+            register, unregister, dispatch, paused = measure(loop_class, object_count)
+            print(f"{name:<10} {object_count:>8} {register:>16.3f} {unregister:>18.3f} {dispatch:>9.3f} {paused:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
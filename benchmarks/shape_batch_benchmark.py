@@ -0,0 +1,61 @@
+"""
+Compares drawing the balls of a scene one by one with drawing them through the `ShapeBatch`:
+counts the draw calls of a frame and measures how long a frame takes.
+
+This needs a display (it opens a hidden window for its GL context).
+
+Run from the root of the project:
+    python -m benchmarks.shape_batch_benchmark
+"""
+import random
+import time
+
+import pyglet
+
+from consts import *
+from src.shape_drawing import draw_rect, draw_circle, shape_batch
+
+BALL_COUNTS = [1_000, 10_000]
+FRAME_REPETITIONS = 10
+
+
+def draw_frame(balls, is_batching):
+    """
+    Draws all of the balls (as `Ball.draw` does) and the circle around one of them (as `Ball.mark_as_selected` does)
+    :param balls: a list of (x, y, radius)
+    :param is_batching: whether or not to use the shape batch
+    :return: None
+    """
+    shape_batch.start_frame(is_batching)
+    for x, y, radius in balls:
+        draw_rect(x - radius, y - radius, radius * 2, radius * 2, LIGHT_BLUE)
+    draw_circle(*balls[0], WHITE)
+    shape_batch.end_frame()
+
+
+def measure(balls, is_batching):
+    """
+    Draws a few frames and returns the draw calls per frame and the average time of a frame (in milliseconds)
+    """
+    start = time.perf_counter()
+    for _ in range(FRAME_REPETITIONS):
+        draw_frame(balls, is_batching)
+    pyglet.gl.glFinish()
+    frame_time = (time.perf_counter() - start) / FRAME_REPETITIONS
+    shape_batch.start_frame(False)  # so `last_frame_draw_call_count` is the one of the last measured frame
+    return shape_batch.last_frame_draw_call_count, frame_time * 1e3
+
+
+def main():
+    window = pyglet.window.Window(WINDOW_WIDTH, WINDOW_HEIGHT, visible=False)
+    print(f"{'balls':>8} {'mode':<10} {'draw calls':>11} {'frame ms':>10}")
+    for ball_count in BALL_COUNTS:
+        balls = [(random.uniform(0, WINDOW_WIDTH), random.uniform(0, WINDOW_HEIGHT), 20) for _ in range(ball_count)]
+        for is_batching in (False, True):
+            draw_calls, frame_time = measure(balls, is_batching)
+            print(f"{ball_count:>8} {'batched' if is_batching else 'immediate':<10} {draw_calls:>11} {frame_time:>10.2f}")
+    window.close()
+
+
+if __name__ == '__main__':
+    main()
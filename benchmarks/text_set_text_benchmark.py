@@ -0,0 +1,94 @@
+"""
+Compares the cost of changing the string of a `Text` (as `PopupTextBox.pressed` does on every keystroke):
+creating a new `pyglet.text.Label` every time (as `Text.set_text` used to) against `Text.set_text` now.
+Prints the time per call and how many python objects were left alive after all of the calls.
+
+This needs a display (it opens a hidden window for its GL context).
+
+Run from the root of the project:
+    python -m benchmarks.text_set_text_benchmark
+"""
+import gc
+import time
+
+import pyglet
+
+from consts import *
+
+CALL_COUNTS = [1_000, 10_000, 100_000]
+LEGACY_MAX_CALL_COUNT = 10_000  # the legacy version is much slower, it is only measured for the smaller counts
+TYPED_STRING = "the quick brown fox jumps over the lazy dog"
+
+
+def get_strings(call_count):
+    """
+    Returns the strings a text box shows while `TYPED_STRING` is typed into it and erased, again and again.
+    :param call_count: the amount of strings
+    :return: a list of strings
+    """
+    length = len(TYPED_STRING)
+    lengths = [index % (2 * length) for index in range(call_count)]
+    return [TYPED_STRING[:length - abs(length - typed)] for typed in lengths]
+
+
+def set_text_legacy(labels, text):
+    """
+    The old `Text.set_text`: a new label for every string (the old label is only dropped, never deleted)
+    """
+    label = pyglet.text.Label(text,
+                              font_name=DEFAULT_FONT,
+                              font_size=DEFAULT_FONT_SIZE,
+                              x=0, y=0,
+                              color=WHITE + (255,),
+                              anchor_x='center', anchor_y='top',
+                              align='center')
+    label.width = TEXTBOX_WIDTH
+    label.multiline = True
+    labels[0] = label
+
+
+def measure(set_text, strings):
+    """
+    Calls `set_text` with every string.
+    :return: the time of a call (in microseconds) and how many more python objects are alive after the calls.
+    """
+    gc.collect()
+    start_object_count = len(gc.get_objects())
+    start_time = time.perf_counter()
+    for string in strings:
+        set_text(string)
+    call_time = (time.perf_counter() - start_time) / len(strings)
+    gc.collect()
+    return call_time * 1_000_000, len(gc.get_objects()) - start_object_count
+
+
+def main():
+    window = pyglet.window.Window(WINDOW_WIDTH, WINDOW_HEIGHT, visible=False)
+
+    from src.headless_window import HeadlessWindow
+    from src.main_loop import MainLoop
+    from src.user_interface.text_graphics import Text
+    from src.user_interface.user_interface import UserInterface
+
+    MainLoop(HeadlessWindow(UserInterface()), is_headless=True)
+
+    print(f"{'calls':>10}{'legacy us':>12}{'legacy objects':>16}{'set_text us':>14}{'set_text objects':>18}")
+    for call_count in CALL_COUNTS:
+        strings = get_strings(call_count)
+
+        legacy = ('', '')
+        if call_count <= LEGACY_MAX_CALL_COUNT:
+            labels = [None]
+            legacy = measure(lambda string: set_text_legacy(labels, string), strings)
+            legacy = f"{legacy[0]:.1f}", str(legacy[1])
+
+        text = Text('', WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2, max_width=TEXTBOX_WIDTH)
+        current = measure(text.set_text, strings)
+
+        print(f"{call_count:>10}{legacy[0]:>12}{legacy[1]:>16}{current[0]:>14.1f}{current[1]:>18}")
+
+    window.close()
+
+
+if __name__ == '__main__':
+    main()
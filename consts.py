@@ -19,10 +19,27 @@ CTRL_MODIFIER = 2
 SHIFT_MODIFIER = 1
 NO_MODIFIER = 0
 # you can `|` them together to get the different combinations.
+MODIFIERS_MASK = CAPS_MODIFIER | ALT_MODIFIER | CTRL_MODIFIER | SHIFT_MODIFIER  # the rest (num lock...) are ignored
+KEY_REPEAT_DELAY = 0.4  # the seconds a key is held before its action starts repeating
+KEY_REPEAT_INTERVAL = 0.05  # the seconds between two repeats of the action of a held key
+
+SPRITES_DIRECTORY = "res/sprites"
+IMAGES = SPRITES_DIRECTORY + "/{}"
+TEXTURE_ATLAS_SIZE = 512  # the width and height of the texture atlases the images of each category are packed into
+TEXTURE_ATLAS_BORDER = 1  # the empty pixels around every image in an atlas, so the images do not bleed into each other
+BACKGROUND_LAYER = 0  # the layer of the objects that are drawn beneath all of the others
+WORLD_LAYER = 1  # the layer of the simulated objects (balls, images...)
+UI_LAYER = 2  # the layer of the side window, its buttons and its texts
+POPUP_LAYER = 3  # the layer of the popup windows and of everything in them
+DRAW_LAYERS = [BACKGROUND_LAYER, WORLD_LAYER, UI_LAYER, POPUP_LAYER]  # all of the layers, from the bottom one up
+SPRITE_BATCH_ORDER = 0  # the order of the group of the sprites in the batch of every draw segment
+INTERFACE_SPRITE_BATCH_ORDER = 1  # the order of the group of the images of the buttons, over the sprites
+TEXT_BATCH_ORDER = 2  # the order of the group of the texts, over all of the images
 
 EXPLOSION_ANIMATION = "misc/explosion.png"
 ANIMATION_FRAME_RATE = 0.1
 ANIMATION_X_COUNT, ANIMATION_Y_COUNT = 5, 3
+ANIMATION_POOL_SIZE = 32  # the most finished animations of each kind that wait to be played again
 
 OPAQUE = 35
 A_LITTLE_OPAQUE = 100
@@ -46,6 +63,13 @@ DEFAULT_FONT = "Arial"
 DEFAULT_FONT_SIZE = 10
 
 FRAME_RATE = 1 / 60.0
+PHYSICS_TIME_STEP = FRAME_RATE  # the time between two `move` steps in the fixed time step mode of the `MainLoop`
+MAX_PHYSICS_STEPS_PER_FRAME = 5  # more steps than that in one frame are dropped, so a slow frame cannot snowball
+
+PROFILER_WINDOW_SIZE = 300  # the amount of last frames the `FrameProfiler` calculates its percentiles over
+
+HEADLESS_DEFAULT_STEP_COUNT = 1000
+HEADLESS_DEFAULT_BALL_COUNT = 1000
 
 DARK_GRAY = (20, 20, 20)
 GRAY = (10, 10, 10)
@@ -66,6 +90,8 @@ DARK_GREEN = (0, 100, 0)
 PINK = (255, 170, 170)
 
 SIDE_WINDOW_WIDTH = 230
+SCREEN_RECT = 0, 0, WINDOW_WIDTH, WINDOW_HEIGHT  # the whole window (min_x, min_y, max_x, max_y)
+WORLD_VIEW_RECT = 0, 0, WINDOW_WIDTH - SIDE_WINDOW_WIDTH, WINDOW_HEIGHT  # the part of it not under the side window
 
 DEFAULT_BUTTON_TEXT = "BuTTon"
 DEFAULT_BUTTON_WIDTH = SIDE_WINDOW_WIDTH - 40
@@ -112,7 +138,24 @@ PAUSE_RECT_WIDTH = 10
 PAUSE_RECT_HEIGHT = 60
 PAUSE_RECT_COORDINATES = 20, ((WINDOW_HEIGHT - PAUSE_RECT_HEIGHT) - 10)
 
-CIRCLE_SEGMENT_COUNT = 50
+BALL_WORLD_INITIAL_CAPACITY = 1024  # the amount of balls the arrays of the `BallWorld` initially have room for
+BALL_COLLISION_MINIMAL_CELL_SIZE = 1  # the cells of the collision grid are at least this large, even for tiny balls
+BALL_GROUND_REST_SPEED = 1  # a ball that bounces off the ground slower than this stops bouncing
+BALL_GROUND_FRICTION = 0.95  # the part of its sideways velocity a ball keeps on every step it touches the ground
+BALL_SLEEP_SPEED = 1  # a ball whose speed is lower than this (in pixels per step) is resting
+BALL_SLEEP_DISTANCE = 1  # a ball that moved less than this in the last step (in pixels) is resting
+BALL_SLEEP_STEP_COUNT = 60  # a ball falls asleep once it has been resting for this many steps
+BALL_WAKE_SPEED = 1  # a sleeping ball is woken up when another ball hits it faster than this
+BALL_HEATMAP_BALL_COUNT = 100_000  # when more balls than this are on the screen, a heatmap is drawn instead of them
+BALL_HEATMAP_HYSTERESIS = 0.9  # the heatmap is replaced by the balls again below this part of `BALL_HEATMAP_BALL_COUNT`
+BALL_HEATMAP_CELL_SIZE = 4  # the width and height (in pixels) of the part of the screen every pixel of the heatmap is
+BALL_HEATMAP_SATURATION_COUNT = 4  # a cell of the heatmap with this many balls in it is completely opaque
+SPATIAL_HASH_CELL_SIZE = 64  # the size (in pixels) of a cell in the grid the pressable objects are indexed by
+OFF_SCREEN_MARGIN = 200  # objects farther than this (in pixels) off the screen can be frozen or removed (`ViewCuller`)
+
+CIRCLE_MINIMAL_SEGMENT_COUNT = 8  # the amount of segments of the smallest circles
+CIRCLE_MAXIMAL_SEGMENT_COUNT = 128  # the amount of segments of the largest circles
+CIRCLE_SEGMENT_LENGTH = 4  # the length (in pixels) the segments of a circle should have at most
 SINE_WAVE_MINIMAL_POINT_DISTANCE = 5
 INITIAL_SINE_WAVE_ANGLE = 0
 DEFAULT_SINE_WAVE_AMPLITUDE = 10
@@ -120,6 +163,8 @@ DEFAULT_SINE_WAVE_FREQUENCY = 10
 
 DEFAULT_OUTLINE_WIDTH = 5
 
+TEXT_DOCUMENT_CACHE_SIZE = 1024  # the amount of recently displayed strings whose pyglet documents are kept
+
 TEXTBOX_WIDTH = 400
 TEXTBOX_HEIGHT = 170
 TEXTBOX_COORDINATES = (WINDOW_WIDTH / 2) - (TEXTBOX_WIDTH / 2), (WINDOW_HEIGHT / 2) - (TEXTBOX_HEIGHT / 2)
@@ -1,17 +1,89 @@
+import argparse
+import random
+import time
+
 import pyglet
 
 from consts import *
-from src.main_loop import MainLoop
-from src.main_window import MainWindow
-from src.user_interface.user_interface import UserInterface
 
-if __name__ == '__main__':
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the program.
+    :return: an `argparse.Namespace`
+    """
+    parser = argparse.ArgumentParser(description="Runs the simulation.")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the simulation without a window and without drawing, as fast as possible")
+    parser.add_argument("--steps", type=int, default=HEADLESS_DEFAULT_STEP_COUNT,
+                        help="the amount of steps to run in headless mode")
+    parser.add_argument("--balls", type=int, default=HEADLESS_DEFAULT_BALL_COUNT,
+                        help="the amount of balls to create in headless mode")
+    parser.add_argument("--fixed-step", action="store_true",
+                        help="move the objects in physics steps of a fixed length, instead of once every frame")
+    return parser.parse_args()
+
+
+def run_window(is_fixed_step=False):
+    """
+    Opens the window and runs the simulation in it.
+    :param is_fixed_step: whether the objects are moved in steps of `PHYSICS_TIME_STEP` (see
+        `MainLoop.set_fixed_time_step`) or once every frame.
+    :return: None
+    """
+    from src.main_loop import MainLoop
+    from src.main_window import MainWindow
+    from src.user_interface.user_interface import UserInterface
+
     user_interface = UserInterface()
     main_window = MainWindow(user_interface, WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_NAME, resizable=False)
     main_loop = MainLoop(main_window)
+    if is_fixed_step:
+        main_loop.set_fixed_time_step(PHYSICS_TIME_STEP)
     pyglet.clock.schedule_interval(main_window.update, FRAME_RATE)
     pyglet.app.run()
 
+
+def run_headless(step_count, ball_count):
+    """
+    Runs the simulation without a window or a GL context, only calling the `move`-s of the graphics objects.
+    Prints the amount of steps per second at the end.
+    :param step_count: the amount of steps to run.
+    :param ball_count: the amount of balls that are created in random locations before running.
+    :return: None
+    """
+    pyglet.options['shadow_window'] = False
+    # ^ must be set before `pyglet.window` is imported, otherwise pyglet tries to open a GL context on import.
+
+    from src.headless_window import HeadlessWindow
+    from src.main_loop import MainLoop
+    from src.objects.ball import Ball
+    from src.user_interface.user_interface import UserInterface
+
+    user_interface = UserInterface()
+    main_loop = MainLoop(HeadlessWindow(user_interface), is_headless=True)
+
+    for _ in range(ball_count):
+        user_interface.balls.append(Ball(random.uniform(0, WINDOW_WIDTH - SIDE_WINDOW_WIDTH),
+                                         random.uniform(0, WINDOW_HEIGHT),
+                                         random.uniform(-5, 5), random.uniform(-5, 5)))
+
+    start_time = time.perf_counter()
+    for _ in range(step_count):
+        main_loop.step()
+    run_time = time.perf_counter() - start_time
+
+    print(f"{step_count} steps of {len(main_loop.graphics_objects)} objects in {run_time:.3f} seconds: "
+          f"{step_count / run_time:.1f} steps per second")
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    if arguments.headless:
+        run_headless(arguments.steps, arguments.balls)
+    else:
+        run_window(arguments.fixed_step)
+
     # TODO: make sure no two computers or interfaces have the same name!
     # TODO: there are errors with removing connections and the routing table
     # TODO: resizable window
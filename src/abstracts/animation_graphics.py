@@ -4,13 +4,24 @@ import pyglet
 
 from consts import *
 from src.abstracts.image_graphics import ImageGraphics
+from src.asset_cache import asset_cache
+from src.sprite_batch import sprite_batch
 from src.main_loop import MainLoop
 
 
 class AnimationGraphics(ImageGraphics):
     """
     A GraphicsObject of an animation. An image that is made out of little images and the animation if looped through them.
+
+    The frames of the animation are taken from the `asset_cache`, so they are shared by all of the animations that are
+    cut out of the same sheet in the same way.
+    Animations that are done are not thrown away, they wait in `pool` until `spawn` plays an animation like them again.
+    At most `ANIMATION_POOL_SIZE` animations of each kind wait there, the ones that are done after that are deleted.
     """
+    pool = {}
+    # ^ maps the `get_pool_key` of finished animations to a list of them, so they can be played again.
+    pool_size = ANIMATION_POOL_SIZE  # the most animations in each list of the `pool`
+
     def __init__(self, image_name, x, y, is_looping=False, x_count=ANIMATION_X_COUNT, y_count=ANIMATION_Y_COUNT,
                  image_width=IMAGES_SIZE, image_height=IMAGES_SIZE, frame_rate=ANIMATION_FRAME_RATE, scale=1.0):
         """
@@ -33,8 +44,37 @@ class AnimationGraphics(ImageGraphics):
         self.start_time = time.time()
         self.frame_rate = frame_rate
         self.scale = scale
+        self.is_pooled = False  # whether the animation is done and waits in the `pool`
         super(AnimationGraphics, self).__init__(image_name, x, y, centered=True)
 
+    @classmethod
+    def get_pool_key(cls, image_name, is_looping, x_count, y_count, image_width, image_height, frame_rate):
+        """
+        :return: the key of the list in `pool` of the finished animations that were created with these parameters.
+        """
+        return cls, image_name, is_looping, x_count, y_count, image_width, image_height, frame_rate
+
+    @classmethod
+    def spawn(cls, image_name, x, y, is_looping=False, x_count=ANIMATION_X_COUNT, y_count=ANIMATION_Y_COUNT,
+              image_width=IMAGES_SIZE, image_height=IMAGES_SIZE, frame_rate=ANIMATION_FRAME_RATE, scale=1.0):
+        """
+        Plays an animation. If an animation like it is done and waits in the pool, it is played again instead of
+        creating a new one. Takes the same parameters as `__init__`.
+        :return: the `AnimationGraphics` that is played.
+        """
+        finished = cls.pool.get(cls.get_pool_key(image_name, is_looping, x_count, y_count,
+                                                 image_width, image_height, frame_rate))
+        if not finished:
+            return cls(image_name, x, y, is_looping, x_count, y_count, image_width, image_height, frame_rate, scale)
+
+        animation = finished.pop()
+        animation.is_pooled = False
+        animation.location = x, y
+        animation.scale = scale
+        animation.start_time = time.time()
+        MainLoop.instance.register_graphics_object(animation)
+        return animation
+
     @property
     def is_done(self):
         """
@@ -47,36 +87,65 @@ class AnimationGraphics(ImageGraphics):
         """
         Returns a pyglet.sprite.Sprite object of the animation
         """
-        image = pyglet.image.load(IMAGES.format(image_name))
-        sequence = pyglet.image.ImageGrid(image, x_count, y_count,
-                                          item_width=self.item_width, item_height=self.item_height)
-        textures = pyglet.image.TextureGrid(sequence)
-        animation = pyglet.image.Animation.from_image_sequence(textures[:], self.frame_rate, loop=self.is_looping)
+        animation = asset_cache.get_animation(IMAGES.format(image_name), x_count, y_count,
+                                              self.item_width, self.item_height, self.frame_rate, self.is_looping)
         sprite = pyglet.sprite.Sprite(animation, x, y)
         sprite.scale = self.scale
         return animation.get_duration(), sprite
 
     def load(self):
         """
-        Loading an animation is a little different
+        Loading an animation is a little different.
+        An animation that is played again from the pool already has a sprite in the `sprite_batch`, the sprite is only
+        shown again and its animation starts over.
         :return: None
         """
-        self.run_time, self.sprite = self.get_animation_sprite(self.image_name, self.x, self.y)
+        is_reused = self.sprite is not None
+        if is_reused:
+            self.sprite.image = self.sprite.image  # starts the animation from its first frame
+            self.sprite.scale = self.scale
+            self.sprite.visible = True
+        else:
+            self.run_time, self.sprite = self.get_animation_sprite(self.image_name, self.x, self.y,
+                                                                   self.x_count, self.y_count)
         self.sprite.update(scale_x=self.scale_factor, scale_y=self.scale_factor)
 
         if self.centered:
             x, y = self.get_centered_coordinates()
             self.sprite.update(x, y)
 
-    def move(self):
+        if not is_reused:
+            sprite_batch.add(self, self.sprite)
+
+    def unload(self):
         """
-        Moves the object, In the case of an animation, also unregisters it when it is done :)
+        An animation that goes to the pool keeps its sprite in the `sprite_batch` (hidden), so it is not created again
+        when the animation is played again. Any other animation removes its sprite from the batch and deletes it.
         :return: None
         """
-        super(AnimationGraphics, self).move()
+        if self.is_pooled:
+            self.sprite.visible = False
+            return
+
+        super(AnimationGraphics, self).unload()
+        self.sprite.delete()
+        self.sprite = None
 
+    def move(self):
+        """
+        In the case of an animation, unregisters it when it is done :)
+        The finished animation is put in the `pool`, so `spawn` can play it again (if the pool is not full, otherwise
+        its sprite is deleted).
+        :return: None
+        """
         if self.is_done:
+            finished = self.pool.setdefault(self.get_pool_key(self.image_name, self.is_looping, self.x_count,
+                                                              self.y_count, self.item_width, self.item_height,
+                                                              self.frame_rate), [])
+            self.is_pooled = len(finished) < self.pool_size
             MainLoop.instance.unregister_graphics_object(self)
+            if self.is_pooled:
+                finished.append(self)
 
 
 # class LogoAnimation(AnimationGraphics):
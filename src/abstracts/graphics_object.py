@@ -1,4 +1,6 @@
 from abc import ABCMeta, abstractmethod
+
+from consts import *
 from src.main_loop import MainLoop
 
 
@@ -10,11 +12,34 @@ class GraphicsObject(metaclass=ABCMeta):
     They have to have a `draw`, a `move` and a `load` method.
     When a graphics object is created, it inserts itself into the main loop of the program.
     Every call of the main loop function will call its `draw` and `move` methods.
+    It is drawn in its `layer` of the `DrawLayers` of the main loop (the world, by default), on top of the objects of
+    the layer that were registered before it (unless it is in the background) and beneath all of the layers above.
     The `draw` should contain the drawing of the object while the `move` should contain its movement. Reasonable I would say.
 
-    If this object has an iterable attribute in the name `child_graphics_objects`, when this object is unregistered, all of the
-    GraphicsObjects in that iterable are unregistered as well.
+    An object can follow another one, its `parent_graphics` (see `set_parent_graphics`). The objects are kept in the
+    `TransformTree` of the main loop, which moves the children of an object after it moves, and calls `update_transform`
+    of every object that moved. When an object is unregistered, all of its children are unregistered as well.
+
+    Objects that can be pressed (that override `is_mouse_in`) are kept in the `SpatialHash` of the main loop by their
+    `get_bounding_box`. Setting `x` or `y` marks them as moved in it.
+    Objects that are drawn or moved are also kept in the `ViewCuller` of the main loop, which takes them out of the
+    loop while their bounding box is off the screen. Setting `x` or `y` marks them as moved in it as well.
     """
+    spatial_hash = None  # the `SpatialHash` the object is indexed in, if any.
+    is_spatially_moved = False  # whether the object moved since its cells in the `SpatialHash` were last updated.
+    view_culler = None  # the `ViewCuller` the object is culled by, if any.
+    is_view_moved = False  # whether the object moved since the `ViewCuller` last tested it.
+    transform_tree = None  # the `TransformTree` the object is in, if any.
+    is_transform_moved = False  # whether the object moved since the `TransformTree` last updated it.
+    parent_graphics = None  # the `GraphicsObject` this object follows, if any.
+    padding = (0, 0)  # the location of the object relative to its `parent_graphics`
+    is_on_screen = True  # whether or not the bounding box of the object is on the screen (see `ViewCuller`)
+    layer = WORLD_LAYER  # the layer the object is drawn in (see `DRAW_LAYERS`)
+    starts_draw_segment = False
+    # ^ whether the object is drawn over the sprites and the texts of the objects beneath it in its layer (`DrawLayers`)
+    drawn_by = None
+    # ^ the item of the `DrawLayers` that draws the object, if it is drawn by another one. It is pressed in its place.
+
     def __init__(self, x=None, y=None, do_render=True, centered=False, is_in_background=False, is_pressable=False):
         """
         Initiates a graphics object and registers it to the main loop.
@@ -22,7 +47,7 @@ class GraphicsObject(metaclass=ABCMeta):
         :param y: y coordinate
         :param do_render: whether the GraphicsObject is rendered or not.
         :param centered: whether the coordinates of object are in the middle of the sprite or the bottom left point.
-        :param is_in_background: whether the object is drawn in the back or the front of the other objects.
+        :param is_in_background: whether the object is drawn in the background layer, or in its own `layer`.
         :param is_pressable: whether or not this object can be clicked on.
         """
         self.x = x
@@ -40,6 +65,70 @@ class GraphicsObject(metaclass=ABCMeta):
         if self.do_render:
             MainLoop.instance.register_graphics_object(self, is_in_background)
 
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, x):
+        self._x = x
+        self.mark_moved()
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, y):
+        self._y = y
+        self.mark_moved()
+
+    def mark_moved(self):
+        """
+        Marks the object as moved in the `SpatialHash`, the `ViewCuller` and the `TransformTree` it is in (if it is in
+        them). Objects whose bounding box changes without setting `x` or `y` should call this.
+        :return: None
+        """
+        if self.spatial_hash is not None and not self.is_spatially_moved:
+            self.spatial_hash.mark_moved(self)
+        if self.view_culler is not None and not self.is_view_moved:
+            self.view_culler.mark_moved(self)
+        if self.transform_tree is not None and not self.is_transform_moved:
+            self.transform_tree.mark_moved(self)
+
+    def set_parent_graphics(self, parent, padding=(0, 0)):
+        """
+        Makes the object follow a parent graphics object: its location is always the location of the parent plus the
+        padding. When the parent is unregistered, this object is unregistered as well.
+        It can be called again to change the padding.
+        :param parent: a `GraphicsObject` to follow
+        :param padding: a tuple (x, y) of the location relative to the parent.
+        :return: None
+        """
+        MainLoop.instance.transform_tree.set_parent(self, parent, padding)
+
+    def on_hover_enter(self):
+        """
+        This is called when the mouse moves onto the object (when it becomes the top object the mouse is on).
+        :return: None
+        """
+        pass
+
+    def on_hover_leave(self):
+        """
+        This is called when the mouse moves off the object, or when another object is on top of it under the mouse.
+        :return: None
+        """
+        pass
+
+    def update_transform(self):
+        """
+        This is called once after the object moves (by the `TransformTree`, before the frame is drawn).
+        Objects that keep their location somewhere else as well (in a sprite, a label...) should update it here.
+        :return: None
+        """
+        pass
+
     @property
     def location(self):
         """
@@ -63,6 +152,50 @@ class GraphicsObject(metaclass=ABCMeta):
         """
         return False
 
+    @property
+    def is_hit_testable(self):
+        """
+        Whether or not the mouse can ever be in the object. (if it does not override `is_mouse_in`, it cannot)
+        Only these objects are kept in the `SpatialHash` of the main loop.
+        """
+        return type(self).is_mouse_in is not GraphicsObject.is_mouse_in
+
+    @property
+    def has_draw(self):
+        """Whether or not the object draws itself in `draw` (objects that are drawn by something else override this)"""
+        return True
+
+    @property
+    def has_move(self):
+        """Whether or not the object overrides `move` (if it does not, there is no need to call it)"""
+        return type(self).move is not GraphicsObject.move
+
+    @property
+    def is_cullable(self):
+        """
+        Whether or not the `ViewCuller` has anything to take out of the loop while the object is off the screen
+        (objects that are not drawn or moved by the loop do not, unless they override this)
+        """
+        return self.has_draw or self.has_move
+
+    def get_bounding_box(self):
+        """
+        Returns the rectangle that contains everything `is_mouse_in` can return True for.
+        Objects that override `is_mouse_in` should override this as well, otherwise they are tested on every press.
+        :return: a tuple (min_x, min_y, max_x, max_y) or None if the object has no bounding box.
+        """
+        return None
+
+    def set_on_screen(self, is_on_screen):
+        """
+        Called by the `ViewCuller` when the object goes off the screen or comes back to it. By then its `draw` is
+        already out of the main loop (or back in it).
+        Objects that are drawn some other way (a sprite in a batch for example) should hide themselves here.
+        :param is_on_screen: whether or not the object is on the screen now.
+        :return: None
+        """
+        self.is_on_screen = is_on_screen
+
     def load(self):
         """
         The function that should load the object.
@@ -71,6 +204,14 @@ class GraphicsObject(metaclass=ABCMeta):
         """
         pass
 
+    def unload(self):
+        """
+        The opposite of `load`. It is called when the object is unregistered from the main loop.
+        It might be called more than once, so it should do nothing if the object is already unloaded.
+        :return: None
+        """
+        pass
+
     @abstractmethod
     def draw(self):
         """
@@ -84,6 +225,7 @@ class GraphicsObject(metaclass=ABCMeta):
         """
         This method should be overridden in any subclasses.
         It should handle the moving of the object on the screen, it will be called every loop of the program.
+        If it is not overridden, it is not inserted into the main loop at all.
         :return: None
         """
         pass
@@ -2,15 +2,20 @@ import pyglet
 
 from consts import *
 from src.abstracts.graphics_object import GraphicsObject
+from src.asset_cache import asset_cache
 from src.main_loop import MainLoop
 from src.main_window import MainWindow
 from src.shape_drawing import draw_rect_no_fill
+from src.sprite_batch import sprite_batch
 
 
 class ImageGraphics(GraphicsObject):
     """
     This class is a superclass of any `GraphicsObject` subclass which uses an image in its `draw` method.
     Put simply, it is a graphics object with a picture.
+
+    The sprites of all of the image graphics are drawn together through the `sprite_batch`, at the end of their draw
+    segment (see `DrawLayers`), so an image graphics object does not draw itself (unless a subclass overrides `draw`).
     """
     def __init__(self, image_name, x, y, centered=False, is_in_background=False, scale_factor=SPRITE_SCALE_FACTOR,
                  is_opaque=False, is_pressable=False):
@@ -18,6 +23,7 @@ class ImageGraphics(GraphicsObject):
         self.image_name = image_name
         self.scale_factor = scale_factor
         self.is_opaque = is_opaque
+        self.is_in_background = is_in_background
         self.sprite = None
 
         self.is_image = True
@@ -29,13 +35,14 @@ class ImageGraphics(GraphicsObject):
         """
         Receives an image_name and x and y coordinates and returns a `pyglet.sprite.Sprite`
         object that can be displayed on the screen.
+        The image is taken from the `asset_cache`, so it is only loaded from the disk once.
 
         :param image_name: come on bro....
         :param x:
         :param y:
         :return: `pyglet.sprite.Sprite` object
         """
-        returned = pyglet.sprite.Sprite(pyglet.image.load(image_name), x=x, y=y)
+        returned = pyglet.sprite.Sprite(asset_cache.get_image(image_name), x=x, y=y)
         returned.opacity = OPAQUE if is_opaque else NOT_OPAQUE
         returned.update(scale_x=scale_factor, scale_y=scale_factor)
         return returned
@@ -69,6 +76,16 @@ class ImageGraphics(GraphicsObject):
         return (self.x - (self.sprite.width / 2.0) < mouse_x < self.x + (self.sprite.width / 2.0)) and\
                 (self.y - (self.sprite.height / 2.0) < mouse_y < self.y + (self.sprite.height / 2.0))
 
+    def get_bounding_box(self):
+        """
+        Returns the rectangle of the sprite of the object on the screen.
+        :return: a tuple (min_x, min_y, max_x, max_y)
+        """
+        if not self.centered:
+            return self.x, self.y, self.x + self.sprite.width, self.y + self.sprite.height
+        return self.x - (self.sprite.width / 2.0), self.y - (self.sprite.height / 2.0), \
+            self.x + (self.sprite.width / 2.0), self.y + (self.sprite.height / 2.0)
+
     def get_center(self):
         """
         Return the location of the center of the sprite as a tuple.
@@ -126,19 +143,43 @@ class ImageGraphics(GraphicsObject):
             x, y = self.get_centered_coordinates()
             self.sprite.update(x, y)
 
+        sprite_batch.add(self, self.sprite)
+
+    def unload(self):
+        """
+        Removes the sprite of the object from the `sprite_batch`.
+        :return: None
+        """
+        sprite_batch.remove(self)
+
+    def set_on_screen(self, is_on_screen):
+        """
+        Hides the sprite while the object is off the screen, so the `sprite_batch` does not draw it.
+        :return: None
+        """
+        super(ImageGraphics, self).set_on_screen(is_on_screen)
+        self.sprite.visible = is_on_screen
+
+    @property
+    def has_draw(self):
+        """The sprite is drawn by the `sprite_batch`, so only subclasses that override `draw` draw anything"""
+        return type(self).draw is not ImageGraphics.draw
+
+    @property
+    def is_cullable(self):
+        """The sprite is hidden while the object is off the screen (see `set_on_screen`)"""
+        return True
+
     def draw(self):
         """
-        This is called once every tick of the clock (`update` function).
-        This function is in charge of the graphical drawing of the object, draws the image to the screen.
+        The sprite is in the `sprite_batch`, it is drawn at the end of the draw segment of the object.
         :return: None
         """
-        self.sprite.draw()
+        pass
 
-    def move(self):
+    def update_transform(self):
         """
-        This is called once every tick of the clock (`update` function).
-        This function is in charge of the motion of the object in a theoretical sense.
-        (If the object does not move, no need to override this).
+        This is called once after the object moves.
         It updates the sprite's location to be the same as the `GraphicsObjects`'s location.
         :return: None
         """
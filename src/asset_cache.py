@@ -0,0 +1,140 @@
+import os
+
+import pyglet
+
+from consts import *
+
+
+class AssetCache:
+    """
+    Decodes every image under the sprites directory once, and keeps it for the whole run of the program.
+
+    The images are packed into texture atlases by their category (the directory they are in under the sprites
+    directory: computers, packets, processes, viewing_items, misc). When an image of a category is asked for, all of
+    the images of that category are decoded and packed together, so the sprites of one category share a texture and
+    can be drawn in the same batch.
+    The cache hands out `pyglet.image.TextureRegion`-s of the atlases. Images that are too large for an atlas (the logo
+    for example) get a texture of their own.
+
+    Animations are cut out of their sprite sheets (which are images in the atlases as well) and kept by the way they
+    were cut, so all of the instances of an animation share its frames.
+
+    The atlases are only created when they are first needed, since creating textures requires a GL context.
+    """
+    def __init__(self, directory=SPRITES_DIRECTORY, atlas_size=TEXTURE_ATLAS_SIZE):
+        """
+        Initiates an empty cache.
+        :param directory: the directory the images are in.
+        :param atlas_size: the width and height of the texture atlases.
+        """
+        self.directory = directory
+        self.atlas_size = atlas_size
+
+        self.texture_bins = {}
+        # ^ maps every category to the `pyglet.image.atlas.TextureBin` that holds the atlases of that category.
+        self.images = {}
+        # ^ maps every image name (relative to the sprites directory) to its texture region.
+        self.animations = {}
+        # ^ maps the parameters of every animation that was asked for (see `get_animation`) to its `pyglet.image.Animation`
+        self.decoded_count = 0  # the amount of image files that were decoded
+
+    def get_relative_name(self, image_name):
+        """
+        Returns the name of an image relative to the sprites directory.
+        :param image_name: the name of the image, with or without the sprites directory (`IMAGES.format` or not)
+        :return: the relative name, with '/' as the separator (for example 'computers/router.png')
+        """
+        return os.path.relpath(image_name, self.directory).replace(os.sep, '/')
+
+    @staticmethod
+    def get_category(relative_name):
+        """
+        :param relative_name: the name of an image relative to the sprites directory.
+        :return: the category of the image (the directory it is in), or '' if it is not in a directory under the sprites
+            directory.
+        """
+        category, _, _ = relative_name.rpartition('/')
+        return '' if category.startswith(os.pardir) else category
+
+    def get_image(self, image_name):
+        """
+        Returns the texture of an image. The image is only decoded the first time it is asked for.
+        :param image_name: the name of the image, with or without the sprites directory (`IMAGES.format` or not)
+        :return: a `pyglet.image.TextureRegion` (or a `pyglet.image.Texture` for images that are too large for an atlas)
+        """
+        relative_name = self.get_relative_name(image_name)
+        if relative_name not in self.images:
+            category = self.get_category(relative_name)
+            if category not in self.texture_bins:
+                self.load_category(category)
+
+            if relative_name not in self.images:  # not a png in the directory of its category
+                self._add(relative_name, category)
+        return self.images[relative_name]
+
+    def get_animation(self, image_name, x_count, y_count, item_width, item_height, frame_rate, is_looping):
+        """
+        Returns an animation that is cut out of a sprite sheet. It is only created the first time it is asked for.
+        The frames are regions of the texture of the sheet, so nothing new is decoded or uploaded for them.
+        :param image_name: the name of the sprite sheet (like in `get_image`)
+        :param x_count: the amount of frames in the x direction
+        :param y_count: the amount of frames in the y direction
+        :param item_width: the width of a single frame
+        :param item_height: the height of a single frame
+        :param frame_rate: the time every frame is shown (in seconds)
+        :param is_looping: whether or not the animation loops
+        :return: a `pyglet.image.Animation`
+        """
+        key = self.get_relative_name(image_name), x_count, y_count, item_width, item_height, frame_rate, is_looping
+        if key not in self.animations:
+            sequence = pyglet.image.ImageGrid(self.get_image(image_name), x_count, y_count,
+                                              item_width=item_width, item_height=item_height)
+            textures = pyglet.image.TextureGrid(sequence)
+            self.animations[key] = pyglet.image.Animation.from_image_sequence(textures[:], frame_rate, loop=is_looping)
+        return self.animations[key]
+
+    def load_category(self, category):
+        """
+        Decodes all of the images of a category and packs them into the atlases of the category.
+        :param category: the name of a directory under the sprites directory
+        :return: None
+        """
+        self.texture_bins[category] = pyglet.image.atlas.TextureBin(self.atlas_size, self.atlas_size)
+
+        category_directory = os.path.join(self.directory, category)
+        if not os.path.isdir(category_directory):
+            return
+
+        for file_name in sorted(os.listdir(category_directory)):
+            relative_name = f"{category}/{file_name}" if category else file_name
+            if file_name.lower().endswith(".png") and relative_name not in self.images:
+                self._add(relative_name, category)
+
+    def _add(self, relative_name, category):
+        """
+        Decodes an image and adds it to the atlases of its category (which must already be loaded)
+        :param relative_name: the name of the image relative to the sprites directory.
+        :param category: the category of the image.
+        :return: None
+        """
+        image = pyglet.image.load(os.path.join(self.directory, relative_name))
+        self.decoded_count += 1
+
+        texture_bin = self.texture_bins[category]
+        if image.width + 2 * TEXTURE_ATLAS_BORDER > texture_bin.texture_width or \
+                image.height + 2 * TEXTURE_ATLAS_BORDER > texture_bin.texture_height:
+            self.images[relative_name] = image.get_texture()
+            return
+
+        self.images[relative_name] = texture_bin.add(image, border=TEXTURE_ATLAS_BORDER)
+
+    def get_atlas_textures(self, category):
+        """
+        :param category: a category of images
+        :return: a list of the textures of the atlases of the category (usually just one)
+        """
+        texture_bin = self.texture_bins.get(category)
+        return [] if texture_bin is None else [atlas.texture for atlas in texture_bin.atlases]
+
+
+asset_cache = AssetCache()
@@ -0,0 +1,259 @@
+import time
+
+from usefuls import DoubleEndedOrderedSet
+
+
+class CallbackHandle:
+    """
+    A single function call that is registered in a `CallbackScheduler`.
+    It is returned when a function is inserted to the scheduler and can be used to remove it afterwards in O(1).
+    """
+    __slots__ = ("function", "args", "kwargs", "can_be_paused", "is_active", "is_suspended")
+
+    def __init__(self, function, args, kwargs, can_be_paused):
+        """
+        Initiates the handle.
+        :param function: the function that will be called.
+        :param args: a tuple of arguments to call it with.
+        :param kwargs: a dictionary of key-word arguments to call it with.
+        :param can_be_paused: whether or not the call is skipped when the program is paused.
+        """
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.can_be_paused = can_be_paused
+        self.is_active = True
+        # ^ becomes False once the handle is removed from the scheduler, so it is not called even if it was removed in
+        # the middle of the tick that is currently running.
+        self.is_suspended = False
+        # ^ whether the call is skipped for now (see `CallbackScheduler.suspend`), it keeps its place in the scheduler.
+
+    def __call__(self):
+        """Performs the call the handle represents"""
+        return self.function(*self.args, **self.kwargs)
+
+    def __repr__(self):
+        pausable = "pausable " if self.can_be_paused else ""
+        return f"CallbackHandle({pausable}{self.function!r})"
+
+
+class CallbackScheduler:
+    """
+    Holds the functions that are called in every tick of the main loop, in the order they are called.
+
+    Every inserted function gets a `CallbackHandle`. The handles are kept in three ordered sets:
+        `_all_calls` holds every handle.
+        `_unpausable_calls` holds only the handles that are not paused when the program is paused.
+        `_pausable_calls` holds only the handles that are paused when the program is paused.
+    They only ever grow at their ends, so the order of the handles in `_unpausable_calls` and `_pausable_calls` is
+    always the same as their order in `_all_calls`. That way, when the program is paused, the pausable calls are skipped
+    without being tested, and the pausable calls can be performed on their own (see `MainLoop.set_fixed_time_step`).
+
+    Inserting at either end, removing, and moving a call to the end are all O(1).
+
+    A call can also be suspended: it keeps its place, but it is left out of the cached tuples of calls until it is
+    resumed, so a tick does not even loop over it. (for example the `move`-s of objects that are frozen off the screen)
+    """
+    def __init__(self):
+        """
+        Initiates an empty scheduler.
+        """
+        self._all_calls = DoubleEndedOrderedSet()
+        self._unpausable_calls = DoubleEndedOrderedSet()
+        self._pausable_calls = DoubleEndedOrderedSet()
+
+        self._handles_by_function = {}
+        # ^ maps each function to a dictionary whose keys are its handles, so it can be removed without searching for it.
+
+        self._cached_calls = {}
+        # ^ maps each ordered set of handles (by id) to a tuple of (handle, function, args, kwargs) for each call in it.
+        # It is cleared when anything changes.
+
+    def insert(self, function, args=(), kwargs=None, can_be_paused=False, at_start=False):
+        """
+        Inserts a new call to the scheduler.
+        :param function: the function to call.
+        :param args: the arguments to call it with.
+        :param kwargs: the key-word arguments to call it with.
+        :param can_be_paused: whether or not this call should be skipped while the program is paused.
+        :param at_start: whether the function is called before all other calls or after them.
+        :return: the `CallbackHandle` of the new call.
+        """
+        handle = CallbackHandle(function, args, {} if kwargs is None else kwargs, can_be_paused)
+
+        self._insert_handle(self._all_calls, handle, at_start)
+        self._insert_handle(self._pausable_calls if can_be_paused else self._unpausable_calls, handle, at_start)
+
+        self._handles_by_function.setdefault(function, {})[handle] = None
+        self._clear_cache()
+        return handle
+
+    def _clear_cache(self):
+        """
+        Clears the cached tuples of calls. Must be called whenever the scheduler changes.
+        :return: None
+        """
+        self._cached_calls.clear()
+
+    @staticmethod
+    def _insert_handle(calls, handle, at_start):
+        """
+        Inserts a handle into one of the ordered sets of the scheduler.
+        :param calls: a `DoubleEndedOrderedSet`
+        :param handle: a `CallbackHandle`
+        :param at_start: whether to insert it at the start or at the end
+        :return: None
+        """
+        if at_start:
+            calls.appendleft(handle)
+        else:
+            calls.append(handle)
+
+    def remove(self, handle):
+        """
+        Removes a call from the scheduler by its handle.
+        If it is already removed, does nothing.
+        :param handle: a `CallbackHandle` that was returned by `self.insert`
+        :return: None
+        """
+        handle.is_active = False
+        self._all_calls.discard(handle)
+        self._unpausable_calls.discard(handle)
+        self._pausable_calls.discard(handle)
+
+        handles = self._handles_by_function.get(handle.function)
+        if handles is not None:
+            handles.pop(handle, None)
+            if not handles:
+                del self._handles_by_function[handle.function]
+
+        self._clear_cache()
+
+    def remove_function(self, function):
+        """
+        Removes all of the calls of a given function from the scheduler.
+        :param function: the function to remove.
+        :return: None
+        """
+        for handle in self.get_handles(function):
+            self.remove(handle)
+
+    def move_to_end(self, handle):
+        """
+        Moves a call to be the last one that is called (out of the calls that are currently in the scheduler)
+        :param handle: a `CallbackHandle` that is in the scheduler.
+        :return: None
+        """
+        if not handle.is_active:
+            return
+
+        self._all_calls.append(handle)
+        (self._pausable_calls if handle.can_be_paused else self._unpausable_calls).append(handle)
+
+        self._clear_cache()
+
+    def suspend(self, handle):
+        """
+        Stops performing a call until it is resumed, without removing it from the scheduler (it keeps its place).
+        If it is already suspended, does nothing.
+        :param handle: a `CallbackHandle` that is in the scheduler.
+        :return: None
+        """
+        if not handle.is_suspended:
+            handle.is_suspended = True
+            self._clear_cache()
+
+    def resume(self, handle):
+        """
+        Performs a suspended call again, in the place it was in. If it is not suspended, does nothing.
+        :param handle: a `CallbackHandle` that is in the scheduler.
+        :return: None
+        """
+        if handle.is_suspended:
+            handle.is_suspended = False
+            self._clear_cache()
+
+    def get_handles(self, function):
+        """
+        Returns the handles of all of the calls of a given function (in the order they were inserted)
+        :param function: a function
+        :return: a tuple of `CallbackHandle`-s
+        """
+        return tuple(self._handles_by_function.get(function, ()))
+
+    def get_calls(self, is_paused=False):
+        """
+        Returns the handles that should be called in the current tick, in order.
+        :param is_paused: whether or not the program is currently paused.
+        :return: a tuple of `CallbackHandle`-s.
+        """
+        return (self._unpausable_calls if is_paused else self._all_calls).as_tuple()
+
+    def call(self, is_paused=False, profiler=None):
+        """
+        Performs all of the calls that should be called in the current tick.
+        Calls that are removed during the tick are not called anymore.
+        :param is_paused: whether or not the program is currently paused.
+        :param profiler: a `FrameProfiler` to time every call with, or None to not time anything.
+        :return: None
+        """
+        self._call(self._unpausable_calls if is_paused else self._all_calls, profiler)
+
+    def call_pausable(self, profiler=None):
+        """
+        Performs only the pausable calls (the `move`-s of the graphics objects), in order.
+        :param profiler: a `FrameProfiler` to time every call with, or None to not time anything.
+        :return: None
+        """
+        self._call(self._pausable_calls, profiler)
+
+    def call_unpausable(self, profiler=None):
+        """
+        Performs only the calls that cannot be paused, in order.
+        :param profiler: a `FrameProfiler` to time every call with, or None to not time anything.
+        :return: None
+        """
+        self._call(self._unpausable_calls, profiler)
+
+    def _call(self, calls, profiler=None):
+        """
+        Performs all of the calls in one of the ordered sets of handles (except for the suspended ones).
+        :param calls: a `DoubleEndedOrderedSet` of `CallbackHandle`-s
+        :param profiler: a `FrameProfiler` to time every call with, or None to not time anything.
+        :return: None
+        """
+        cached_calls = self._cached_calls.get(id(calls))
+        if cached_calls is None:
+            cached_calls = self._cached_calls[id(calls)] = tuple(
+                (handle, handle.function, handle.args, handle.kwargs) for handle in calls if not handle.is_suspended
+            )
+
+        if profiler is not None:
+            self._profiled_call(cached_calls, profiler)
+            return
+
+        for handle, function, args, kwargs in cached_calls:
+            if handle.is_active:
+                function(*args, **kwargs)
+
+    @staticmethod
+    def _profiled_call(cached_calls, profiler):
+        """
+        Exactly like the loop in `_call` but every call is timed and the time is added to the profiler.
+        It is separate so the loop in `_call` does not pay for profiling when it is off.
+        :param cached_calls: a tuple of (handle, function, args, kwargs)
+        :param profiler: a `FrameProfiler`
+        :return: None
+        """
+        clock = time.perf_counter_ns
+        for handle, function, args, kwargs in cached_calls:
+            if handle.is_active:
+                start = clock()
+                function(*args, **kwargs)
+                profiler.add_call_time(handle, clock() - start)
+
+    def __len__(self):
+        return len(self._all_calls)
+
+    def __contains__(self, handle):
+        return handle in self._all_calls
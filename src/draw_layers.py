@@ -0,0 +1,358 @@
+import time
+
+import pyglet
+
+from consts import *
+from src.shape_drawing import flush_shape_batch
+from usefuls import DoubleEndedOrderedSet
+
+
+class DrawSegment:
+    """
+    A run of consecutive items in a layer of the `DrawLayers` that are drawn together: first the draw functions of the
+    items (in order), and then all of their sprites and texts, in one `pyglet.graphics.Batch`.
+    """
+    def __init__(self):
+        """
+        Initiates an empty segment. Its batch is only created when the first sprite or text is added to it.
+        """
+        self.item_count = 0  # the amount of items in the segment, it is dropped from its layer when there are none.
+        self.batch = None
+
+    def get_batch(self):
+        """
+        :return: the `pyglet.graphics.Batch` of the segment (it is created if it does not exist yet)
+        """
+        if self.batch is None:
+            self.batch = pyglet.graphics.Batch()
+        return self.batch
+
+    def draw_batch(self):
+        """
+        Draws the sprites and the texts of the segment, over the shapes that were drawn before them.
+        :return: None
+        """
+        if self.batch is not None:
+            flush_shape_batch()
+            self.batch.draw()
+
+
+class DrawLayers:
+    """
+    The order everything is drawn in, which is also the order the objects are pressed in (the top one first).
+
+    It is split into layers (see `DRAW_LAYERS`): the background, the world, the user interface and the popup windows.
+    Every layer is a `DoubleEndedOrderedSet` of items (graphics objects, or anything else that is drawn), so adding an
+    item to either end of its layer, removing it and moving it to the front of a layer (or of another layer) are O(1).
+    Every item has a draw function, or None if it is only there to keep its place in the order (an object that is
+    drawn by something else, like a `Ball`).
+
+    Every layer is split into `DrawSegment`-s, runs of consecutive items whose sprites and texts are in one batch (see
+    `get_batch`). A segment draws the draw functions of its items in order and then its batch, so the sprites and the
+    texts of a segment are over the shapes of the segment and beneath everything in the segments after it.
+    An item is added to the last segment of its layer (or to the first, if it is added to the start), unless it starts a
+    segment of its own: an item whose shapes should cover the sprites and the texts of the items beneath it (like a
+    popup window). When an item moves to another segment, its sprites and texts move to the batch of the new segment, so
+    the amount of batches never grows past the amount of segments. Empty segments are dropped.
+    Everything in a layer is beneath everything in the layers above it.
+
+    An item that is drawn by another item (a `Ball` is drawn by the `BallRenderer`) takes the place of that item in the
+    order of `get_order`, so it is pressed in the order it is seen in.
+
+    An item can also be suspended, for a reason: when it is off the screen (`OFF_SCREEN`) or hidden (`HIDDEN`). It keeps
+    its place, but its draw function is not called (or even looped over) until it is resumed for all of its reasons.
+    The sprites of a hidden item are not moved along with it, they move to the batch of its segment when it is shown.
+    """
+    OFF_SCREEN = "off screen"
+    HIDDEN = "hidden"
+
+    def __init__(self):
+        """
+        Initiates empty layers.
+        """
+        self.layers = {layer: DoubleEndedOrderedSet() for layer in DRAW_LAYERS}
+        self.item_layers = {}  # maps every item to the layer it is in.
+        self.draw_functions = {}  # maps every item to its draw function (or None)
+        self.suspended_items = {}
+        # ^ maps every suspended item to the set of the reasons it is suspended for.
+
+        self.segments = {layer: DoubleEndedOrderedSet() for layer in DRAW_LAYERS}  # the `DrawSegment`-s of every layer
+        self.item_segments = {}  # maps every item to the segment it is in.
+        self.segment_starters = set()  # the items that start a segment of their own (when added or moved to the front)
+        self.drawers = {}  # maps the items that are drawn by other items to the items that draw them.
+        self.batched = {}
+        # ^ maps items to the list of their sprites and labels (in the batch of the segment of the item). They are kept
+        # even while the item is out of the layers, until they are removed with `remove_from_batch`.
+
+        self._cached_draws = None
+        # ^ a tuple of (layer, tuple of (segment, tuple of (item, draw function) to call in it)) for each layer, cleared
+        # on any change.
+
+    def add(self, item, layer, draw_function, at_start=False, starts_segment=False, drawn_by=None):
+        """
+        Adds an item to a layer. If it is already in one, it is moved.
+        :param item: a hashable object (a `GraphicsObject` for example)
+        :param layer: one of `DRAW_LAYERS`
+        :param draw_function: the function that draws the item, or None if the item does not draw anything.
+        :param at_start: whether the item is added beneath the rest of the layer or on top of it.
+        :param starts_segment: whether the item starts a `DrawSegment` of its own, so what it draws covers the sprites
+            and the texts of the items beneath it.
+        :param drawn_by: the item that draws this item, if another item draws it (its order is the order of that item)
+        :return: None
+        """
+        self.remove(item)
+        if at_start:
+            self.layers[layer].appendleft(item)
+        else:
+            self.layers[layer].append(item)
+
+        self.item_layers[item] = layer
+        self.draw_functions[item] = draw_function
+        if starts_segment:
+            self.segment_starters.add(item)
+        if drawn_by is not None:
+            self.drawers[item] = drawn_by
+        self._join_segment(item, layer, at_start)
+        self._cached_draws = None
+
+    def remove(self, item):
+        """
+        Removes an item from its layer. If it is not in any, does nothing.
+        :param item: an item
+        :return: None
+        """
+        layer = self.item_layers.pop(item, None)
+        if layer is None:
+            return
+
+        self.layers[layer].discard(item)
+        del self.draw_functions[item]
+        self.suspended_items.pop(item, None)
+        self._leave_segment(item, layer)
+        self.segment_starters.discard(item)
+        self.drawers.pop(item, None)
+        self._cached_draws = None
+
+    def __contains__(self, item):
+        return item in self.item_layers
+
+    def get_layer(self, item):
+        """
+        :param item: an item in the layers
+        :return: the layer it is in.
+        """
+        return self.item_layers[item]
+
+    def move_to_front(self, item, layer=None):
+        """
+        Moves an item on top of all of the other items of a layer.
+        :param item: an item in the layers
+        :param layer: the layer to move it to, or None to keep it in its own layer.
+        :return: None
+        """
+        current_layer = self.item_layers[item]
+        layer = current_layer if layer is None else layer
+        if layer != current_layer:
+            self.layers[current_layer].discard(item)
+            self.item_layers[item] = layer
+
+        self.layers[layer].append(item)
+        is_in_last_segment = layer == current_layer and self.item_segments[item] is self.segments[layer].get_last()
+        if item in self.segment_starters or not is_in_last_segment:
+            self._leave_segment(item, current_layer)
+            self._join_segment(item, layer)
+        self._cached_draws = None
+
+    def _join_segment(self, item, layer, at_start=False):
+        """
+        Adds an item that was just added to an end of a layer to the segment at that end (or to a new one, if it starts
+        a segment of its own), and moves its sprites and labels to the batch of that segment.
+        :param item: an item in the layers
+        :param layer: its layer
+        :param at_start: whether it was added to the start of the layer or to the end.
+        :return: None
+        """
+        segments = self.segments[layer]
+        if item in self.segment_starters or not segments:
+            segment = DrawSegment()
+            if at_start:
+                segments.appendleft(segment)
+            else:
+                segments.append(segment)
+        else:
+            segment = segments.get_first() if at_start else segments.get_last()
+
+        segment.item_count += 1
+        self.item_segments[item] = segment
+
+        if self.HIDDEN not in self.suspended_items.get(item, ()):
+            self._move_to_batch(item)  # the drawables of a hidden item are moved when it is resumed
+
+    def _move_to_batch(self, item):
+        """
+        Moves the sprites and the labels of an item to the batch of its segment.
+        :param item: an item in the layers
+        :return: None
+        """
+        drawables = self.batched.get(item)
+        if drawables:
+            batch = self.item_segments[item].get_batch()
+            for drawable in drawables:
+                if drawable.batch is not batch:
+                    drawable.batch = batch
+
+    def _leave_segment(self, item, layer):
+        """
+        Takes an item out of its segment, the segment is dropped if it is left empty.
+        :param item: an item in the layers
+        :param layer: the layer the segment is in
+        :return: None
+        """
+        segment = self.item_segments.pop(item)
+        segment.item_count -= 1
+        if not segment.item_count:
+            self.segments[layer].discard(segment)
+
+    def get_batch(self, item):
+        """
+        :param item: an item in the layers
+        :return: the `pyglet.graphics.Batch` of the segment of the item, its sprites and labels should be drawn in it.
+        """
+        return self.item_segments[item].get_batch()
+
+    def add_to_batch(self, item, drawable):
+        """
+        Puts a sprite or a label of an item in the batch of its segment. It follows the item to every segment it moves
+        to, until it is removed with `remove_from_batch`.
+        :param item: an item in the layers
+        :param drawable: a `pyglet.sprite.Sprite` or a `pyglet.text.DocumentLabel` (anything with a settable `batch`)
+        :return: None
+        """
+        batch = self.get_batch(item)
+        if drawable.batch is not batch:
+            drawable.batch = batch
+        self.batched.setdefault(item, []).append(drawable)
+
+    def remove_from_batch(self, item, drawable):
+        """
+        Stops moving a sprite or a label of an item along with the item. It stays in the batch it is in, unless it is
+        taken out of it (by the one who added it). If it was not added, does nothing.
+        :param item: an item
+        :param drawable: a sprite or a label that was added with `add_to_batch`
+        :return: None
+        """
+        drawables = self.batched.get(item)
+        if drawables is None or drawable not in drawables:
+            return
+
+        drawables.remove(drawable)
+        if not drawables:
+            del self.batched[item]
+
+    def get_order(self, item):
+        """
+        Returns a sorting key of the place of an item in the drawing order: items that are drawn later have larger keys.
+        An item that is drawn by another item has the key of that item.
+        :param item: an item in the layers
+        :return: a tuple (layer, order in the layer)
+        """
+        drawer = self.drawers.get(item)
+        if drawer is not None and drawer in self.item_layers:
+            item = drawer
+        layer = self.item_layers[item]
+        return layer, self.layers[layer].get_order(item)
+
+    def suspend(self, item, reason):
+        """
+        Stops drawing an item until it is resumed for the same reason, it keeps its place.
+        If it is not in the layers, does nothing.
+        :param item: an item in the layers
+        :param reason: `OFF_SCREEN` or `HIDDEN`
+        :return: None
+        """
+        if item not in self.item_layers:
+            return
+
+        reasons = self.suspended_items.setdefault(item, set())
+        if not reasons:
+            self._cached_draws = None
+        reasons.add(reason)
+
+    def resume(self, item, reason):
+        """
+        Resumes an item that was suspended for some reason. It is drawn again if it is not suspended for another one.
+        If it is not suspended for that reason, does nothing.
+        :param item: an item in the layers
+        :param reason: `OFF_SCREEN` or `HIDDEN`
+        :return: None
+        """
+        reasons = self.suspended_items.get(item)
+        if reasons is None or reason not in reasons:
+            return
+
+        reasons.discard(reason)
+        if reason == self.HIDDEN:
+            self._move_to_batch(item)  # it might have moved to another segment while it was hidden
+        if not reasons:
+            del self.suspended_items[item]
+            self._cached_draws = None
+
+    def get_draws(self):
+        """
+        Returns the segments of every layer with the draw functions to call in each of them (without the suspended
+        items), in order.
+        It is cached until the layers change.
+        :return: a tuple of (layer, tuple of (segment, tuple of (item, draw function)))
+        """
+        if self._cached_draws is None:
+            self._cached_draws = tuple((layer, self._get_layer_draws(layer)) for layer in DRAW_LAYERS)
+        return self._cached_draws
+
+    def _get_layer_draws(self, layer):
+        """
+        :param layer: one of `DRAW_LAYERS`
+        :return: a tuple of (segment, tuple of (item, draw function)) for every segment of the layer, in order.
+        """
+        draw_functions, suspended_items, item_segments = self.draw_functions, self.suspended_items, self.item_segments
+        segment_draws = {segment: [] for segment in self.segments[layer]}
+        for item in self.layers[layer]:
+            if draw_functions[item] is not None and item not in suspended_items:
+                segment_draws[item_segments[item]].append((item, draw_functions[item]))
+        return tuple((segment, tuple(draws)) for segment, draws in segment_draws.items())
+
+    def draw(self, profiler=None):
+        """
+        Draws all of the layers, from the bottom one up.
+        Items that are removed in the middle of the drawing are not drawn anymore.
+        :param profiler: a `FrameProfiler` to time every draw function with, or None to not time anything.
+        :return: None
+        """
+        if profiler is not None:
+            self._profiled_draw(profiler)
+            return
+
+        item_layers = self.item_layers
+        for layer, segments in self.get_draws():
+            for segment, draws in segments:
+                for item, draw_function in draws:
+                    if item in item_layers:
+                        draw_function()
+                segment.draw_batch()
+
+    def _profiled_draw(self, profiler):
+        """
+        Exactly like `draw` but every draw function and every batch is timed by the profiler.
+        It is separate so `draw` does not pay for profiling when it is off.
+        :param profiler: a `FrameProfiler`
+        :return: None
+        """
+        clock, item_layers = time.perf_counter_ns, self.item_layers
+        for layer, segments in self.get_draws():
+            for segment, draws in segments:
+                for item, draw_function in draws:
+                    if item not in item_layers:
+                        continue
+                    start = clock()
+                    draw_function()
+                    profiler.add_time(profiler.DRAW, draw_function, clock() - start)
+                profiler.time_phase(profiler.FLUSH_BATCHES, segment.draw_batch)
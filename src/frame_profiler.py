@@ -0,0 +1,165 @@
+import time
+from collections import defaultdict, deque, namedtuple
+
+from consts import *
+
+Percentiles = namedtuple("Percentiles", [
+    "p50",
+    "p95",
+    "p99",
+])
+"""
+The rolling percentiles of the time (in nanoseconds) something took in a frame.
+"""
+
+
+class FrameProfiler:
+    """
+    Measures how long every part of the `MainLoop.main_loop` takes.
+
+    When the `MainLoop` has a profiler (see `MainLoop.start_profiling`), every phase of the main loop, every call in
+    its `CallbackScheduler` and every draw in its `DrawLayers` is timed with `time.perf_counter_ns`.
+    The calls are grouped by their phase (`DRAW` or `MOVE`) and by their owner, which is the class of the object the
+    function is bound to (`Ball`, `Button`...) or the function itself if it is not bound to anything.
+
+    At the end of each frame, the time each (phase, owner) took in that frame is added to a rolling window of the last
+    `window_size` frames, and percentiles can be asked for over that window.
+    """
+    CLEAR = "clear"
+    UPDATE_TIME = "update_time"
+    SELECT_SELECTED_OBJECT = "select_selected_object"
+    DRAG_OBJECT = "drag_object"
+    UPDATE_HOVER = "update_hover"
+    CULL = "cull"
+    DRAW = "draw"
+    MOVE = "move"
+    UPDATE_TRANSFORMS = "update_transforms"
+    FLUSH_BATCHES = "flush_batches"
+    FLUSH_SHAPES = "flush_shapes"
+    FRAME = "frame"
+    PHASES = [CLEAR, UPDATE_TIME, SELECT_SELECTED_OBJECT, DRAG_OBJECT, UPDATE_HOVER, DRAW, MOVE, UPDATE_TRANSFORMS,
+              CULL, FLUSH_BATCHES, FLUSH_SHAPES, FRAME]
+
+    def __init__(self, window_size=PROFILER_WINDOW_SIZE):
+        """
+        Initiates the profiler.
+        :param window_size: the amount of last frames the percentiles are calculated over.
+        """
+        self.window_size = window_size
+        self.samples = defaultdict(lambda: deque(maxlen=self.window_size))
+        # ^ maps (phase, owner) to the times it took in the last frames. The owner of the fixed phases is None.
+
+        self._frame_times = defaultdict(int)  # the times of the frame that is currently measured.
+        self._frame_start = None
+        self.frame_count = 0
+
+    @staticmethod
+    def get_owner(function):
+        """
+        Returns the owner of a function that is called in the main loop.
+        :param function: a function
+        :return: the class of the object it is bound to, or the function itself if it is not bound.
+        """
+        bound_to = getattr(function, "__self__", None)
+        return function if bound_to is None else type(bound_to)
+
+    def start_frame(self):
+        """
+        Starts measuring a new frame.
+        :return: None
+        """
+        self._frame_times.clear()
+        self._frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        """
+        Ends the measuring of the current frame and adds its times to the rolling windows.
+        :return: None
+        """
+        self._frame_times[(self.FRAME, None)] = time.perf_counter_ns() - self._frame_start
+        for key, duration in self._frame_times.items():
+            self.samples[key].append(duration)
+        self.frame_count += 1
+
+    def time_phase(self, phase, function, *args):
+        """
+        Calls a function and adds the time it took to one of the fixed phases of the frame.
+        :param phase: one of the phases in `self.PHASES`
+        :param function: the function to call
+        :param args: the arguments to call it with
+        :return: whatever the function returned
+        """
+        start = time.perf_counter_ns()
+        returned = function(*args)
+        self._frame_times[(phase, None)] += time.perf_counter_ns() - start
+        return returned
+
+    def add_call_time(self, handle, duration):
+        """
+        Adds the time a call in the `CallbackScheduler` took to the current frame.
+        The time is counted both for the owner of the function and for the phase as a whole.
+        :param handle: the `CallbackHandle` that was called.
+        :param duration: how long it took, in nanoseconds.
+        :return: None
+        """
+        self.add_time(self.MOVE if handle.can_be_paused else self.DRAW, handle.function, duration)
+
+    def add_time(self, phase, function, duration):
+        """
+        Adds the time a function took to the current frame, both for its owner and for the phase as a whole.
+        :param phase: `self.DRAW` or `self.MOVE`
+        :param function: the function that was called.
+        :param duration: how long it took, in nanoseconds.
+        :return: None
+        """
+        self._frame_times[(phase, self.get_owner(function))] += duration
+        self._frame_times[(phase, None)] += duration
+
+    def get_percentiles(self, phase, owner=None):
+        """
+        Returns the rolling percentiles of the time a phase (or an owner in a phase) took per frame.
+        :param phase: one of the phases in `self.PHASES`
+        :param owner: a class (for example `Ball`) or a function. If None, returns the times of the whole phase.
+        :return: a `Percentiles` namedtuple (in nanoseconds), or None if it was never measured.
+        """
+        samples = self.samples.get((phase, owner))
+        if not samples:
+            return None
+
+        sorted_samples = sorted(samples)
+        return Percentiles(*[self._percentile(sorted_samples, percent) for percent in (50, 95, 99)])
+
+    @staticmethod
+    def _percentile(sorted_samples, percent):
+        """
+        Returns the percentile of a sorted list of samples (by the nearest rank method).
+        :param sorted_samples: a sorted non-empty list of numbers
+        :param percent: a number between 0 and 100
+        :return: one of the samples
+        """
+        index = max(0, -(-len(sorted_samples) * percent // 100) - 1)
+        return sorted_samples[index]
+
+    def get_owners(self, phase):
+        """
+        Returns all of the owners that were measured in a phase.
+        :param phase: `self.DRAW` or `self.MOVE`
+        :return: a list of classes and functions
+        """
+        return [owner for sample_phase, owner in self.samples if sample_phase == phase and owner is not None]
+
+    def report(self):
+        """
+        Returns a printable table of the percentiles of all phases and owners, from the most expensive to the least.
+        :return: a string
+        """
+        lines = [f"{'phase':<24}{'owner':<32}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}"]
+        rows = sorted(
+            ((phase, owner, self.get_percentiles(phase, owner)) for phase, owner in self.samples),
+            key=lambda row: row[2].p95,
+            reverse=True,
+        )
+        for phase, owner, percentiles in rows:
+            owner_name = '' if owner is None else getattr(owner, "__qualname__", repr(owner))
+            lines.append(f"{phase:<24}{owner_name:<32}" + ''.join(f"{value / 1000:>10.1f}" for value in percentiles))
+        return '\n'.join(lines)
@@ -0,0 +1,35 @@
+from consts import *
+from src.main_window import MainWindow
+
+
+class HeadlessWindow:
+    """
+    A stand-in for the `MainWindow` that opens no window and has no GL context.
+    It is used to run the simulation without drawing anything (see `MainLoop.step`), for example on machines without a
+    display.
+
+    Just like the `MainWindow`, it registers itself as `MainWindow.main_window`, so everything that asks for the
+    location of the mouse still works.
+    """
+    def __init__(self, user_interface, width=WINDOW_WIDTH, height=WINDOW_HEIGHT):
+        """
+        Initiates the headless window.
+        :param user_interface: the `UserInterface` object of the program.
+        :param width:
+        :param height: the size of the window that is simulated.
+        """
+        MainWindow.main_window = self
+
+        self.width, self.height = width, height
+        self.mouse_x, self.mouse_y = width / 2, height / 2
+        self.mouse_pressed = False
+
+        self.user_interface = user_interface
+
+    def get_mouse_location(self):
+        """Return the mouse's location as a tuple"""
+        return self.mouse_x, self.mouse_y
+
+    def clear(self):
+        """There is nothing to clear"""
+        pass
@@ -1,7 +1,15 @@
 import time
 
+from consts import *
 from exceptions import NoSuchGraphicsObjectError
-from usefuls import get_the_one
+from src.callback_scheduler import CallbackScheduler
+from src.draw_layers import DrawLayers
+from src.frame_profiler import FrameProfiler
+from src.shape_drawing import shape_batch
+from src.spatial_hash import SpatialHash
+from src.transform_tree import TransformTree
+from src.view_culler import ViewCuller
+from usefuls import get_the_one, DoubleEndedOrderedSet
 
 
 class MainLoop:
@@ -15,19 +23,39 @@ class MainLoop:
     """
     instance = None
 
-    def __init__(self, main_window):
+    def __init__(self, main_window, is_headless=False):
         """
         Initiates the MainLoop object with a main window.
         :param main_window: a `MainWindow` object.
+        :param is_headless: whether the loop runs without drawing (with a `HeadlessWindow`). In that case the buttons of
+            the user interface are not created, and the loop is advanced with `self.step` instead of `self.main_loop`.
         """
         self.__class__.instance = self
         self.main_window = main_window
+        self.is_headless = is_headless
 
-        self.call_functions = []
-        # ^ a list of tuples (function, args, kwargs) that will all be called in every `update` call
+        self.scheduler = CallbackScheduler()
+        # ^ holds all of the functions (with their arguments) that will be called in every `update` call
 
-        self.graphics_objects = []
-        # ^ a list of all registered `GraphicsObject`-s that are being drawn and moved.
+        self.graphics_objects = DoubleEndedOrderedSet()
+        # ^ an ordered set of all registered `GraphicsObject`-s that are being drawn and moved.
+
+        self.draw_layers = DrawLayers()
+        # ^ the order everything is drawn in (and pressed in), in layers.
+
+        self.spatial_hash = SpatialHash()
+        # ^ an index of the registered objects that can be pressed, by their location on the screen.
+
+        self.view_culler = ViewCuller(self)
+        # ^ takes the registered objects that are off the screen out of the loop.
+
+        self.transform_tree = TransformTree()
+        # ^ moves the registered objects that follow other objects (their children) after the objects move.
+
+        self.hovered_object = None
+        # ^ the top object the mouse is on, updated only when the mouse moves (see `self.update_hover`)
+        self.is_hover_outdated = False
+        # ^ whether or not the mouse moved since the hovered object was last updated (it is updated once a frame).
 
         self.is_paused = False
         # ^ whether or not the program is paused now.
@@ -37,58 +65,90 @@ class MainLoop:
         #  ^ the total time the program has been paused so far
         self.last_time_update = time.time()  # the last time that the `self.update_time` method was called.
 
-        self.main_window.user_interface.initiate_buttons()
-        # ^ creates the buttons of the user interface.
+        self.fixed_time_step = None
+        # ^ the time between two calls of the pausable functions (`move`-s) or None if they are called once every tick.
+        self.step_time_accumulator = 0  # the time that passed and that was not stepped through yet.
+        self.last_step_time = self.time()  # the (paused adjusted) time the accumulator was last updated in.
+        self.interpolation_alpha = 1.0
+        # ^ how far the drawing is between the previous step and the current one (see `self.interpolate`)
+
+        if not self.is_headless:
+            user_interface = self.main_window.user_interface
+            self.draw_layers.add(user_interface, UI_LAYER, user_interface.show, at_start=True)
+            # ^ the side window is drawn beneath the buttons and the texts of the user interface.
+            user_interface.initiate_buttons()
+            # ^ creates the buttons of the user interface.
 
         # self.logo_animation = self.main_window.user_interface.init_logo_animation()
 
         self.is_clearing_screen = True
 
+        self.is_batching_shapes = True
+        # ^ whether the shapes of each frame are drawn together at its end (see `ShapeBatch`) or one by one.
+
+        self.profiler = None
+        # ^ a `FrameProfiler` that times every part of the main loop, or None when the loop is not profiled.
+
     def register_graphics_object(self, graphics_object, is_in_background=False):
         """
         This method receives a `GraphicsObject` instance, loads it, and enters
-        it into the update main loop with its `move` and `draw` methods.
+        it into the update main loop with its `move` method, and into its layer in `self.draw_layers` with its `draw`.
         :param graphics_object: The `GraphicsObject`
-        :param is_in_background: Whether the object will be drawn in the front
-            or the back of the other objects.
+        :param is_in_background: Whether the object will be drawn in the background layer, beneath all of the other
+            objects, or in its own layer (`graphics_object.layer`).
         :return: None
         """
-        graphics_object.load()
+        if is_in_background:
+            graphics_object.layer = BACKGROUND_LAYER
+        self.draw_layers.add(graphics_object, graphics_object.layer,
+                             graphics_object.draw if graphics_object.has_draw else None, at_start=is_in_background,
+                             starts_segment=graphics_object.starts_draw_segment, drawn_by=graphics_object.drawn_by)
+        graphics_object.load()  # after it is in the layers, so its sprites can be put in the batch of its segment
 
         if is_in_background:
-            self.graphics_objects.insert(0, graphics_object)
-            self.reversed_insert_to_loop(graphics_object.draw)
+            self.graphics_objects.appendleft(graphics_object)
         else:
             self.graphics_objects.append(graphics_object)
-            self.insert_to_loop(graphics_object.draw)
 
-        self.insert_to_loop_pausable(graphics_object.move)
+        if graphics_object.has_move:
+            self.insert_to_loop_pausable(graphics_object.move)
+
+        if graphics_object.is_hit_testable:
+            self.spatial_hash.insert(graphics_object)
+
+        if graphics_object.is_cullable:
+            self.view_culler.insert(graphics_object)
+
+        self.transform_tree.insert(graphics_object)
 
     def unregister_graphics_object(self, graphics_object):
         """
         This method receives a `GraphicsObject` instance and unregisters it.
-        It removes its `draw` and `move` methods from the main loop.
+        It removes it from its layer and its `move` method from the main loop.
         If the object is already unregistered, do nothing.
 
-        Any GraphicsObject that wants to have attributes that are also GraphicsObjects needs to have an iterable
-        which is called `child_graphics_objects` and that list is unregistered as well when the main object does.
+        All of the objects that follow it (its children in the `self.transform_tree`) are unregistered as well.
 
         :param graphics_object: The `GraphicsObject`
         :return: None
         """
-        try:
-            self.graphics_objects.remove(graphics_object)
-        except ValueError:
-            pass
+        children = self.transform_tree.get_children(graphics_object)
+        if graphics_object is self.hovered_object:
+            self.set_hovered_object(None)
+
+        self.graphics_objects.discard(graphics_object)
+        self.transform_tree.remove(graphics_object)
+        self.spatial_hash.remove(graphics_object)
+        self.view_culler.remove(graphics_object)
+        self.draw_layers.remove(graphics_object)
+        graphics_object.unload()
 
-        self.remove_from_loop(graphics_object.draw)
         self.remove_from_loop(graphics_object.move)
 
         # TODO: BUG: loopback connection graphics stays after deleting computers!!!
 
-        if hasattr(graphics_object, "child_graphics_objects"):
-            for child in graphics_object.child_graphics_objects:
-                self.unregister_graphics_object(child)
+        for child in children:
+            self.unregister_graphics_object(child)
 
     def insert_to_loop(self, function, *args, **kwargs):
         """
@@ -98,9 +158,9 @@ class MainLoop:
         :param function: The function to insert
         :param args: Arguments to call it with
         :param kwargs: Key-word arguments to call it with
-        :return: None
+        :return: the `CallbackHandle` of the call
         """
-        self.call_functions.append((function, args, kwargs, False))  # the False is for "can it be paused"
+        return self.scheduler.insert(function, args, kwargs)
 
     def reversed_insert_to_loop(self, function, *args, **kwargs):
         """
@@ -110,15 +170,15 @@ class MainLoop:
         :param function: The function
         :param args:
         :param kwargs:
-        :return: None
+        :return: the `CallbackHandle` of the call
         """
-        self.call_functions.insert(0, (function, args, kwargs, False))  # the False is "can it be paused"
+        return self.scheduler.insert(function, args, kwargs, at_start=True)
 
     def insert_to_loop_pausable(self, function, *args, **kwargs):
         """
         Exactly like `insert_to_loop` but the function is paused when the program is paused (when space bar is pressed)
         """
-        self.call_functions.append((function, args, kwargs, True))
+        return self.scheduler.insert(function, args, kwargs, can_be_paused=True)
 
     def remove_from_loop(self, function):
         """
@@ -127,35 +187,59 @@ class MainLoop:
         :param function: The function to remove from the loop.
         :return: None
         """
-        to_remove = [function_and_args for function_and_args in self.call_functions if function_and_args[0] == function]
-        for function_and_args in to_remove:
-            try:
-                self.call_functions.remove(function_and_args)
-            except ValueError:
-                pass
+        self.scheduler.remove_function(function)
 
-    def move_to_front(self, graphics_object):
+    def move_to_front(self, graphics_object, layer=None):
         """
         Receives a graphics object that is registered and moves it to the front to be on top of all other registered
-        graphics objects
+        graphics objects of its layer (or of another layer, if one is given). Its children are moved with it.
         :param graphics_object: a `GraphicsObject` object that is registered
+        :param layer: the layer to move it to (one of `DRAW_LAYERS`), or None to keep it in its own layer.
         :return: None
         """
-        try:
-            self.graphics_objects.remove(graphics_object)
-            self.graphics_objects.append(graphics_object)
+        if graphics_object not in self.graphics_objects:
+            raise NoSuchGraphicsObjectError("The graphics object is not registered!!!")
 
-            self.remove_from_loop(graphics_object.draw)
-            self.insert_to_loop(graphics_object.draw)
+        if layer is not None:
+            graphics_object.layer = layer
+        self.draw_layers.move_to_front(graphics_object, graphics_object.layer)
+        if layer is not None and graphics_object in self.view_culler:
+            self.view_culler.retest(graphics_object)  # the layer decides which part of the screen it is seen in
+        self.graphics_objects.append(graphics_object)
 
-            if hasattr(graphics_object, "child_graphics_objects"):
-                for child_graphics_object in graphics_object.child_graphics_objects:
-                    self.move_to_front(child_graphics_object)
-                    # if this is not the order that they were meant to be in, this might cause bugs, fix in the future
-                    # if necessary
+        for child_graphics_object in self.transform_tree.get_children(graphics_object):
+            self.move_to_front(child_graphics_object, layer)
+                # if this is not the order that they were meant to be in, this might cause bugs, fix in the future
+                # if necessary
 
-        except ValueError:
-            raise NoSuchGraphicsObjectError("The graphics object is not registered!!!")
+    def set_hidden(self, graphics_object, is_hidden):
+        """
+        Takes a registered graphics object out of the drawing (see `DrawLayers.suspend`) and out of the
+        `self.spatial_hash` (so the mouse is never on it) while it is hidden, and puts it back when it is shown.
+        Both are O(1), so hidden objects cost nothing while the frames are drawn.
+        :param graphics_object: a `GraphicsObject`
+        :param is_hidden: whether to hide it or to show it.
+        :return: None
+        """
+        if graphics_object not in self.graphics_objects:
+            return
+
+        if is_hidden:
+            self.draw_layers.suspend(graphics_object, self.draw_layers.HIDDEN)
+            self.spatial_hash.remove(graphics_object)
+            if graphics_object is self.hovered_object:
+                self.set_hovered_object(None)
+        else:
+            self.draw_layers.resume(graphics_object, self.draw_layers.HIDDEN)
+            if graphics_object.is_hit_testable:
+                self.spatial_hash.insert(graphics_object)
+
+    def toggle_shape_batching(self):
+        """
+        Toggles between drawing the shapes of a frame together and drawing them one by one.
+        :return: None
+        """
+        self.is_batching_shapes = not self.is_batching_shapes
 
     def toggle_pause(self):
         """
@@ -185,9 +269,67 @@ class MainLoop:
         """
         Returns the `GraphicsObject` that should be selected if the mouse is pressed
         (so the object that the mouse is on right now) or `None` if the mouse is not resting upon any object.
+        Only the objects in the cell of the `self.spatial_hash` under the mouse are tested, from the top one down
+        (in the order of `self.draw_layers`).
         :return: a `GraphicsObject` or None.
         """
-        return get_the_one(reversed(self.graphics_objects), lambda go: go.is_mouse_in() and not go.is_button)
+        return get_the_one(self._get_objects_under_mouse(), lambda go: go.is_mouse_in() and not go.is_button)
+
+    def get_button_the_mouse_is_on(self):
+        """
+        Returns the top button that the mouse is on right now, or None if it is not on any button.
+        Hidden buttons are not in the `self.spatial_hash`, so they are never returned.
+        :return: a `Button` or None.
+        """
+        return get_the_one(self._get_objects_under_mouse(), lambda go: go.is_button and go.is_mouse_in())
+
+    def update_hover(self):
+        """
+        Finds the top object the mouse is on (through the `self.spatial_hash`) and makes it the hovered object.
+        This is called only in the frames that the mouse moved in (see `self.invalidate_hover`).
+        :return: None
+        """
+        self.is_hover_outdated = False
+        self.set_hovered_object(get_the_one(self._get_objects_under_mouse(), lambda go: go.is_mouse_in()))
+
+    def invalidate_hover(self):
+        """
+        Marks the hovered object as outdated, so it is found again in the next frame.
+        The mouse can move many times in one frame, and finding the hovered object every time would be a waste.
+        :return: None
+        """
+        self.is_hover_outdated = True
+
+    def update_hover_if_outdated(self):
+        """
+        Updates the hovered object if the mouse moved since it was last updated.
+        :return: None
+        """
+        if self.is_hover_outdated:
+            self.update_hover()
+
+    def set_hovered_object(self, graphics_object):
+        """
+        Sets the hovered object. If it changed, the previous one gets a `on_hover_leave` and the new one gets a
+        `on_hover_enter`.
+        :param graphics_object: a registered `GraphicsObject` or None if the mouse is not on any object.
+        :return: None
+        """
+        if graphics_object is self.hovered_object:
+            return
+
+        previous_hovered_object, self.hovered_object = self.hovered_object, graphics_object
+        if previous_hovered_object is not None:
+            previous_hovered_object.on_hover_leave()
+        if graphics_object is not None:
+            graphics_object.on_hover_enter()
+
+    def _get_objects_under_mouse(self):
+        """
+        :return: a list of the objects in the cell of the `self.spatial_hash` under the mouse, from the top one down.
+        """
+        candidates = self.spatial_hash.query_point(*self.main_window.get_mouse_location())
+        return sorted(candidates, key=self.draw_layers.get_order, reverse=True)
 
     def update_time(self):
         """
@@ -210,28 +352,162 @@ class MainLoop:
         """
         return self._time
 
+    def set_fixed_time_step(self, time_step=PHYSICS_TIME_STEP):
+        """
+        Makes the pausable functions of the loop (the `move`-s of the graphics objects) be called every `time_step`
+        seconds, no matter what the frame rate is. If the frame rate drops, they are called a few times in one tick.
+        :param time_step: the time between two steps (in seconds), or None to call them once every tick again.
+        :return: None
+        """
+        self.fixed_time_step = time_step
+        self.step_time_accumulator = 0
+        self.last_step_time = self.time()
+        self.interpolation_alpha = 1.0
+
+    @property
+    def is_stepping_fixed(self):
+        """Whether or not the pausable functions are called in a fixed time step"""
+        return self.fixed_time_step is not None
+
+    def step_fixed(self):
+        """
+        Calls the pausable functions as many times as needed to catch up with the time that passed since the last call.
+        At most `MAX_PHYSICS_STEPS_PER_FRAME` steps are done, the time that is left after that is dropped.
+        Updates `self.interpolation_alpha` with the part of a step that is left over.
+        :return: the amount of steps that were done.
+        """
+        now = self.time()
+        self.step_time_accumulator += now - self.last_step_time
+        self.last_step_time = now
+
+        steps = 0
+        while self.step_time_accumulator >= self.fixed_time_step:
+            if steps == MAX_PHYSICS_STEPS_PER_FRAME:
+                self.step_time_accumulator %= self.fixed_time_step
+                break
+
+            self.scheduler.call_pausable(self.profiler)
+            self.step_time_accumulator -= self.fixed_time_step
+            steps += 1
+
+        self.interpolation_alpha = self.step_time_accumulator / self.fixed_time_step
+        return steps
+
+    def interpolate(self, previous_location, location):
+        """
+        Returns the location an object should be drawn in, between its location in the previous step and its current
+        one, according to `self.interpolation_alpha`. When not stepping in a fixed time step, that is just `location`.
+        :param previous_location: the (x, y) of the object before the last step.
+        :param location: the current (x, y) of the object.
+        :return: a tuple (x, y)
+        """
+        alpha = self.interpolation_alpha
+        if alpha == 1.0:
+            return location
+
+        (previous_x, previous_y), (x, y) = previous_location, location
+        return previous_x + (x - previous_x) * alpha, previous_y + (y - previous_y) * alpha
+
     def time_since(self, other_time):
         """Returns the amount of time that passed since another time (adjusted to pauses of course)"""
         return self.time() - other_time
 
+    def start_profiling(self, window_size=PROFILER_WINDOW_SIZE):
+        """
+        Starts timing every part of the main loop and every function that is called in it.
+        :param window_size: the amount of last frames the percentiles of the profiler are calculated over.
+        :return: the `FrameProfiler` that holds the times.
+        """
+        self.profiler = FrameProfiler(window_size)
+        return self.profiler
+
+    def stop_profiling(self):
+        """
+        Stops timing the main loop.
+        :return: the `FrameProfiler` that held the times (or None if the loop was not profiled)
+        """
+        profiler, self.profiler = self.profiler, None
+        return profiler
+
+    def step(self):
+        """
+        Advances the simulation by one step without drawing anything.
+        This is what runs the program in headless mode instead of `self.main_loop`, as fast as possible.
+        :return: None
+        """
+        self.update_time()
+        if not self.is_paused:
+            self.scheduler.call_pausable()
+        self.transform_tree.update()
+        self.view_culler.update()
+
     def main_loop(self):
         """
         The main loop:
 
         This is the method that is called repeatedly, every clock tick.
         It updates the program and runs all other functions in the main loop.
-        The `self.call_functions` list is the list of function that it calls with their arguments.
+        The `self.scheduler` holds the functions that it calls with their arguments.
+        In fixed time step mode, the pausable functions are called according to the time that passed, before the rest.
+        After all of them, the objects that follow the objects that moved are moved (see `TransformTree`), the objects
+        that ended up off the screen are culled (see `ViewCuller`), and everything is drawn by `self.draw_layers`, layer
+        by layer.
         :return: None
         """
+        if self.profiler is not None:
+            self._profiled_main_loop()
+            return
+
         if self.is_clearing_screen:
             self.main_window.clear()
 
+        shape_batch.start_frame(self.is_batching_shapes)
+
         self.update_time()
         self.select_selected_object()
         self.main_window.user_interface.drag_object()
-        self.main_window.user_interface.show()
+        self.update_hover_if_outdated()
+
+        if not self.is_stepping_fixed:
+            self.scheduler.call(self.is_paused)
+        else:
+            if not self.is_paused:
+                self.step_fixed()
+            self.scheduler.call_unpausable()
+
+        self.transform_tree.update()
+        self.view_culler.update()
+        self.draw_layers.draw()
+        shape_batch.end_frame()
+
+    def _profiled_main_loop(self):
+        """
+        Exactly like `main_loop`, but every part of it is timed by `self.profiler`.
+        It is separate so `main_loop` does not pay anything for the profiling when it is off.
+        :return: None
+        """
+        profiler = self.profiler
+        profiler.start_frame()
 
-        for function, args, kwargs, can_be_paused in self.call_functions:
-            if self.is_paused and can_be_paused:
-                continue
-            function(*args, **kwargs)
+        if self.is_clearing_screen:
+            profiler.time_phase(profiler.CLEAR, self.main_window.clear)
+
+        shape_batch.start_frame(self.is_batching_shapes)
+
+        profiler.time_phase(profiler.UPDATE_TIME, self.update_time)
+        profiler.time_phase(profiler.SELECT_SELECTED_OBJECT, self.select_selected_object)
+        profiler.time_phase(profiler.DRAG_OBJECT, self.main_window.user_interface.drag_object)
+        profiler.time_phase(profiler.UPDATE_HOVER, self.update_hover_if_outdated)
+
+        if not self.is_stepping_fixed:
+            self.scheduler.call(self.is_paused, profiler)
+        else:
+            if not self.is_paused:
+                self.step_fixed()
+            self.scheduler.call_unpausable(profiler)
+
+        profiler.time_phase(profiler.UPDATE_TRANSFORMS, self.transform_tree.update)
+        profiler.time_phase(profiler.CULL, self.view_culler.update)
+        self.draw_layers.draw(profiler)
+        profiler.time_phase(profiler.FLUSH_SHAPES, shape_batch.end_frame)
+        profiler.end_frame()
@@ -48,6 +48,7 @@ class MainWindow(pyglet.window.Window):
         :return:
         """
         self.mouse_x, self.mouse_y = x, y
+        MainLoop.instance.invalidate_hover()
 
     def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
         """
@@ -62,6 +63,7 @@ class MainWindow(pyglet.window.Window):
         :return:
         """
         self.mouse_x, self.mouse_y = x, y
+        MainLoop.instance.invalidate_hover()
 
     def on_mouse_enter(self, x, y):
         """
@@ -72,6 +74,18 @@ class MainWindow(pyglet.window.Window):
         :return:
         """
         self.mouse_x, self.mouse_y = x, y
+        MainLoop.instance.invalidate_hover()
+
+    def on_mouse_leave(self, x, y):
+        """
+        This method is called when the mouse leaves the frame, it is not on any object anymore.
+        :param x:
+        :param y:
+        :return:
+        """
+        self.mouse_x, self.mouse_y = x, y
+        MainLoop.instance.is_hover_outdated = False
+        MainLoop.instance.set_hovered_object(None)
 
     def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
         """
@@ -84,6 +98,7 @@ class MainWindow(pyglet.window.Window):
         """
         if self.user_interface.is_mouse_in_side_window() and self.user_interface.mode == VIEW_MODE:
             self.user_interface.scroll_view(scroll_y)
+            MainLoop.instance.invalidate_hover()  # the buttons moved under the mouse
 
     def on_mouse_press(self, x, y, button, modifiers):
         """
@@ -147,6 +162,23 @@ class MainWindow(pyglet.window.Window):
         """
         self.user_interface.on_key_pressed(symbol, modifiers)
 
+    def on_key_release(self, symbol, modifiers):
+        """
+        This method is called when a key is released.
+        :param symbol: The key itself.
+        :param modifiers:  additional keys that are pressed (ctrl, shift, caps lock, etc..)
+        :return:  None
+        """
+        self.user_interface.on_key_released(symbol, modifiers)
+
+    def on_deactivate(self):
+        """
+        This method is called when the window loses the keyboard focus.
+        The release of a held key would not reach the window anymore, so the key stops repeating here.
+        :return: None
+        """
+        self.user_interface.stop_key_repeat()
+
     def on_draw(self):
         """
         This method is called every tick of the clock and it is what really calls the main loop.
@@ -1,7 +1,9 @@
 from src.abstracts.graphics_object import GraphicsObject
+from src.main_loop import MainLoop
+from src.objects.ball_world import BallWorld
 from usefuls import distance
 from src.main_window import MainWindow
-from src.shape_drawing import draw_circle, draw_rect
+from src.shape_drawing import draw_circle
 from consts import *
 from recordclass import recordclass
 
@@ -9,16 +11,144 @@ from recordclass import recordclass
 Vector = recordclass("Vector", "x y")
 
 
+class BallVelocity:
+    """
+    A view of the velocity of a `Ball` in the arrays of its `BallWorld`. It can be used just like a `Vector`.
+    Setting the velocity wakes the ball up.
+    """
+    __slots__ = ("ball",)
+
+    def __init__(self, ball):
+        self.ball = ball
+
+    @property
+    def x(self):
+        return self.ball.world.velocities[self.ball.index, 0]
+
+    @x.setter
+    def x(self, x):
+        self.ball.world.wake(self.ball)
+        self.ball.world.velocities[self.ball.index, 0] = x
+
+    @property
+    def y(self):
+        return self.ball.world.velocities[self.ball.index, 1]
+
+    @y.setter
+    def y(self, y):
+        self.ball.world.wake(self.ball)
+        self.ball.world.velocities[self.ball.index, 1] = y
+
+    def __iter__(self):
+        return iter(self.ball.world.velocities[self.ball.index].tolist())
+
+
 class Ball(GraphicsObject):
+    """
+    A ball that falls and bounces on the ground.
+    Its physical state is a row in the arrays of the `BallWorld`, which moves all of the balls together.
+    When the ball is unregistered, its row is removed and its last state is kept in the object itself.
+    A ball that comes to rest falls asleep and is not stepped, it wakes up when it is moved, hit or pushed.
+    All of the balls are drawn together by the `BallRenderer` of the world, so a ball does not draw itself, and it is
+    pressed in the place of the renderer in the drawing order (see `drawn_by`).
+    """
+    has_draw = False
+
     def __init__(self, x, y, x_velocity=0, y_velocity=0, rad=20, color=LIGHT_BLUE, gravity=-0.5, bounciness=0.9):
-        super(Ball, self).__init__(x, y, centered=True, is_pressable=True)
-        self.radius = rad
-        self.color = color
+        self.world = BallWorld.get_instance()
+        self.index = None
+        self.world.add(self, x, y, x_velocity, y_velocity, rad, gravity, bounciness, color)
+        self._detached_state = None  # (location, velocity, radius, gravity, bounciness) once the row is removed
+        self._color = color
 
-        self.velocity = Vector(x_velocity, y_velocity)
-        self.gravity = gravity
+        super(Ball, self).__init__(x, y, centered=True, is_pressable=True)
 
-        self.bounciness = bounciness
+    @property
+    def drawn_by(self):
+        return self.world.renderer
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        self._color = color
+        if self.index is not None:
+            self.world.set_color(self, color)
+
+    @property
+    def x(self):
+        if self.index is None:
+            return self._detached_state[0][0]
+        return self.world.positions[self.index, 0]
+
+    @x.setter
+    def x(self, x):
+        if self.index is None:
+            self._detached_state = ((x, self.y),) + self._detached_state[1:]
+            return
+        self.world.set_coordinate(self, 0, x)
+
+    @property
+    def y(self):
+        if self.index is None:
+            return self._detached_state[0][1]
+        return self.world.positions[self.index, 1]
+
+    @y.setter
+    def y(self, y):
+        if self.index is None:
+            self._detached_state = ((self.x, y),) + self._detached_state[1:]
+            return
+        self.world.set_coordinate(self, 1, y)
+
+    @property
+    def last_location(self):
+        if self.index is None:
+            return self._detached_state[0]
+        return tuple(self.world.last_positions[self.index].tolist())
+
+    @property
+    def velocity(self):
+        if self.index is None:
+            return self._detached_state[1]
+        return BallVelocity(self)
+
+    @property
+    def radius(self):
+        if self.index is None:
+            return self._detached_state[2]
+        return self.world.radii[self.index]
+
+    @property
+    def gravity(self):
+        if self.index is None:
+            return self._detached_state[3]
+        return self.world.gravities[self.index]
+
+    @property
+    def bounciness(self):
+        if self.index is None:
+            return self._detached_state[4]
+        return self.world.bounciness[self.index]
+
+    @property
+    def is_asleep(self):
+        return self.index is not None and not self.world.is_awake(self.index)
+
+    def apply_impulse(self, x, y):
+        """
+        Pushes the ball (the larger it is, the less its velocity changes) and wakes it up.
+        :param x:
+        :param y: the impulse
+        :return: None
+        """
+        self.world.apply_impulse(self, x, y)
+
+    @property
+    def is_hit_testable(self):
+        return False  # balls are hit-tested through their `BallWorld`, which is a sub-index of the spatial hash.
 
     def is_mouse_in(self):
         return distance(
@@ -26,6 +156,9 @@ class Ball(GraphicsObject):
             self.location
         ) < self.radius
 
+    def get_bounding_box(self):
+        return self.x - self.radius, self.y - self.radius, self.x + self.radius, self.y + self.radius
+
     def start_viewing(self, ui):
         return None, "Ball", None
 
@@ -33,28 +166,16 @@ class Ball(GraphicsObject):
         pass
 
     def draw(self):
-        # draw_circle(*self.location, self.radius, self.color)
-        draw_rect(self.x - self.radius, self.y - self.radius, self.radius * 2, self.radius * 2, self.color)
-
-    def move(self):
-        self.move_by_velocity()
-        self.apply_gravity()
-
-        if self.hitting_ground():
-            self.bounce()
+        pass  # the ball is drawn by the `BallRenderer` of its world.
 
     def mark_as_selected(self):
-        draw_circle(self.x, self.y, self.radius * 1.5 + SELECTED_OBJECT_PADDING)
+        draw_circle(*MainLoop.instance.interpolate(self.last_location, self.location),
+                    self.radius * 1.5 + SELECTED_OBJECT_PADDING)
 
-    def hitting_ground(self):
-        return self.y - self.radius < 0 and self.velocity.y < 0
+    def unload(self):
+        if self.index is None:
+            return
 
-    def move_by_velocity(self):
         vx, vy = self.velocity
-        self.x, self.y = self.x + vx, self.y + vy
-
-    def apply_gravity(self):
-        self.velocity.y += self.gravity
-
-    def bounce(self):
-        self.velocity.y *= -self.bounciness
+        self._detached_state = (self.location, Vector(vx, vy), self.radius, self.gravity, self.bounciness)
+        self.world.remove(self)
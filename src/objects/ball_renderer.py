@@ -0,0 +1,262 @@
+from ctypes import byref
+from math import ceil
+
+import numpy as np
+import pyglet
+from pyglet import gl
+
+from consts import *
+from src.main_loop import MainLoop
+from src.shape_drawing import draw_rect, flush_shape_batch
+
+
+class BallHeatmap:
+    """
+    A picture of where the balls on the screen are, which is drawn instead of the balls themselves when there are so
+    many of them that they are a blob anyway.
+
+    The screen is split into cells of `BALL_HEATMAP_CELL_SIZE` pixels, and the balls are binned into the cells by their
+    centers (in one vectorized pass). Every cell becomes a pixel of one texture: its color is the average color of the
+    balls in it, and its opacity grows with the amount of balls in it. The texture is stretched over the screen and
+    blended on top of what was drawn before it.
+    """
+    def __init__(self, width=WINDOW_WIDTH, height=WINDOW_HEIGHT, cell_size=BALL_HEATMAP_CELL_SIZE):
+        """
+        Initiates the heatmap. Its texture is created when it is first drawn, since it requires a GL context.
+        :param width:
+        :param height: the size of the part of the screen the heatmap covers (from the bottom left corner)
+        :param cell_size: the width and height of a cell (in pixels)
+        """
+        self.width, self.height = width, height
+        self.cell_size = cell_size
+        self.columns, self.rows = ceil(width / cell_size), ceil(height / cell_size)
+        self.texture = None
+
+    def update(self, centers, colors):
+        """
+        Bins the balls into the cells and writes the result into the texture.
+        :param centers: an (n, 2) array of the centers of the balls, all of them inside the heatmap.
+        :param colors: an (n, 4) array of the RGBA of the balls.
+        :return: None
+        """
+        cell_count = self.columns * self.rows
+        cell_locations = centers.astype(np.int64) // self.cell_size  # the centers are never negative
+        cells = cell_locations[:, 1] * self.columns + cell_locations[:, 0]
+
+        counts = np.bincount(cells, minlength=cell_count)
+        pixels = np.empty((cell_count, 4), dtype=np.uint8)
+        for channel in range(3):
+            color_sums = np.bincount(cells, weights=colors[:, channel], minlength=cell_count)
+            pixels[:, channel] = color_sums / np.maximum(counts, 1)
+        pixels[:, 3] = np.minimum(counts * (255 / BALL_HEATMAP_SATURATION_COUNT), 255)
+
+        if self.texture is None:
+            self.texture = pyglet.image.Texture.create(self.columns, self.rows)
+        image = pyglet.image.ImageData(self.columns, self.rows, 'RGBA', pixels.tobytes())
+        self.texture.blit_into(image, 0, 0, 0)
+
+    def draw(self):
+        """
+        Draws the heatmap over the screen (blended with what is beneath it)
+        :return: None
+        """
+        gl.glPushAttrib(gl.GL_ENABLE_BIT | gl.GL_COLOR_BUFFER_BIT)
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        self.texture.blit(0, 0, width=self.columns * self.cell_size, height=self.rows * self.cell_size)
+        gl.glPopAttrib()
+
+
+class BallRenderer:
+    """
+    Draws all of the balls of a `BallWorld` straight from the arrays of the world, without a python object for any ball.
+
+    Every ball is drawn as a point of the size of its diameter (a square point is exactly the square a `Ball` was drawn
+    as with `draw_rect`). The renderer keeps two GL buffers, the centers and the colors of the balls that are on the
+    screen, which are compressed out of the arrays of the world every frame, so balls off the screen are neither
+    written nor drawn.
+    The size of a point cannot change in the middle of a draw call without shaders, so the rows are kept sorted by their
+    diameter (the order is only sorted again when the rows of the world change, see `BallWorld.rows_version`), and
+    there is one draw call for every diameter that is on the screen. Balls of the same size (which is usually all of
+    them) are drawn in a single call. Balls that are larger than the largest point the GL supports are drawn with
+    `draw_rect`.
+
+    When more than `BALL_HEATMAP_BALL_COUNT` balls are on the screen, a `BallHeatmap` of them is drawn instead, until
+    their amount drops below `BALL_HEATMAP_HYSTERESIS` of that (so it does not flicker between the two around the
+    threshold). Balls are still pressed and dragged like usual while the heatmap is drawn.
+
+    The buffers are created when the balls are first drawn, since they require a GL context.
+    """
+    def __init__(self, world):
+        """
+        Initiates the renderer of a world.
+        :param world: the `BallWorld` whose rows are drawn.
+        """
+        self.world = world
+        self.center_buffer = None
+        self.color_buffer = None
+        self.max_point_size = None
+
+        self.rows_version = None  # the `rows_version` of the world the order and the runs were last calculated at
+        self.order = None
+        # ^ the rows in the order of their diameters (the order they are in the buffers), or None if they are in order.
+        self.runs = []
+        # ^ a list of (start, stop, point_size) of the runs of sorted rows that are drawn in one call.
+        self.run_bounds = np.zeros(0, dtype=np.int64)  # the starts of the runs and then their stops, in one array
+        self.large_rows = np.zeros(0, dtype=np.int64)  # the rows that are too large to be drawn as points
+
+        self.heatmap = BallHeatmap()
+        self.heatmap_ball_count = BALL_HEATMAP_BALL_COUNT
+        self.is_drawing_heatmap = False
+
+    def _create_buffers(self):
+        """
+        Creates the GL buffers and finds out what the largest point the GL can draw is.
+        :return: None
+        """
+        self.center_buffer, self.color_buffer = gl.GLuint(), gl.GLuint()
+        gl.glGenBuffers(1, byref(self.center_buffer))
+        gl.glGenBuffers(1, byref(self.color_buffer))
+
+        point_size_range = (gl.GLfloat * 2)()
+        gl.glGetFloatv(gl.GL_ALIASED_POINT_SIZE_RANGE, point_size_range)
+        self.max_point_size = point_size_range[1]
+
+    @staticmethod
+    def _write_buffer(buffer, array, usage):
+        """
+        Writes a contiguous array into a GL buffer.
+        :return: None
+        """
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, buffer)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, array.nbytes, array.ctypes.data, usage)
+
+    def update_rows(self, count):
+        """
+        Sorts the rows by their diameters and splits them into runs of the same diameter.
+        This is only done when the rows of the world changed.
+        :param count: the amount of rows
+        :return: None
+        """
+        point_sizes = np.maximum(np.rint(2 * self.world.radii[:count]), 1)
+        self.order = None
+        if point_sizes.min() != point_sizes.max():
+            self.order = np.argsort(point_sizes, kind='stable')
+            point_sizes = point_sizes[self.order]
+
+        starts = np.r_[0, np.flatnonzero(np.diff(point_sizes)) + 1]
+        stops = np.r_[starts[1:], count]
+        self.runs = [run for run in zip(starts.tolist(), stops.tolist(), point_sizes[starts].tolist())
+                     if run[2] <= self.max_point_size]
+        self.run_bounds = np.array([start for start, _, _ in self.runs] + [stop for _, stop, _ in self.runs],
+                                   dtype=np.int64)
+
+        self.large_rows = np.flatnonzero(point_sizes > self.max_point_size)
+        if self.order is not None:
+            self.large_rows = self.order[self.large_rows]
+        self.rows_version = self.world.rows_version
+
+    def get_centers(self, count):
+        """
+        Returns the locations the balls should be drawn in, between their previous and current positions (like
+        `MainLoop.interpolate`)
+        :param count: the amount of rows
+        :return: an (count, 2) array
+        """
+        world, alpha = self.world, MainLoop.instance.interpolation_alpha
+        positions = world.positions[:count]
+        if alpha == 1.0:
+            return positions
+
+        last_positions = world.last_positions[:count]
+        return last_positions + (positions - last_positions) * alpha
+
+    def get_on_screen(self, centers):
+        """
+        :param centers: an (n, 2) array of the centers of balls
+        :return: a boolean array of whether or not every center is inside the area of the heatmap.
+        """
+        x, y = centers[:, 0], centers[:, 1]
+        on_screen = x >= 0
+        on_screen &= x < self.heatmap.width
+        on_screen &= y >= 0
+        on_screen &= y < self.heatmap.height
+        return on_screen
+
+    def update_is_drawing_heatmap(self, on_screen_count):
+        """
+        Decides whether the heatmap or the balls themselves are drawn, by the amount of balls on the screen.
+        :param on_screen_count: the amount of balls on the screen
+        :return: None
+        """
+        if self.is_drawing_heatmap:
+            self.is_drawing_heatmap = on_screen_count >= self.heatmap_ball_count * BALL_HEATMAP_HYSTERESIS
+        else:
+            self.is_drawing_heatmap = on_screen_count > self.heatmap_ball_count
+
+    def draw(self):
+        """
+        Draws all of the balls of the world (one draw call for every diameter), or their heatmap if there are too many
+        of them on the screen.
+        The shapes that were drawn before are flushed first, so they are beneath the balls.
+        :return: None
+        """
+        count = self.world.count
+        if not count:
+            return
+
+        centers = self.get_centers(count)
+        on_screen = self.get_on_screen(centers)
+        self.update_is_drawing_heatmap(np.count_nonzero(on_screen))
+        if self.is_drawing_heatmap:
+            self.heatmap.update(centers[on_screen], self.world.colors[:count][on_screen])
+            flush_shape_batch()
+            self.heatmap.draw()
+            return
+
+        self.draw_points(count, centers, on_screen)
+
+    def draw_points(self, count, centers, on_screen):
+        """
+        Draws the balls as points, only the ones whose centers are on the screen (a point whose center is off the
+        screen is not drawn by the GL anyway).
+        :param count: the amount of rows
+        :param centers: the locations of the balls (see `get_centers`)
+        :param on_screen: whether or not every center is on the screen (see `get_on_screen`)
+        :return: None
+        """
+        if self.center_buffer is None:
+            self._create_buffers()
+        if self.rows_version != self.world.rows_version:
+            self.update_rows(count)
+
+        sorted_rows = np.flatnonzero(on_screen if self.order is None else on_screen[self.order])
+        # ^ the places of the balls on the screen in the sorted order, which are their places in the buffers.
+        rows = sorted_rows if self.order is None else self.order[sorted_rows]
+        self._write_buffer(self.center_buffer, centers[rows].astype(np.float32), gl.GL_STREAM_DRAW)
+        self._write_buffer(self.color_buffer, self.world.colors[rows], gl.GL_STREAM_DRAW)
+        starts, stops = np.split(np.searchsorted(sorted_rows, self.run_bounds), 2)
+
+        flush_shape_batch()
+        gl.glPushClientAttrib(gl.GL_CLIENT_VERTEX_ARRAY_BIT)
+        gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.center_buffer)
+        gl.glVertexPointer(2, gl.GL_FLOAT, 0, 0)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.color_buffer)
+        gl.glEnableClientState(gl.GL_COLOR_ARRAY)
+        gl.glColorPointer(4, gl.GL_UNSIGNED_BYTE, 0, 0)
+
+        for start, stop, (_, _, point_size) in zip(starts.tolist(), stops.tolist(), self.runs):
+            if start != stop:
+                gl.glPointSize(point_size)
+                gl.glDrawArrays(gl.GL_POINTS, start, stop - start)
+
+        gl.glPopClientAttrib()
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        gl.glPointSize(1)
+
+        for row in self.large_rows.tolist():
+            (x, y), radius = centers[row], self.world.radii[row]
+            if x + radius < 0 or x - radius > self.heatmap.width or y + radius < 0 or y - radius > self.heatmap.height:
+                continue  # a large ball can be on the screen when its center is not, so it is tested on its own
+            draw_rect(x - radius, y - radius, radius * 2, radius * 2, tuple(self.world.colors[row].tolist()))
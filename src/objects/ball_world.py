@@ -0,0 +1,686 @@
+import numpy as np
+
+from consts import *
+from src.main_loop import MainLoop
+from src.objects.ball_renderer import BallRenderer
+from src.view_culler import ViewCuller
+
+
+class BallWorld:
+    """
+    Holds the physical state of all of the balls in contiguous numpy arrays (a row for each ball) and steps all of them
+    together in one vectorized pass, instead of every `Ball` moving itself in python.
+
+    The `Ball` objects are thin views of their row (`Ball.index`). When a ball is removed, the last row is moved into
+    its place, so the arrays stay contiguous. Rows can also be added without a `Ball` object (see `add_rows`), those
+    are simulated and drawn like the rest, but cannot be pressed.
+
+    Balls that come to rest fall asleep (see `update_sleep`). The awake rows are always kept before the sleeping ones,
+    so only the slice `[:awake_count]` is stepped. A sleeping ball is woken when it is dragged, when its velocity is
+    set, when an impulse is applied to it, or when an awake ball hits it.
+
+    The world steps itself as a pausable function in the main loop, only while some of its balls are awake.
+    It is also a part of the spatial hash of the main loop, so the balls are hit-tested against the arrays instead of
+    being kept in the cells of the hash. The queries go through the grid the broad phase of the collisions sorts the
+    rows by (see `find_pairs`), so only the rows in the cells around the queried area are tested.
+
+    All of the rows are drawn together by a `BallRenderer`, which is in the main loop while the world has rows (in a
+    draw segment of its own, so the balls are over the objects that were added before it).
+    Awake rows that fly far off the screen are put to sleep or removed, if the `ViewCuller` of the main loop is set to
+    do that to objects (see `handle_far_rows`).
+
+    There is one world for each `MainLoop`, it is accessed through `BallWorld.get_instance()`.
+    """
+    instance = None
+
+    ROW_ARRAYS = ("positions", "last_positions", "velocities", "radii", "gravities", "bounciness", "sleep_timers",
+                  "colors", "grid_places")
+    # ^ the names of the arrays that hold a value for every row.
+
+    def __init__(self, capacity=BALL_WORLD_INITIAL_CAPACITY):
+        """
+        Initiates an empty world and inserts its step into the main loop.
+        :param capacity: the amount of rows the arrays initially have room for.
+        """
+        self.count = 0
+        self.awake_count = 0  # the rows `[:awake_count]` are awake, the rows `[awake_count:count]` are asleep.
+        self.positions = np.zeros((capacity, 2))
+        self.last_positions = np.zeros((capacity, 2))  # the positions before the last step, for drawing between steps.
+        self.velocities = np.zeros((capacity, 2))
+        self.radii = np.zeros(capacity)
+        self.gravities = np.zeros(capacity)
+        self.bounciness = np.zeros(capacity)
+        self.sleep_timers = np.zeros(capacity, dtype=np.int64)
+        # ^ the amount of steps each awake ball has been resting for.
+        self.colors = np.zeros((capacity, 4), dtype=np.uint8)  # the RGBA of every ball
+        self.rows_version = 0
+        # ^ changes whenever rows are added, removed, reordered or recolored (so the renderer knows to write them again)
+        self.balls = [None] * capacity
+        # ^ the `Ball` object of every row (or None for rows without one)
+
+        self.grid_rows = None
+        # ^ the rows sorted by the cells of the grid (see `build_grid`), or None if the grid has to be built again.
+        self.grid_keys = None  # the key of the cell of every row in `grid_rows`, sorted.
+        self.grid_places = np.zeros(capacity, dtype=np.int64)
+        # ^ the place of every row in `grid_rows`. Rows that moved are kept up to date, so the grid stays usable.
+        self.grid_cell_size = None
+        self.grid_min_cell = None  # the (x, y) of the cell the keys are counted from.
+        self.grid_column_height = None  # the amount of cells in every column of the grid.
+        self.grid_column_count = None
+        self.grid_max_radius = None  # the radius of the largest ball when the grid was built.
+        self.grid_margin = 0
+        # ^ how far (at most) the balls moved since the grid was built, in the step that built it.
+        self.grid_moved_balls = set()
+        # ^ `Ball`-s whose position was set since the grid was built (see `set_coordinate`), so their cells are wrong.
+
+        self.is_colliding = True  # whether or not the balls collide with each other (and not only with the ground)
+        self.last_tested_pair_count = 0  # the amount of pairs the broad phase found in the last step.
+        self.last_colliding_pair_count = 0
+
+        self.main_loop = MainLoop.instance
+        self.main_loop.spatial_hash.add_sub_index(self)
+        self.is_stepping = False  # whether or not `self.step` is in the main loop (it is only while balls are awake)
+
+        self.renderer = BallRenderer(self)
+        self.is_drawing = False  # whether or not the renderer is in the main loop (it is only while there are rows)
+
+    @classmethod
+    def get_instance(cls):
+        """
+        Returns the world of the current `MainLoop`, creates it if it does not exist yet.
+        :return: a `BallWorld`
+        """
+        if cls.instance is None or cls.instance.main_loop is not MainLoop.instance:
+            cls.instance = cls()
+        return cls.instance
+
+    @property
+    def capacity(self):
+        return len(self.radii)
+
+    def _grow(self, needed_count):
+        """
+        Makes the arrays large enough for `needed_count` rows (at least doubles them)
+        :param needed_count: the amount of rows that is needed.
+        :return: None
+        """
+        new_capacity = max(needed_count, 2 * self.capacity)
+        for name in self.ROW_ARRAYS:
+            array = getattr(self, name)
+            grown = np.zeros((new_capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+        self.balls.extend([None] * (new_capacity - len(self.balls)))
+
+    def _set_awake_count(self, awake_count):
+        """
+        Sets the amount of awake rows, and inserts or removes `self.step` from the main loop if it needs to.
+        :param awake_count: the new amount of awake rows
+        :return: None
+        """
+        self.awake_count = awake_count
+        if awake_count and not self.is_stepping:
+            self.main_loop.insert_to_loop_pausable(self.step)
+            self.is_stepping = True
+        elif not awake_count and self.is_stepping:
+            self.main_loop.remove_from_loop(self.step)
+            self.is_stepping = False
+
+    def _set_count(self, count):
+        """
+        Sets the amount of rows, and adds or removes the drawing of the rows to the world layer if it needs to.
+        :param count: the new amount of rows
+        :return: None
+        """
+        self.count = count
+        self.rows_version += 1
+        if count and not self.is_drawing:
+            self.main_loop.draw_layers.add(self.renderer, WORLD_LAYER, self.renderer.draw, starts_segment=True)
+            self.is_drawing = True
+        elif not count and self.is_drawing:
+            self.main_loop.draw_layers.remove(self.renderer)
+            self.is_drawing = False
+
+    def _reorder_rows(self, start, order):
+        """
+        Moves rows around, so the rows `order` are placed one after the other starting at row `start`.
+        The `index`-es of the `Ball` objects of the moved rows are updated.
+        :param start: the first row to place the rows at
+        :param order: an array of the indices of the rows to place, it must be a permutation of the rows it replaces.
+        :return: None
+        """
+        stop = start + len(order)
+        for name in self.ROW_ARRAYS:
+            array = getattr(self, name)
+            array[start:stop] = array[order]
+
+        self.rows_version += 1
+        self._update_grid_rows(np.arange(start, stop))
+
+        moved = np.flatnonzero(order != np.arange(start, stop))
+        old_balls = [self.balls[index] for index in order[moved].tolist()]
+        for index, ball in zip((moved + start).tolist(), old_balls):
+            self.balls[index] = ball
+            if ball is not None:
+                ball.index = index
+
+    def _swap_rows(self, firsts, seconds):
+        """
+        Swaps pairs of rows (and updates the `index`-es of their `Ball` objects). Only the swapped rows are copied, so
+        this costs as much as the amount of pairs, no matter how many rows there are.
+        :param firsts: an array of row indices
+        :param seconds: an array of the indices of the rows to swap them with (the same length, without repetitions)
+        :return: None
+        """
+        if not len(firsts):
+            return
+
+        for name in self.ROW_ARRAYS:
+            array = getattr(self, name)
+            array[firsts], array[seconds] = array[seconds], array[firsts]
+
+        self.rows_version += 1
+        self._update_grid_rows(firsts)
+        self._update_grid_rows(seconds)
+
+        balls = self.balls
+        for first, second in zip(firsts.tolist(), seconds.tolist()):
+            balls[first], balls[second] = balls[second], balls[first]
+            if balls[first] is not None:
+                balls[first].index = first
+            if balls[second] is not None:
+                balls[second].index = second
+
+    def _gather_rows(self, indices, start):
+        """
+        Moves some rows into the range of rows that starts at `start` (and is as long as `indices`), by swapping them
+        with the rows of that range that are not moved. The order of the rows inside the range is not kept.
+        :param indices: an array of row indices (without repetitions)
+        :param start: the first row of the range
+        :return: None
+        """
+        is_in_range = (indices >= start) & (indices < start + len(indices))
+        is_taken = np.zeros(len(indices), dtype=bool)
+        is_taken[indices[is_in_range] - start] = True
+        self._swap_rows(indices[~is_in_range], np.flatnonzero(~is_taken) + start)
+
+    def add_rows(self, positions, velocities, radii, gravities, bounciness, colors=LIGHT_BLUE):
+        """
+        Adds rows to the world. The amount of rows is the amount of positions. Every other argument is an array of a
+        value for each of the new rows, or a single value which is used for all of them.
+        The new rows are awake.
+        :param positions: an (n, 2) array of x and y (or a single (x, y) to add one row).
+        :param velocities: an (n, 2) array of the velocities in x and y, or a single (x, y) or a number for all rows.
+        :param radii: the radius of every ball.
+        :param gravities: the gravity of every ball (added to the y velocity every step).
+        :param bounciness: the bounciness of every ball (the part of the velocity it keeps when it hits the ground)
+        :param colors: the RGB or RGBA of every ball (an (n, 3) or (n, 4) array, or one color for all of them)
+        :return: a `slice` of the rows that were added.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        start, stop = self.count, self.count + len(positions)
+        if stop > self.capacity:
+            self._grow(stop)
+
+        self.positions[start:stop] = positions
+        self.last_positions[start:stop] = positions
+        self.velocities[start:stop] = velocities
+        self.radii[start:stop] = radii
+        self.gravities[start:stop] = gravities
+        self.bounciness[start:stop] = bounciness
+        self.sleep_timers[start:stop] = 0
+        colors = np.asarray(colors, dtype=np.uint8)
+        self.colors[start:stop, :colors.shape[-1]] = colors
+        if colors.shape[-1] == 3:
+            self.colors[start:stop, 3] = NOT_OPAQUE
+        self.grid_rows = None  # the new rows are not in the grid.
+        self._set_count(stop)
+
+        awake_count = self.awake_count
+        self._gather_rows(np.arange(start, stop), awake_count)
+        # ^ if there are sleeping rows, the new rows are swapped with the first of them, so they are before them.
+        self._set_awake_count(awake_count + (stop - start))
+        return slice(awake_count, awake_count + (stop - start))
+
+    def add(self, ball, x, y, x_velocity, y_velocity, radius, gravity, bounciness, color=LIGHT_BLUE):
+        """
+        Adds a row for a `Ball` object and sets its `index`.
+        :return: the index of the new row.
+        """
+        index = self.add_rows((x, y), (x_velocity, y_velocity), radius, gravity, bounciness, color).start
+        self.balls[index] = ball
+        ball.index = index
+        return index
+
+    def remove(self, ball):
+        """
+        Removes the row of a `Ball` object in O(1): the last row is moved into its place. If the ball was awake, the
+        last awake row is moved into its place first, and the last row into the place of the last awake row, so the
+        awake rows stay together.
+        If the ball is not in the world, does nothing.
+        :param ball: a `Ball` object
+        :return: None
+        """
+        index = ball.index
+        if index is None or self.balls[index] is not ball:
+            return
+
+        if self.is_awake(index):
+            last_awake = self.awake_count - 1
+            self._move_row(last_awake, index)
+            index = last_awake
+            self._set_awake_count(last_awake)
+
+        last = self.count - 1
+        self._move_row(last, index)
+        self.balls[last] = None
+        self._set_count(last)
+        ball.index = None
+
+    def _move_row(self, source, destination):
+        """
+        Copies a row over another one (and updates the `index` of its `Ball` object). The source row is left as is.
+        :param source: the index of the row to copy
+        :param destination: the index of the row to copy it over
+        :return: None
+        """
+        if source == destination:
+            return
+
+        for name in self.ROW_ARRAYS:
+            array = getattr(self, name)
+            array[destination] = array[source]
+
+        moved_ball = self.balls[destination] = self.balls[source]
+        if moved_ball is not None:
+            moved_ball.index = destination
+        if self.grid_rows is not None:
+            self.grid_rows[self.grid_places[destination]] = destination
+
+    def remove_rows(self, indices):
+        """
+        Removes rows. The rows without a `Ball` object are removed together, and the `Ball` objects of the other rows
+        are unregistered from the main loop (which removes their rows one by one).
+        :param indices: an array of row indices (without repetitions)
+        :return: None
+        """
+        if not len(indices):
+            return
+
+        balls = self._get_balls(indices)
+        is_removed = np.zeros(self.count, dtype=bool)
+        is_removed[indices] = True
+        is_removed[[ball.index for ball in balls]] = False  # those are removed one by one when they are unregistered.
+
+        kept = np.flatnonzero(~is_removed)
+        self._reorder_rows(0, np.r_[kept, np.flatnonzero(is_removed)])
+        self._set_awake_count(int(np.count_nonzero(kept < self.awake_count)))
+        self._set_count(len(kept))
+
+        for ball in balls:
+            self.main_loop.unregister_graphics_object(ball)
+
+    def set_color(self, ball, color):
+        """
+        Sets the color of the row of a `Ball` object.
+        :param ball: a `Ball` object in the world
+        :param color: an RGB or an RGBA tuple
+        :return: None
+        """
+        self.colors[ball.index] = color + (NOT_OPAQUE,) if len(color) == 3 else color
+        self.rows_version += 1
+
+    def is_awake(self, index):
+        """
+        :param index: the index of a row
+        :return: whether or not the ball in that row is awake
+        """
+        return index < self.awake_count
+
+    def sleep_rows(self, indices):
+        """
+        Puts some awake rows to sleep: they stop, and are moved after all of the awake rows.
+        :param indices: an array of indices of awake rows (without repetitions)
+        :return: None
+        """
+        if not len(indices):
+            return
+
+        self.velocities[indices] = 0
+        self.last_positions[indices] = self.positions[indices]
+        # ^ sleeping rows are not stepped, so both of their position arrays must be the same when they are swapped.
+        self.sleep_timers[indices] = 0
+
+        awake_count = self.awake_count - len(indices)
+        self._gather_rows(indices, awake_count)
+        self._set_awake_count(awake_count)
+
+    def wake_rows(self, indices):
+        """
+        Wakes some sleeping rows up: they are moved to right after the awake rows.
+        :param indices: an array of indices of sleeping rows (without repetitions)
+        :return: None
+        """
+        if not len(indices):
+            return
+
+        self._gather_rows(indices, self.awake_count)
+        self._set_awake_count(self.awake_count + len(indices))
+
+    def wake(self, ball):
+        """
+        Wakes up the row of a `Ball` object if it is sleeping.
+        :param ball: a `Ball` object in the world
+        :return: None
+        """
+        if not self.is_awake(ball.index):
+            self.wake_rows(np.array([ball.index]))
+
+    def set_coordinate(self, ball, axis, value):
+        """
+        Sets the x or the y of a ball directly (by dragging it for example, not by stepping) and wakes it up.
+        The ball is teleported: its last position is set as well, so it is not drawn between where it was and where it
+        is now (which would last for as long as the program is paused, see `BallRenderer.get_centers`).
+        :param ball: a `Ball` object in the world
+        :param axis: 0 for x, 1 for y
+        :param value: the new coordinate
+        :return: None
+        """
+        self.wake(ball)
+        self.positions[ball.index, axis] = value
+        self.last_positions[ball.index, axis] = value
+        if self.grid_rows is not None:
+            self.grid_moved_balls.add(ball)
+
+    def apply_impulse(self, ball, x, y):
+        """
+        Changes the velocity of a ball by an impulse (the change is smaller the larger the ball is) and wakes it up.
+        :param ball: a `Ball` object in the world
+        :param x:
+        :param y: the impulse
+        :return: None
+        """
+        self.wake(ball)
+        self.velocities[ball.index] += np.array((x, y)) / self.radii[ball.index] ** 2
+
+    def step(self):
+        """
+        Applies the gravity of all of the balls, moves them by their velocities, collides them with each other and
+        bounces the ones that hit the ground. Then puts the balls that have been resting for long enough to sleep.
+        Only the awake rows are stepped.
+
+        The gravity is applied before moving (semi-implicit euler), and a ball that went into the ground is put back on
+        it, otherwise every bounce adds a little energy and the balls never come to rest.
+        A ball that bounces off the ground slower than `BALL_GROUND_REST_SPEED` stops bouncing, and a ball on the ground
+        slows down sideways by `BALL_GROUND_FRICTION`, so piles of balls do not spread forever.
+
+        The position arrays are swapped instead of copied, and every operation is done in place, because at a million
+        balls the step is bound by memory and not by the calculations.
+        :return: None
+        """
+        awake_count = self.awake_count
+        self.last_positions, self.positions = self.positions, self.last_positions
+        positions, velocities = self.positions[:awake_count], self.velocities[:awake_count]
+        self.grid_rows = None  # the balls moved, if they collide the grid is built again by the broad phase.
+
+        velocities[:, 1] += self.gravities[:awake_count]
+        np.add(self.last_positions[:awake_count], velocities, out=positions)
+
+        if self.is_colliding:
+            self.collide()
+
+        y_positions, y_velocities, radii = positions[:, 1], velocities[:, 1], self.radii[:awake_count]
+        hitting_ground = y_positions < radii
+        hitting_ground &= y_velocities < 0
+        np.multiply(y_velocities, -self.bounciness[:awake_count], out=y_velocities, where=hitting_ground)
+        if self.grid_rows is not None:
+            self.grid_margin += np.max(radii - y_positions, where=hitting_ground, initial=0)
+        np.copyto(y_positions, radii, where=hitting_ground)
+        np.multiply(velocities[:, 0], BALL_GROUND_FRICTION, out=velocities[:, 0], where=hitting_ground)
+        hitting_ground &= y_velocities < BALL_GROUND_REST_SPEED
+        np.copyto(y_velocities, 0, where=hitting_ground)
+
+        self.update_sleep(awake_count)
+        self.handle_far_rows()
+
+    def update_sleep(self, awake_count):
+        """
+        Counts how many steps every awake ball has been resting for (moving and moved less than the thresholds),
+        and puts to sleep the ones that have been resting for `BALL_SLEEP_STEP_COUNT` steps.
+        :param awake_count: the amount of rows that were stepped (balls that were woken in this step are not counted)
+        :return: None
+        """
+        velocities = self.velocities[:awake_count]
+        displacements = self.positions[:awake_count] - self.last_positions[:awake_count]
+        is_resting = np.einsum("ij,ij->i", velocities, velocities) < BALL_SLEEP_SPEED ** 2
+        is_resting &= np.einsum("ij,ij->i", displacements, displacements) < BALL_SLEEP_DISTANCE ** 2
+
+        sleep_timers = self.sleep_timers[:awake_count]
+        sleep_timers += 1
+        sleep_timers[~is_resting] = 0
+        self.sleep_rows(np.flatnonzero(sleep_timers >= BALL_SLEEP_STEP_COUNT))
+
+    def handle_far_rows(self):
+        """
+        Puts to sleep (freezes) or removes the awake rows whose balls are entirely outside of the far rectangle of the
+        `ViewCuller` of the main loop, according to its `off_screen_action`.
+        Sleeping rows do not move, so only the awake ones are tested.
+        :return: None
+        """
+        view_culler = self.main_loop.view_culler
+        if view_culler.off_screen_action is None:
+            return
+
+        awake_count = self.awake_count
+        min_x, min_y, max_x, max_y = view_culler.get_far_rect()
+        x, y, radii = self.positions[:awake_count, 0], self.positions[:awake_count, 1], self.radii[:awake_count]
+        is_far = (x + radii < min_x) | (x - radii > max_x) | (y + radii < min_y) | (y - radii > max_y)
+        far_rows = np.flatnonzero(is_far)
+
+        if view_culler.off_screen_action == ViewCuller.FREEZE:
+            self.sleep_rows(far_rows)
+        elif view_culler.off_screen_action == ViewCuller.REMOVE:
+            self.remove_rows(far_rows)
+
+    def build_grid(self):
+        """
+        Places the balls in a uniform grid whose cells are as large as the largest ball, and sorts the rows by their
+        cells (column by column). The sorted rows are kept in `grid_rows` and their cells in `grid_keys`.
+        This is done by the broad phase of the collisions in every step (see `find_pairs`), and the queries of the
+        spatial hash use the same grid, so hit-testing the balls does not go over all of them.
+        :return: None
+        """
+        count = self.count
+        radii = self.radii[:count]
+        self.grid_max_radius = radii.max() if count else 0
+        self.grid_cell_size = max(2 * self.grid_max_radius, BALL_COLLISION_MINIMAL_CELL_SIZE)
+
+        cells = np.floor(self.positions[:count] / self.grid_cell_size).astype(np.int64)
+        self.grid_min_cell = cells.min(axis=0) - 1 if count else np.zeros(2, dtype=np.int64)
+        cells -= self.grid_min_cell
+        self.grid_column_height = (cells[:, 1].max() if count else 0) + 2
+        # ^ an empty row of cells above and below, so moving one cell up or down never wraps to the next column.
+        self.grid_column_count = (cells[:, 0].max() if count else 0) + 2
+        keys = cells[:, 0] * self.grid_column_height + cells[:, 1]
+
+        self.grid_rows = np.argsort(keys, kind="stable")
+        self.grid_keys = keys[self.grid_rows]
+        self.grid_places[self.grid_rows] = np.arange(count)
+        self.grid_margin = 0
+        self.grid_moved_balls.clear()
+
+    def _update_grid_rows(self, rows):
+        """
+        Updates the places of rows that were moved in `grid_rows`. Each row takes its place with it (`grid_places`
+        is one of the row arrays), so the grid stays correct without sorting it again.
+        :param rows: an array of row indices
+        :return: None
+        """
+        if self.grid_rows is not None:
+            self.grid_rows[self.grid_places[rows]] = rows
+
+    def find_pairs(self):
+        """
+        The broad phase of the collisions between the balls.
+        The rows are sorted by the cells of a grid (see `build_grid`), so every two balls that touch are in the same
+        cell or in adjacent ones. The pairs of every cell with itself and with 4 of its neighbours (so every two cells
+        are paired once) are generated together. Those neighbours are sorted right after the cell, so they are found
+        as two ranges of rows.
+        :return: two arrays of row indices, (first, second), of the pairs that might be touching (each pair once)
+        """
+        count = self.count
+        if count < 2:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+        self.build_grid()
+        order, sorted_keys, column_height = self.grid_rows, self.grid_keys, self.grid_column_height
+        positions_in_order = np.arange(count)
+        ranges = [
+            (positions_in_order + 1, np.searchsorted(sorted_keys, sorted_keys + 1, side="right")),
+            # ^ the rows after every row in its own cell, and the rows in the cell above it (which comes right after)
+            (np.searchsorted(sorted_keys, sorted_keys + (column_height - 1), side="left"),
+             np.searchsorted(sorted_keys, sorted_keys + (column_height + 1), side="right")),
+            # ^ the rows in the 3 cells of the next column, which are also one after the other.
+        ]
+
+        firsts, seconds = [], []
+        for starts, ends in ranges:
+            lengths = ends - starts
+            total = lengths.sum()
+            if total == 0:
+                continue
+
+            firsts.append(np.repeat(positions_in_order, lengths))
+            seconds.append(np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths))
+
+        if not firsts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return order[np.concatenate(firsts)], order[np.concatenate(seconds)]
+
+    def collide(self):
+        """
+        The narrow phase and the response of the collisions between the balls.
+        Every pair of the broad phase that overlaps and moves towards each other gets an impulse along the line between
+        their centers, using the smaller bounciness of the two. The mass of a ball is its area.
+        The overlapping balls are also pushed apart, so piles of balls do not sink into each other.
+        All of the pairs are resolved together, from the velocities at the start of the step.
+
+        Sleeping balls are not moved by the collision (as if they were infinitely heavy), unless the ball that hits
+        them is faster than `BALL_WAKE_SPEED`, then they are woken up. Pairs of two sleeping balls are skipped.
+        :return: None
+        """
+        firsts, seconds = self.find_pairs()
+        self.last_tested_pair_count = len(firsts)
+
+        awake_count = self.awake_count
+        either_awake = (firsts < awake_count) | (seconds < awake_count)
+        firsts, seconds = firsts[either_awake], seconds[either_awake]
+
+        positions, velocities, radii = self.positions, self.velocities, self.radii
+        offsets = positions[seconds] - positions[firsts]
+        squared_distances = np.einsum("ij,ij->i", offsets, offsets)
+        touching = squared_distances < (radii[firsts] + radii[seconds]) ** 2
+        touching &= squared_distances > 0
+
+        firsts, seconds, offsets = firsts[touching], seconds[touching], offsets[touching]
+        self.last_colliding_pair_count = len(firsts)
+        if not len(firsts):
+            return
+
+        distances = np.sqrt(squared_distances[touching])
+        normals = offsets / distances[:, np.newaxis]
+        approaching_speeds = np.einsum("ij,ij->i", velocities[seconds] - velocities[firsts], normals)
+        is_hard_hit = approaching_speeds < -BALL_WAKE_SPEED
+        waking = np.unique(np.r_[firsts[is_hard_hit], seconds[is_hard_hit]])
+        waking = waking[waking >= awake_count]
+
+        count = self.count
+        inverse_masses = 1 / (radii[:count] ** 2)
+        inverse_masses[awake_count:] = 0
+        inverse_masses[waking] = 1 / (radii[waking] ** 2)
+        first_inverse_masses, second_inverse_masses = inverse_masses[firsts], inverse_masses[seconds]
+        inverse_mass_sums = first_inverse_masses + second_inverse_masses
+
+        bounciness = np.minimum(self.bounciness[firsts], self.bounciness[seconds])
+        impulses = np.where(approaching_speeds < 0, -(1 + bounciness) * approaching_speeds / inverse_mass_sums, 0)
+
+        overlaps = (radii[firsts] + radii[seconds] - distances) / inverse_mass_sums
+        for axis in (0, 1):
+            impulse_parts = impulses * normals[:, axis]
+            velocities[:count, axis] += np.bincount(seconds, impulse_parts * second_inverse_masses, count)
+            velocities[:count, axis] -= np.bincount(firsts, impulse_parts * first_inverse_masses, count)
+
+            overlap_parts = overlaps * normals[:, axis]
+            pushes = np.bincount(seconds, overlap_parts * second_inverse_masses, count)
+            pushes -= np.bincount(firsts, overlap_parts * first_inverse_masses, count)
+            positions[:count, axis] += pushes
+            self.grid_margin += np.abs(pushes).max()
+
+        self.wake_rows(waking)
+
+    def _get_balls(self, indices):
+        """
+        Returns the `Ball` objects of some rows (skips the rows without one)
+        :param indices: an array of row indices
+        :return: a set of `Ball` objects
+        """
+        return {self.balls[index] for index in indices.tolist() if self.balls[index] is not None}
+
+    def _query_grid(self, min_x, min_y, max_x, max_y):
+        """
+        Returns the rows whose balls might intersect a rectangle: the rows in the cells of the grid around it (as far
+        as the largest ball, and as far as the balls moved since the grid was built), and the rows of the balls whose
+        position was set since then. The grid is built if it has to be, or if the balls moved further than a cell since
+        it was built (which would make the query go through too many cells).
+        :return: an array of row indices (that might repeat)
+        """
+        if self.grid_rows is None or self.grid_margin > self.grid_cell_size:
+            self.build_grid()
+
+        cell_size, (min_cell_x, min_cell_y) = self.grid_cell_size, self.grid_min_cell
+        reach = self.grid_max_radius + self.grid_margin
+        first_column = max(int(np.floor((min_x - reach) / cell_size)) - min_cell_x, 0)
+        last_column = min(int(np.floor((max_x + reach) / cell_size)) - min_cell_x, self.grid_column_count - 1)
+        bottom = max(int(np.floor((min_y - reach) / cell_size)) - min_cell_y, 0)
+        top = min(int(np.floor((max_y + reach) / cell_size)) - min_cell_y, self.grid_column_height - 1)
+        if first_column > last_column or bottom > top:
+            places = np.empty(0, dtype=np.int64)
+        else:
+            column_keys = np.arange(first_column, last_column + 1) * self.grid_column_height
+            starts = np.searchsorted(self.grid_keys, column_keys + bottom, side="left")
+            lengths = np.searchsorted(self.grid_keys, column_keys + top, side="right") - starts
+            places = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+
+        rows = self.grid_rows[places]
+        rows = rows[(rows < self.count) & (self.grid_places[rows] == places)]
+        # ^ the places of rows that were removed since the grid was built are taken by other rows, or are past the end.
+        moved_rows = [ball.index for ball in self.grid_moved_balls if ball.index is not None]
+        return np.r_[rows, moved_rows].astype(np.intp)
+
+    def query_point(self, x, y):
+        """
+        Returns the balls that contain a point.
+        :return: a set of `Ball` objects
+        """
+        rows = self._query_grid(x, y, x, y)
+        squared_distances = ((self.positions[rows] - (x, y)) ** 2).sum(axis=1)
+        return self._get_balls(rows[squared_distances < self.radii[rows] ** 2])
+
+    def query_rect(self, min_x, min_y, max_x, max_y):
+        """
+        Returns the balls whose bounding boxes intersect a rectangle.
+        :return: a set of `Ball` objects
+        """
+        rows = self._query_grid(min_x, min_y, max_x, max_y)
+        x, y, radii = self.positions[rows, 0], self.positions[rows, 1], self.radii[rows]
+        intersecting = (x + radii >= min_x) & (x - radii <= max_x) & (y + radii >= min_y) & (y - radii <= max_y)
+        return self._get_balls(rows[intersecting])
+
+    def query_radius(self, x, y, radius):
+        """
+        Returns the balls that intersect a circle.
+        :return: a set of `Ball` objects
+        """
+        rows = self._query_grid(x - radius, y - radius, x + radius, y + radius)
+        squared_distances = ((self.positions[rows] - (x, y)) ** 2).sum(axis=1)
+        return self._get_balls(rows[squared_distances <= (self.radii[rows] + radius) ** 2])
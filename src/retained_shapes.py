@@ -0,0 +1,338 @@
+from abc import ABCMeta, abstractmethod
+
+import pyglet
+
+from consts import *
+from src.shape_drawing import flush_shape_batch, get_circle_vertices, get_rect_vertices, with_alpha
+
+
+class RetainedShape(metaclass=ABCMeta):
+    """
+    A shape that keeps its vertices in a `pyglet.graphics.vertexdomain.VertexList` for its whole lifetime, instead of
+    calculating them again in every frame like the drawing functions of `shape_drawing` do.
+
+    The vertices (and the colors) are only calculated and written to the buffer of the vertex list again when one of
+    the properties of the shape changes to a different value. Setting a property to the value it already has costs
+    nothing, so the owner of a shape can simply set all of its properties before every draw.
+
+    A shape can be created in a `pyglet.graphics.Batch` (with a group), and then it is drawn with the rest of the batch.
+    Otherwise it is drawn on its own when `draw` is called (after the `shape_batch` is flushed, so it stays in the
+    order it was drawn in).
+    `delete` must be called when the shape is not needed anymore.
+
+    Subclasses define `mode` and `get_vertices`, and can override `get_colors`.
+    """
+    mode = pyglet.gl.GL_QUADS
+
+    def __init__(self, color, batch=None, group=None):
+        """
+        Initiates the shape and creates its vertex list.
+        :param color: an RGB or an RGBA tuple
+        :param batch: the `pyglet.graphics.Batch` the shape is drawn in, or None if it is drawn by itself.
+        :param group: the `pyglet.graphics.Group` of the shape in the batch.
+        """
+        self._color = color
+        self.batch = batch
+
+        vertices = self.get_vertices()
+        count = len(vertices) // 2
+        formats = ('v2f/dynamic', vertices), ('c4B/dynamic', self.get_colors(count))
+        if batch is None:
+            self.vertex_list = pyglet.graphics.vertex_list(count, *formats)
+        else:
+            self.vertex_list = batch.add(count, self.mode, group, *formats)
+
+    @abstractmethod
+    def get_vertices(self):
+        """
+        :return: a sequence of the x and y of every vertex of the shape.
+        """
+
+    def get_colors(self, vertex_count):
+        """
+        :param vertex_count: the amount of vertices of the shape
+        :return: a sequence of the RGBA of every vertex of the shape.
+        """
+        return with_alpha(self._color, vertex_count)
+
+    def update_vertices(self):
+        """
+        Writes the vertices of the shape to its vertex list (resizes it if the amount of vertices changed)
+        :return: None
+        """
+        vertices = self.get_vertices()
+        count = len(vertices) // 2
+        if count != self.vertex_list.get_size():
+            self.vertex_list.resize(count)
+            self.vertex_list.colors[:] = self.get_colors(count)
+        self.vertex_list.vertices[:] = vertices
+
+    def update_colors(self):
+        """
+        Writes the colors of the shape to its vertex list.
+        :return: None
+        """
+        self.vertex_list.colors[:] = self.get_colors(self.vertex_list.get_size())
+
+    def _set(self, name, value, update):
+        """
+        Sets an attribute of the shape, and updates the vertex list only if the value actually changed.
+        :param name: the name of the attribute
+        :param value: its new value
+        :param update: the method that updates the vertex list
+        :return: None
+        """
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            update()
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        self._set('_color', color, self.update_colors)
+
+    def draw(self):
+        """
+        Draws the shape, if it is not in a batch (a shape in a batch is drawn with the batch).
+        :return: None
+        """
+        if self.batch is None:
+            flush_shape_batch()
+            self.vertex_list.draw(self.mode)
+
+    def delete(self):
+        """
+        Deletes the vertex list of the shape. The shape cannot be used afterwards.
+        :return: None
+        """
+        if self.vertex_list is not None:
+            self.vertex_list.delete()
+            self.vertex_list = None
+
+
+class Rect(RetainedShape):
+    """
+    A filled rectangle (like `draw_rect`)
+    """
+    def __init__(self, x, y, width, height, color=GRAY, batch=None, group=None):
+        """
+        :param x:
+        :param y: coordinates of the bottom left corner of the rectangle.
+        :param width:
+        :param height:
+        :param color:
+        """
+        self._x, self._y, self._width, self._height = x, y, width, height
+        super(Rect, self).__init__(color, batch, group)
+
+    def get_vertices(self):
+        return get_rect_vertices(self._x, self._y, self._width, self._height)
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, x):
+        self._set('_x', x, self.update_vertices)
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, y):
+        self._set('_y', y, self.update_vertices)
+
+    @property
+    def width(self):
+        return self._width
+
+    @width.setter
+    def width(self, width):
+        self._set('_width', width, self.update_vertices)
+
+    @property
+    def height(self):
+        return self._height
+
+    @height.setter
+    def height(self, height):
+        self._set('_height', height, self.update_vertices)
+
+    @property
+    def location(self):
+        return self._x, self._y
+
+    @location.setter
+    def location(self, location):
+        if location != (self._x, self._y):
+            self._x, self._y = location
+            self.update_vertices()
+
+
+class OutlinedRect(Rect):
+    """
+    A filled rectangle with an outline around it (like `draw_rect_with_outline`): the rectangle of the outline and the
+    rectangle itself in the same vertex list.
+    """
+    def __init__(self, x, y, width, height, color=GRAY, outline_color=WHITE, outline_width=DEFAULT_OUTLINE_WIDTH,
+                 batch=None, group=None):
+        """
+        :param x:
+        :param y: coordinates of the bottom left corner of the rectangle (without the outline).
+        :param width:
+        :param height:
+        :param color: the color of the inside of the rectangle
+        :param outline_color:
+        :param outline_width: the width of the outline (half of it is inside the rectangle)
+        """
+        self._outline_color = outline_color
+        self._outline_width = outline_width
+        super(OutlinedRect, self).__init__(x, y, width, height, color, batch, group)
+
+    def get_vertices(self):
+        outline_width = self._outline_width
+        return get_rect_vertices(self._x - outline_width / 2, self._y - outline_width / 2,
+                                 self._width + outline_width, self._height + outline_width) + \
+            get_rect_vertices(self._x, self._y, self._width, self._height)
+
+    def get_colors(self, vertex_count):
+        return with_alpha(self._outline_color, 4) + with_alpha(self._color, 4)
+
+    @property
+    def outline_color(self):
+        return self._outline_color
+
+    @outline_color.setter
+    def outline_color(self, outline_color):
+        self._set('_outline_color', outline_color, self.update_colors)
+
+    @property
+    def outline_width(self):
+        return self._outline_width
+
+    @outline_width.setter
+    def outline_width(self, outline_width):
+        self._set('_outline_width', outline_width, self.update_vertices)
+
+
+class Line(RetainedShape):
+    """
+    A line between two points (like `draw_line`)
+    """
+    mode = pyglet.gl.GL_LINES
+
+    def __init__(self, point_1, point_2, color=WHITE, batch=None, group=None):
+        """
+        :param point_1: a tuple of (x, y) of the first point.
+        :param point_2: the same for the other point.
+        :param color: the color of the line.
+        """
+        self._point_1, self._point_2 = tuple(point_1), tuple(point_2)
+        super(Line, self).__init__(color, batch, group)
+
+    def get_vertices(self):
+        return self._point_1 + self._point_2
+
+    @property
+    def point_1(self):
+        return self._point_1
+
+    @point_1.setter
+    def point_1(self, point_1):
+        self._set('_point_1', tuple(point_1), self.update_vertices)
+
+    @property
+    def point_2(self):
+        return self._point_2
+
+    @point_2.setter
+    def point_2(self, point_2):
+        self._set('_point_2', tuple(point_2), self.update_vertices)
+
+
+class Circle(RetainedShape):
+    """
+    The outline of a circle (like `draw_circle`). The amount of its segments follows its radius.
+    """
+    mode = pyglet.gl.GL_LINES
+
+    def __init__(self, x, y, radius, color=WHITE, batch=None, group=None):
+        """
+        :param x:
+        :param y: the coordinates of the center of the circle
+        :param radius:
+        :param color:
+        """
+        self._x, self._y, self._radius = x, y, radius
+        super(Circle, self).__init__(color, batch, group)
+
+    def get_vertices(self):
+        return get_circle_vertices(self._x, self._y, self._radius)
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, x):
+        self._set('_x', x, self.update_vertices)
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, y):
+        self._set('_y', y, self.update_vertices)
+
+    @property
+    def radius(self):
+        return self._radius
+
+    @radius.setter
+    def radius(self, radius):
+        self._set('_radius', radius, self.update_vertices)
+
+    @property
+    def location(self):
+        return self._x, self._y
+
+    @location.setter
+    def location(self, location):
+        if location != (self._x, self._y):
+            self._x, self._y = location
+            self.update_vertices()
+
+
+class Polyline(RetainedShape):
+    """
+    Lines that connect a list of points one after the other (for example the points of a sine wave)
+    """
+    mode = pyglet.gl.GL_LINES
+
+    def __init__(self, points, color=WHITE, batch=None, group=None):
+        """
+        :param points: a sequence of (x, y) tuples (at least two)
+        :param color:
+        """
+        self._points = tuple(map(tuple, points))
+        super(Polyline, self).__init__(color, batch, group)
+
+    def get_vertices(self):
+        vertices = []
+        for point_1, point_2 in zip(self._points, self._points[1:]):
+            vertices.extend(point_1 + point_2)
+        return vertices
+
+    @property
+    def points(self):
+        return self._points
+
+    @points.setter
+    def points(self, points):
+        self._set('_points', tuple(map(tuple, points)), self.update_vertices)
@@ -1,9 +1,270 @@
-from itertools import chain
+import weakref
 
+import numpy as np
 import pyglet
 
 from consts import *
-from usefuls import circular_coordinates, sine_wave_coordinates
+
+
+class ShapeBatch:
+    """
+    Collects the shapes that are drawn during a frame and draws them together in a few draw calls.
+
+    Every shape is drawn either as `GL_QUADS` or as `GL_LINES`, with 'v2f' vertices and 'c4B' colors.
+    While the batch is active (see `start_frame`), the drawing functions in this module append their vertices to the
+    batch instead of drawing them. Consecutive shapes of the same primitive are merged into one run, so the order the
+    shapes were drawn in (the order of the main loop, which is the z-ordering) is kept.
+
+    Anything that is drawn without the batch (text, sprites) must call `flush` first, so that the shapes that should be
+    beneath it are drawn before it.
+    """
+    def __init__(self):
+        """
+        Initiates an inactive and empty batch.
+        """
+        self.is_active = False
+        self.runs = []
+        # ^ a list of (mode, vertices, colors) lists, in the order they should be drawn.
+
+        self.draw_call_count = 0  # the amount of draw calls of shapes in the current frame
+        self.last_frame_draw_call_count = 0
+
+    def start_frame(self, is_batching=True):
+        """
+        Starts a new frame. Counts the draw calls of the last one.
+        :param is_batching: whether the shapes of this frame are collected (or drawn immediately)
+        :return: None
+        """
+        self.last_frame_draw_call_count = self.draw_call_count
+        self.draw_call_count = 0
+        self.is_active = is_batching
+
+    def end_frame(self):
+        """
+        Draws everything that is left in the batch and stops collecting.
+        :return: None
+        """
+        self.flush()
+        self.is_active = False
+
+    def add(self, mode, vertices, colors):
+        """
+        Draws a shape, or if the batch is active, adds it to the batch.
+        :param mode: `GL_QUADS` or `GL_LINES`
+        :param vertices: a sequence of the x and y of every vertex.
+        :param colors: a sequence of the RGBA of every vertex.
+        :return: None
+        """
+        if not self.is_active:
+            self.draw(mode, vertices, colors)
+            return
+
+        if self.runs and self.runs[-1][0] == mode:
+            _, run_vertices, run_colors = self.runs[-1]
+            run_vertices.extend(vertices)
+            run_colors.extend(colors)
+        else:
+            self.runs.append((mode, list(vertices), list(colors)))
+
+    def flush(self):
+        """
+        Draws all of the shapes in the batch (one draw call for each run) and empties it.
+        :return: None
+        """
+        for mode, vertices, colors in self.runs:
+            self.draw(mode, vertices, colors)
+        self.runs.clear()
+
+    def draw(self, mode, vertices, colors):
+        """
+        Draws vertices immediately in one draw call.
+        :param mode: `GL_QUADS` or `GL_LINES`
+        :param vertices: a sequence of the x and y of every vertex.
+        :param colors: a sequence of the RGBA of every vertex.
+        :return: None
+        """
+        self.draw_call_count += 1
+        pyglet.graphics.draw(len(vertices) // 2, mode, ('v2f', vertices), ('c4B', colors))
+
+
+shape_batch = ShapeBatch()
+# ^ the batch all of the shapes in this module are drawn through.
+
+
+def flush_shape_batch():
+    """
+    Draws all of the shapes that are waiting in the batch.
+    Call this before drawing anything that is not a shape from this module (text, sprites) so it is drawn over them.
+    :return: None
+    """
+    if shape_batch.runs:
+        shape_batch.flush()
+
+
+def with_alpha(color, vertex_count):
+    """
+    Returns the RGBA color values of `vertex_count` vertices of the same color.
+    :param color: an RGB or an RGBA tuple
+    :param vertex_count: the amount of vertices
+    :return: a tuple of the RGBA of every vertex.
+    """
+    return (color + (NOT_OPAQUE,) if len(color) == 3 else color) * vertex_count
+
+
+def get_rect_vertices(x, y, width, height):
+    """
+    Returns the vertices of a filled rectangle (for `GL_QUADS`), rounded to whole pixels.
+    :param x:
+    :param y: coordinates of the bottom left corner of the rectangle.
+    :param width:
+    :param height:
+    :return: a tuple of the x and y of the four corners of the rectangle.
+    """
+    int_x, int_y, int_width, int_height = map(int, (x, y, width, height))
+    return (int_x, int_y,
+            int_x + int_width, int_y,
+            int_x + int_width, int_y + int_height,
+            int_x, int_y + int_height)
+
+
+def get_rect_outline_vertices(x, y, width, height):
+    """
+    Returns the vertices of the four sides of a rectangle as separate lines (for `GL_LINES`), rounded to whole pixels.
+    :param x:
+    :param y: coordinates of the bottom left corner of the rectangle.
+    :param width:
+    :param height:
+    :return: a tuple of the x and y of the two ends of every side.
+    """
+    int_x, int_y, int_width, int_height = map(int, (x, y, width, height))
+    return (int_x, int_y,
+            int_x + int_width, int_y,
+            int_x + int_width, int_y,
+            int_x + int_width, int_y + int_height,
+            int_x + int_width, int_y + int_height,
+            int_x, int_y + int_height,
+            int_x, int_y + int_height,
+            int_x, int_y)
+
+
+_unit_circle_lines = {}
+# ^ maps a segment count to the segments of a circle of radius 1 around (0, 0), see `get_unit_circle_lines`
+
+
+def get_circle_segment_count(radius):
+    """
+    Returns the amount of segments a circle should be drawn with, so its segments are not longer than
+    `CIRCLE_SEGMENT_LENGTH` on the screen. The amounts are powers of two, so only a few unit circles are ever cached.
+    :param radius: the radius of the circle on the screen
+    :return: an int between `CIRCLE_MINIMAL_SEGMENT_COUNT` and `CIRCLE_MAXIMAL_SEGMENT_COUNT`
+    """
+    segment_count = CIRCLE_MINIMAL_SEGMENT_COUNT
+    while segment_count < CIRCLE_MAXIMAL_SEGMENT_COUNT and segment_count * CIRCLE_SEGMENT_LENGTH < 2 * np.pi * radius:
+        segment_count *= 2
+    return segment_count
+
+
+def get_unit_circle_lines(segment_count):
+    """
+    Returns the segments of a circle of radius 1 around (0, 0), as separate lines (for `GL_LINES`).
+    It is only calculated once for every segment count.
+    :param segment_count: the amount of segments of the circle
+    :return: a read-only numpy array of shape (2 * segment_count, 2) of the x and y of the two ends of every segment.
+    """
+    if segment_count not in _unit_circle_lines:
+        angles = np.linspace(0, 2 * np.pi, segment_count, endpoint=False)
+        points = np.column_stack((np.cos(angles), np.sin(angles)))
+        lines = np.stack((points, np.roll(points, -1, axis=0)), axis=1).reshape(-1, 2)
+        lines.flags.writeable = False
+        _unit_circle_lines[segment_count] = lines
+    return _unit_circle_lines[segment_count]
+
+
+def get_circle_vertices(x, y, radius):
+    """
+    Returns the vertices of the outline of a circle as separate lines, with as many segments as its size requires.
+    :param x: the x of the center of the circle
+    :param y: the y of the center of the circle
+    :param radius: the radius of the circle
+    :return: a list of the x and y of the two ends of every segment.
+    """
+    lines = get_unit_circle_lines(get_circle_segment_count(radius)) * radius + (x, y)
+    return lines.ravel().tolist()
+
+
+def get_sine_wave_vertices(start_coordinates, end_coordinates, amplitude, frequency):
+    """
+    Calculates the segments of a sine wave that goes from one point towards another (like the generator
+    `usefuls.sine_wave_coordinates`, but all of the points at once)
+    :param start_coordinates: the (x, y) the wave starts at
+    :param end_coordinates: the (x, y) the wave goes towards
+    :param amplitude: the amplitude of the wave (in pixels)
+    :param frequency: the frequency of the wave
+    :return: a list of the x and y of the two ends of every segment (empty if the points are too close)
+    """
+    start_x, start_y = start_coordinates
+    end_x, end_y = end_coordinates
+    length = np.hypot(end_x - start_x, end_y - start_y)
+    count = int(length / SINE_WAVE_MINIMAL_POINT_DISTANCE)
+    if count < 2:
+        return []
+
+    along = INITIAL_SINE_WAVE_ANGLE + np.arange(count) * SINE_WAVE_MINIMAL_POINT_DISTANCE
+    across = amplitude * np.sin(along * frequency)
+    direction_x, direction_y = (end_x - start_x) / length, (end_y - start_y) / length
+
+    points = np.empty((count, 2))
+    points[:, 0] = start_x + along * direction_x - across * direction_y
+    points[:, 1] = start_y + along * direction_y + across * direction_x
+    return np.stack((points[:-1], points[1:]), axis=1).ravel().tolist()
+
+
+class SineWaveCache:
+    """
+    Keeps the vertices of the sine wave of every object that draws one (a connection, for example), so a wave whose
+    ends did not move is not calculated again in every frame.
+    Each object has a single entry, which is replaced when the ends of its wave move. The objects are weakly referenced,
+    so the entry of an object is dropped along with the object, and the cache never holds more waves than there are
+    objects that draw them.
+    """
+    def __init__(self):
+        """
+        Initiates an empty cache.
+        """
+        self.waves = weakref.WeakKeyDictionary()
+        # ^ maps every object to the (start_coordinates, end_coordinates, amplitude, frequency) of its last wave and to
+        # the vertices of that wave.
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get_vertices(self, owner, start_coordinates, end_coordinates, amplitude, frequency):
+        """
+        Returns the vertices of the sine wave of an object (see `get_sine_wave_vertices`), calculates them if the wave
+        changed since the last time they were asked for.
+        The returned list should not be changed.
+        :param owner: the object that draws the wave
+        """
+        key = tuple(start_coordinates), tuple(end_coordinates), amplitude, frequency
+        cached = self.waves.get(owner)
+        if cached is not None and cached[0] == key:
+            self.hit_count += 1
+            return cached[1]
+
+        self.miss_count += 1
+        vertices = get_sine_wave_vertices(start_coordinates, end_coordinates, amplitude, frequency)
+        self.waves[owner] = key, vertices
+        return vertices
+
+    def remove(self, owner):
+        """
+        Drops the wave of an object before the object itself is dropped. If it has none, does nothing.
+        :param owner: the object that drew the wave
+        :return: None
+        """
+        self.waves.pop(owner, None)
+
+
+sine_wave_cache = SineWaveCache()
 
 
 def draw_line(point_1, point_2, color=WHITE):
@@ -14,10 +275,7 @@ def draw_line(point_1, point_2, color=WHITE):
     :param color: the color of the line.
     :return: None
     """
-    vertex_view = 'v2i'
-    if any([isinstance(coord, float) for coord in point_1 + point_2]):
-        vertex_view = 'v2f'
-    pyglet.graphics.draw(2, pyglet.gl.GL_LINES, (vertex_view, point_1 + point_2), ('c3B', color * 2))
+    shape_batch.add(pyglet.gl.GL_LINES, point_1 + point_2, with_alpha(color, 2))
 
 
 def draw_rect_no_fill(x, y, width, height):
@@ -25,18 +283,7 @@ def draw_rect_no_fill(x, y, width, height):
     Draws an unfilled rectangle from the bottom left corner (x,y) with a width of
     `width` and a height of `height`.
     """
-    int_x, int_y, int_width, int_height = map(int, (x, y, width, height))
-    pyglet.graphics.draw(8, pyglet.gl.GL_LINES,
-                         ('v2i', (int_x, int_y,
-                                  int_x + int_width, int_y,
-                                  int_x + int_width, int_y,
-                                  int_x + int_width, int_y + int_height,
-                                  int_x + int_width, int_y + int_height,
-                                  int_x, int_y + int_height,
-                                  int_x, int_y + int_height,
-                                  int_x, int_y)),
-                         ('c4B', (50, 50, 50, 10) * 8)
-                         )
+    shape_batch.add(pyglet.gl.GL_LINES, get_rect_outline_vertices(x, y, width, height), (50, 50, 50, 10) * 8)
 
 
 def draw_rect(x, y, width, height, color=GRAY):
@@ -50,14 +297,7 @@ def draw_rect(x, y, width, height, color=GRAY):
     :param color:
     :return: None
     """
-    int_x, int_y, int_width, int_height = map(int, (x, y, width, height))
-    pyglet.graphics.draw(4, pyglet.gl.GL_QUADS,
-                         ('v2i', (int_x, int_y,
-                                  int_x + int_width, int_y,
-                                  int_x + int_width, int_y + int_height,
-                                  int_x, int_y + int_height)),
-                         ('c3B', color * 4)
-                         )
+    shape_batch.add(pyglet.gl.GL_QUADS, get_rect_vertices(x, y, width, height), with_alpha(color, 4))
 
 
 def draw_rect_with_outline(x, y, width, height, color=GRAY, outline_color=WHITE, outline_width=DEFAULT_OUTLINE_WIDTH):
@@ -93,33 +333,29 @@ def draw_circle(x, y, radius, color=WHITE):
     Draws a circle with a given center location and a radius and a color.
     :return:
     """
-    vertices = list(chain(*circular_coordinates((x, y), radius, CIRCLE_SEGMENT_COUNT)))
-
-    pyglet.graphics.draw(CIRCLE_SEGMENT_COUNT, pyglet.gl.GL_LINE_LOOP,
-                         ('v2f', tuple(vertices)),
-                         ('c3B', color * CIRCLE_SEGMENT_COUNT),
-                         )
+    vertices = get_circle_vertices(x, y, radius)
+    shape_batch.add(pyglet.gl.GL_LINES, vertices, with_alpha(color, len(vertices) // 2))
 
 
 def draw_sine_wave(start_coordinates, end_coordinates,
                    amplitude=DEFAULT_SINE_WAVE_AMPLITUDE,
                    frequency=DEFAULT_SINE_WAVE_FREQUENCY,
-                   color=CONNECTION_COLOR):
+                   color=CONNECTION_COLOR,
+                   owner=None):
     """
-
+    Draws a sine wave from one point towards another. If it has an owner, its vertices are kept in the
+    `sine_wave_cache`, so they are only calculated again when one of its ends moves.
     :param start_coordinates:
     :param end_coordinates:
     :param amplitude:
     :param frequency:
     :param color:
+    :param owner: the object the wave belongs to (a connection, for example), or None to not cache it.
     :return:
     """
-    vertices = list(chain(*sine_wave_coordinates(start_coordinates, end_coordinates,
-                                                 amplitude, frequency)))
-    length = len(vertices) // 2
-    pyglet.graphics.draw(
-        length,
-        pyglet.gl.GL_LINE_STRIP,
-        ('v2f', tuple(vertices)),
-        ('c3B', color * length),
-    )
+    if owner is None:
+        vertices = get_sine_wave_vertices(start_coordinates, end_coordinates, amplitude, frequency)
+    else:
+        vertices = sine_wave_cache.get_vertices(owner, start_coordinates, end_coordinates, amplitude, frequency)
+    if vertices:
+        shape_batch.add(pyglet.gl.GL_LINES, vertices, with_alpha(color, len(vertices) // 2))
@@ -0,0 +1,209 @@
+from math import floor
+
+from consts import *
+
+
+class SpatialHash:
+    """
+    A uniform grid that indexes graphics objects by their bounding boxes, so the objects in some area of the screen
+    can be found without going over all of them. (for example the objects under the mouse when it is pressed)
+
+    Every object is kept in each cell of the grid that its bounding box touches.
+    Objects that return None from `get_bounding_box` cannot be placed in cells, they are candidates of every point query.
+
+    The index is updated lazily: when an indexed object moves (its `x` or `y` are set), it is only marked as moved.
+    The cells of all of the moved objects are updated once, on the next query.
+
+    Objects that index themselves in a better way (for example the balls in their `BallWorld`) are not kept in the cells.
+    Their index is added as a sub-index instead, and every query is passed on to it as well.
+    """
+    def __init__(self, cell_size=SPATIAL_HASH_CELL_SIZE):
+        """
+        Initiates an empty spatial hash.
+        :param cell_size: the width and height of each cell of the grid (in pixels)
+        """
+        self.cell_size = cell_size
+
+        self.cells = {}
+        # ^ maps (cell_x, cell_y) to a set of the objects whose bounding boxes touch that cell.
+        self.cell_ranges = {}
+        # ^ maps each object that is in cells to the range of cells it is in (min_cell_x, min_cell_y, max_cell_x, max_cell_y)
+        self.unbounded_objects = set()
+        # ^ indexed objects that have no bounding box.
+        self.moved_objects = {}
+        # ^ objects that were inserted or moved since the last query (the keys), their cells are not up to date.
+        self.sub_indices = []
+        # ^ other indices with `query_point`, `query_rect` and `query_radius` methods whose results are added to ours.
+
+    def insert(self, graphics_object):
+        """
+        Inserts a graphics object to the index. It is placed in its cells on the next query.
+        :param graphics_object: a `GraphicsObject`
+        :return: None
+        """
+        graphics_object.spatial_hash = self
+        self.mark_moved(graphics_object)
+
+    def remove(self, graphics_object):
+        """
+        Removes a graphics object from the index. If it is not in the index, does nothing.
+        :param graphics_object: a `GraphicsObject`
+        :return: None
+        """
+        if graphics_object.spatial_hash is self:
+            graphics_object.spatial_hash = None
+            graphics_object.is_spatially_moved = False
+
+        self.moved_objects.pop(graphics_object, None)
+        self.unbounded_objects.discard(graphics_object)
+        self._remove_from_cells(graphics_object)
+
+    def add_sub_index(self, sub_index):
+        """
+        Adds an index that is queried together with this one.
+        :param sub_index: an object with `query_point`, `query_rect` and `query_radius` methods that return sets.
+        :return: None
+        """
+        self.sub_indices.append(sub_index)
+
+    def __contains__(self, graphics_object):
+        return graphics_object.spatial_hash is self
+
+    def mark_moved(self, graphics_object):
+        """
+        Marks that a graphics object moved, so its cells will be updated on the next query.
+        :param graphics_object: a `GraphicsObject` in the index
+        :return: None
+        """
+        graphics_object.is_spatially_moved = True
+        self.moved_objects[graphics_object] = None
+
+    def update(self):
+        """
+        Moves all of the objects that moved since the last update to their new cells.
+        An object only changes cells if the range of cells its bounding box touches changed.
+        :return: None
+        """
+        for graphics_object in self.moved_objects:
+            graphics_object.is_spatially_moved = False
+
+            bounding_box = graphics_object.get_bounding_box()
+            if bounding_box is None:
+                self._remove_from_cells(graphics_object)
+                self.unbounded_objects.add(graphics_object)
+                continue
+
+            self.unbounded_objects.discard(graphics_object)
+            cell_range = self._get_cell_range(*bounding_box)
+            if self.cell_ranges.get(graphics_object) != cell_range:
+                self._remove_from_cells(graphics_object)
+                self._add_to_cells(graphics_object, cell_range)
+
+        self.moved_objects.clear()
+
+    def _get_cell_range(self, min_x, min_y, max_x, max_y):
+        """
+        Returns the range of cells a rectangle touches.
+        :return: a tuple (min_cell_x, min_cell_y, max_cell_x, max_cell_y)
+        """
+        cell_size = self.cell_size
+        return floor(min_x / cell_size), floor(min_y / cell_size), floor(max_x / cell_size), floor(max_y / cell_size)
+
+    @staticmethod
+    def _iterate_cells(cell_range):
+        """
+        A generator of all of the cells in a range of cells.
+        :param cell_range: a tuple (min_cell_x, min_cell_y, max_cell_x, max_cell_y)
+        :return: yields tuples (cell_x, cell_y)
+        """
+        min_cell_x, min_cell_y, max_cell_x, max_cell_y = cell_range
+        for cell_x in range(min_cell_x, max_cell_x + 1):
+            for cell_y in range(min_cell_y, max_cell_y + 1):
+                yield cell_x, cell_y
+
+    def _add_to_cells(self, graphics_object, cell_range):
+        """
+        Adds an object to all of the cells in a range of cells.
+        :param graphics_object: a `GraphicsObject`
+        :param cell_range: a tuple (min_cell_x, min_cell_y, max_cell_x, max_cell_y)
+        :return: None
+        """
+        self.cell_ranges[graphics_object] = cell_range
+        for cell in self._iterate_cells(cell_range):
+            self.cells.setdefault(cell, set()).add(graphics_object)
+
+    def _remove_from_cells(self, graphics_object):
+        """
+        Removes an object from all of the cells it is in. If it is in no cells, does nothing.
+        :param graphics_object: a `GraphicsObject`
+        :return: None
+        """
+        cell_range = self.cell_ranges.pop(graphics_object, None)
+        if cell_range is None:
+            return
+
+        for cell in self._iterate_cells(cell_range):
+            objects = self.cells[cell]
+            objects.discard(graphics_object)
+            if not objects:
+                del self.cells[cell]
+
+    def query_point(self, x, y):
+        """
+        Returns the objects that might contain a point: the objects whose cells contain it and the unbounded objects.
+        The objects are not tested, that is up to the caller. (`is_mouse_in` for example)
+        :param x:
+        :param y: the coordinates of the point.
+        :return: a set of `GraphicsObject`-s
+        """
+        self.update()
+        cell = floor(x / self.cell_size), floor(y / self.cell_size)
+        found = self.cells.get(cell, set()) | self.unbounded_objects
+        for sub_index in self.sub_indices:
+            found |= sub_index.query_point(x, y)
+        return found
+
+    def query_rect(self, min_x, min_y, max_x, max_y):
+        """
+        Returns the objects whose bounding boxes intersect a given rectangle. (unbounded objects are not returned)
+        :param min_x:
+        :param min_y: the bottom left corner of the rectangle.
+        :param max_x:
+        :param max_y: the top right corner of the rectangle.
+        :return: a set of `GraphicsObject`-s
+        """
+        self.update()
+        found = set()
+        for cell in self._iterate_cells(self._get_cell_range(min_x, min_y, max_x, max_y)):
+            for graphics_object in self.cells.get(cell, ()):
+                if graphics_object in found:
+                    continue
+
+                object_min_x, object_min_y, object_max_x, object_max_y = graphics_object.get_bounding_box()
+                if object_min_x <= max_x and min_x <= object_max_x and object_min_y <= max_y and min_y <= object_max_y:
+                    found.add(graphics_object)
+
+        for sub_index in self.sub_indices:
+            found |= sub_index.query_rect(min_x, min_y, max_x, max_y)
+        return found
+
+    def query_radius(self, x, y, radius):
+        """
+        Returns the objects whose bounding boxes intersect a circle. (unbounded objects are not returned)
+        :param x:
+        :param y: the center of the circle.
+        :param radius: the radius of the circle.
+        :return: a set of `GraphicsObject`-s
+        """
+        self.update()
+        found = set()
+        for cell in self._iterate_cells(self._get_cell_range(x - radius, y - radius, x + radius, y + radius)):
+            for graphics_object in self.cells.get(cell, ()):
+                min_x, min_y, max_x, max_y = graphics_object.get_bounding_box()
+                closest_x, closest_y = min(max(x, min_x), max_x), min(max(y, min_y), max_y)
+                if (closest_x - x) ** 2 + (closest_y - y) ** 2 <= radius ** 2:
+                    found.add(graphics_object)
+
+        for sub_index in self.sub_indices:
+            found |= sub_index.query_radius(x, y, radius)
+        return found
@@ -0,0 +1,55 @@
+import pyglet
+
+from consts import *
+from src.main_loop import MainLoop
+
+
+class SpriteBatch:
+    """
+    Puts the sprites of graphics objects in the `pyglet.graphics.Batch`-es of the `DrawLayers` of the main loop, so all
+    of them are drawn together in a few draw calls (one for every texture in every group) instead of one by one.
+
+    Every sprite is in the batch of the `DrawSegment` of its object, and it moves with the object when the object moves
+    to another segment (see `DrawLayers.add_to_batch`). Inside the batch of a segment, all of the sprites of a
+    `SpriteBatch` are in one `pyglet.graphics.OrderedGroup`, so the groups of the batches never grow in number.
+    Since the images come from the atlases of the `asset_cache`, sprites of the same category share a texture.
+    """
+    def __init__(self, group_order):
+        """
+        Initiates the sprite batch.
+        :param group_order: the order of the group of its sprites in the batches (the groups of the other sprite
+            batches and of the texts are drawn over the groups with smaller orders)
+        """
+        self.group = pyglet.graphics.OrderedGroup(group_order)
+
+        self.sprites = {}
+        # ^ maps every graphics object to the list of its sprites that are in the batch.
+
+    def add(self, graphics_object, sprite):
+        """
+        Adds a sprite of a graphics object to the batch of its segment. The sprite should not be drawn on its own
+        anymore.
+        :param graphics_object: the `GraphicsObject` the sprite belongs to (it should be registered)
+        :param sprite: a `pyglet.sprite.Sprite`
+        :return: None
+        """
+        sprite.group = self.group
+        MainLoop.instance.draw_layers.add_to_batch(graphics_object, sprite)
+        self.sprites.setdefault(graphics_object, []).append(sprite)
+
+    def remove(self, graphics_object):
+        """
+        Removes all of the sprites of a graphics object from the batch. If it has none, does nothing.
+        :param graphics_object: a `GraphicsObject`
+        :return: None
+        """
+        for sprite in self.sprites.pop(graphics_object, []):
+            MainLoop.instance.draw_layers.remove_from_batch(graphics_object, sprite)
+            sprite.batch = None
+
+
+sprite_batch = SpriteBatch(SPRITE_BATCH_ORDER)
+# ^ the batch of the sprites of all of the `ImageGraphics` objects.
+interface_sprite_batch = SpriteBatch(INTERFACE_SPRITE_BATCH_ORDER)
+# ^ the batch of the images of the `ImageButton`-s. Its group is over the group of the `sprite_batch`, so the images are
+# over the rectangles of their buttons and over the sprites of their segment.
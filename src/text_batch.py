@@ -0,0 +1,60 @@
+import pyglet
+
+from consts import *
+from src.main_loop import MainLoop
+
+
+class TextBatch:
+    """
+    Puts the labels of all of the `Text` objects in the `pyglet.graphics.Batch`-es of the `DrawLayers` of the main loop,
+    so all of the text on the screen is drawn together (in one draw call for every batch) instead of label by label.
+
+    Every label is in the batch of the `DrawSegment` of its text, in one `pyglet.graphics.OrderedGroup` that is over the
+    groups of the sprites, so a text is over the shapes and the images of its segment and beneath the segments after it
+    (the texts of a popup window are beneath the windows over it, for example).
+    When a text moves to another segment, its label moves to the batch of that segment (see `DrawLayers.add_to_batch`).
+    A hidden text is not in the batch at all (its label is deleted until it is shown), so hiding costs nothing while
+    drawing.
+    """
+    def __init__(self, group_order=TEXT_BATCH_ORDER):
+        """
+        Initiates the text batch.
+        :param group_order: the order of the group of the labels in the batches.
+        """
+        self.group = pyglet.graphics.OrderedGroup(group_order)
+
+        self.labels = {}
+        # ^ maps every `Text` in the batch to its label.
+
+    def get_batch(self, text):
+        """
+        :param text: a registered `Text` object
+        :return: the `pyglet.graphics.Batch` and the group its label should be created with.
+        """
+        return MainLoop.instance.draw_layers.get_batch(text), self.group
+
+    def add(self, text, label):
+        """
+        Adds the label of a text to the batch (it should be created with the batch and the group of `get_batch`).
+        :param text: a registered `Text` object
+        :param label: its `pyglet.text.DocumentLabel`
+        :return: None
+        """
+        MainLoop.instance.draw_layers.add_to_batch(text, label)
+        self.labels[text] = label
+
+    def remove(self, text):
+        """
+        Removes the label of a text from the batch (it should be deleted). If it is not in the batch, does nothing.
+        :param text: a `Text` object
+        :return: None
+        """
+        label = self.labels.pop(text, None)
+        if label is not None:
+            MainLoop.instance.draw_layers.remove_from_batch(text, label)
+
+    def __contains__(self, text):
+        return text in self.labels
+
+
+text_batch = TextBatch()
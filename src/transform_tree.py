@@ -0,0 +1,120 @@
+class TransformTree:
+    """
+    The hierarchy of the graphics objects that follow other graphics objects (see `GraphicsObject.set_parent_graphics`)
+    The location of a child is always the location of its parent plus its `padding`.
+
+    The locations are updated lazily: when an object in the tree moves (its `x` or `y` are set), it is only marked as
+    moved. Once a frame, in `update`, every moved object pushes its new location to whatever draws it (its sprite or
+    its label, see `GraphicsObject.update_transform`) and moves its children, which are then updated as well, all the
+    way down the tree. That way an object that did not move (like most of the user interface) costs nothing.
+
+    When an object is unregistered, all of its descendants are unregistered as well (see
+    `MainLoop.unregister_graphics_object`).
+    """
+    def __init__(self):
+        """
+        Initiates an empty tree.
+        """
+        self.children = {}
+        # ^ maps every object that has children to a dictionary whose keys are its children (in order)
+        self.moved_objects = {}
+        # ^ objects that were inserted or moved since the last update (the keys), their locations were not pushed yet.
+
+    def insert(self, graphics_object):
+        """
+        Starts updating a graphics object when it moves. It is updated on the next update.
+        :param graphics_object: a registered `GraphicsObject`
+        :return: None
+        """
+        graphics_object.transform_tree = self
+        self.mark_moved(graphics_object)
+
+    def remove(self, graphics_object):
+        """
+        Removes a graphics object from the tree, it stops following its parent and its children stop following it.
+        If it is not in the tree, does nothing.
+        :param graphics_object: a `GraphicsObject`
+        :return: None
+        """
+        if graphics_object.transform_tree is self:
+            graphics_object.transform_tree = None
+            graphics_object.is_transform_moved = False
+
+        self.moved_objects.pop(graphics_object, None)
+        self._detach(graphics_object)
+        for child in self.children.pop(graphics_object, ()):
+            child.parent_graphics = None
+
+    def __contains__(self, graphics_object):
+        return graphics_object.transform_tree is self
+
+    def set_parent(self, graphics_object, parent, padding=(0, 0)):
+        """
+        Makes a graphics object follow a parent, and moves it to its place next to the parent.
+        If it already follows another parent, it stops following it.
+        :param graphics_object: a `GraphicsObject`
+        :param parent: the `GraphicsObject` to follow
+        :param padding: a tuple (x, y) of the location of the object relative to the location of the parent.
+        :return: None
+        """
+        if graphics_object.parent_graphics is not parent:
+            self._detach(graphics_object)
+            graphics_object.parent_graphics = parent
+            self.children.setdefault(parent, {})[graphics_object] = None
+
+        graphics_object.padding = padding
+        padding_x, padding_y = padding
+        graphics_object.x, graphics_object.y = parent.x + padding_x, parent.y + padding_y
+
+    def _detach(self, graphics_object):
+        """
+        Makes a graphics object stop following its parent. If it has no parent, does nothing.
+        :param graphics_object: a `GraphicsObject`
+        :return: None
+        """
+        parent = graphics_object.parent_graphics
+        if parent is None:
+            return
+
+        graphics_object.parent_graphics = None
+        siblings = self.children.get(parent)
+        if siblings is not None:
+            siblings.pop(graphics_object, None)
+            if not siblings:
+                del self.children[parent]
+
+    def get_children(self, graphics_object):
+        """
+        :param graphics_object: a `GraphicsObject`
+        :return: a tuple of the objects that follow it (in the order they started following it)
+        """
+        return tuple(self.children.get(graphics_object, ()))
+
+    def mark_moved(self, graphics_object):
+        """
+        Marks that a graphics object moved, so it and its children will be updated on the next update.
+        :param graphics_object: a `GraphicsObject` in the tree
+        :return: None
+        """
+        graphics_object.is_transform_moved = True
+        self.moved_objects[graphics_object] = None
+
+    def update(self):
+        """
+        Pushes the locations of all of the objects that moved since the last update, and moves their children.
+        The children are marked as moved when they are moved, so they are updated in the next round, until no object in
+        the tree is left moved.
+        :return: None
+        """
+        children = self.children
+        while self.moved_objects:
+            moved_objects, self.moved_objects = self.moved_objects, {}
+            for graphics_object in moved_objects:
+                graphics_object.is_transform_moved = False
+                graphics_object.update_transform()
+
+                if graphics_object in children:
+                    x, y = graphics_object.x, graphics_object.y
+                    for child in children[graphics_object]:
+                        padding_x, padding_y = child.padding
+                        child.x, child.y = x + padding_x, y + padding_y
@@ -1,9 +1,12 @@
 from collections import namedtuple
 
+import pyglet
+
 from consts import *
 from src.abstracts.graphics_object import GraphicsObject
+from src.main_loop import MainLoop
 from src.main_window import MainWindow
-from src.shape_drawing import draw_rect
+from src.shape_drawing import get_rect_vertices, shape_batch, with_alpha
 from src.user_interface.text_graphics import Text
 
 ChildGraphicsObjects = namedtuple("ChildGraphicsObjects", "text")
@@ -12,7 +15,15 @@ ChildGraphicsObjects = namedtuple("ChildGraphicsObjects", "text")
 class Button(GraphicsObject):
     """
     A class of a button which you can press and assign text and an action to.
+    A hidden button is taken out of the drawing and out of the `SpatialHash` (see `MainLoop.set_hidden`), so it costs
+    nothing while it is hidden.
+
+    The button is lighter while the mouse is on it. Whether it is, is only updated when the mouse moves (see
+    `MainLoop.update_hover`), and the vertices and the colors of its rectangle are only calculated again when the
+    button moves or when the mouse moves on or off it.
     """
+    layer = UI_LAYER
+
     def __init__(self, x, y, action=lambda: None, text=DEFAULT_BUTTON_TEXT, start_hidden=False,
                  width=DEFAULT_BUTTON_WIDTH, height=DEFAULT_BUTTON_HEIGHT, key=None, color=GRAY, text_color=PINK):
         """
@@ -29,7 +40,7 @@ class Button(GraphicsObject):
         super(Button, self).__init__(x, y)
         self.initial_location = x, y
         self.is_button = True
-        self.is_hidden = start_hidden
+        self._is_hidden = False
 
         self.width, self.height = width, height
         self.action = action
@@ -42,22 +53,28 @@ class Button(GraphicsObject):
         )
         self.key = key
 
-        self.parent_graphics = None  # see 'text_graphics.py' for documentation
-        self.padding = None
-
         self.color = color
         self.light_color = tuple(rgb + LIGHT_COLOR_DIFF for rgb in color)
 
-    def set_parent_graphics(self, parent, padding=(0, 0)):
+        self.is_hovered = False  # whether or not the mouse is on the button now.
+        self.rect_vertices = None
+        self.rect_colors = None
+        # ^ the vertices and the colors the rectangle of the button is drawn with, None until they are calculated again.
+
+        self.is_hidden = start_hidden
+
+    @property
+    def is_hidden(self):
+        return self._is_hidden
+
+    @is_hidden.setter
+    def is_hidden(self, is_hidden):
         """
-        Sets the parent graphics object of the button
-        :param parent: a `GraphicsObject` to follow
-        :param padding: a tuple of integers
-        :return: None
+        Hides or shows the button (not its text).
         """
-        self.parent_graphics = parent
-        self.padding = padding
-        self.move()
+        if is_hidden != self._is_hidden:
+            self._is_hidden = is_hidden
+            MainLoop.instance.set_hidden(self, is_hidden)
 
     def is_mouse_in(self):
         """Returns whether or not the mouse is located inside of the button."""
@@ -65,6 +82,10 @@ class Button(GraphicsObject):
         return (self.x < mouse_x < self.x + self.width) and \
                (self.y < mouse_y < self.y + self.height)
 
+    def get_bounding_box(self):
+        """Returns the rectangle of the button (min_x, min_y, max_x, max_y)"""
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
     def toggle_showing(self):
         """
         Hides the button when it is not in use (when it is not supposed to be pressed)
@@ -87,21 +108,40 @@ class Button(GraphicsObject):
         self.is_hidden = False
         self.child_graphics_objects.text.show()
 
-    def draw(self):
+    def on_hover_enter(self):
+        """
+        Lights the button up while the mouse is on it.
+        :return: None
         """
-        Draws the button (If it is not hidden).
+        self.is_hovered = True
+        self.rect_colors = None
+
+    def on_hover_leave(self):
+        """
+        Gives the button its color back when the mouse leaves it.
         :return: None
         """
-        if not self.is_hidden:
-            draw_rect(self.x, self.y, self.width, self.height, (self.light_color if self.is_mouse_in() else self.color))
+        self.is_hovered = False
+        self.rect_colors = None
 
-    def move(self):
+    def update_transform(self):
         """
-        Moves the button according to its parent graphics (if it has any)
+        The rectangle of the button is calculated again in the next draw.
         :return: None
         """
-        if self.parent_graphics is not None:
-            self.x, self.y = map(sum, zip(self.parent_graphics.location, self.padding))
+        self.rect_vertices = None
+
+    def draw(self):
+        """
+        Draws the button. (It is not called while the button is hidden)
+        :return: None
+        """
+        if self.rect_vertices is None:
+            self.rect_vertices = get_rect_vertices(self.x, self.y, self.width, self.height)
+        if self.rect_colors is None:
+            self.rect_colors = with_alpha(self.light_color if self.is_hovered else self.color, 4)
+
+        shape_batch.add(pyglet.gl.GL_QUADS, self.rect_vertices, self.rect_colors)
 
     def __str__(self):
         state = "HIDDEN" if self.is_hidden else "SHOWING"
@@ -0,0 +1,67 @@
+from bisect import insort
+from itertools import count
+
+
+class HotkeyIndex:
+    """
+    Maps every key (with its modifiers) to what should be done when it is pressed, so a key press is one lookup.
+
+    Every key has a stack of the shown buttons whose key it is, ordered by the priority of their group (the
+    `buttons_id` they have in `UserInterface.buttons`, the lowest first) and then by the order they were added in.
+    The top button of the stack is the one that is pressed. If the key has no buttons, its action (from the actions the
+    index was created with) is performed.
+
+    The stacks are updated whenever a group of buttons is added, removed, shown or hidden (see `add` and `remove`), so
+    a hidden button never takes a key press.
+    """
+    def __init__(self, key_to_action):
+        """
+        Initiates an index without buttons.
+        :param key_to_action: a dictionary from (symbol, modifiers) to the action to perform when no button has the key.
+        """
+        self.key_to_action = key_to_action
+        self.stacks = {}
+        # ^ maps every (symbol, modifiers) to a list of (group priority, order, button), sorted.
+        self.entries = {}
+        # ^ maps every button in the index to its entry in its stack.
+        self._order = count()
+
+    def add(self, buttons, priority):
+        """
+        Adds a group of buttons to the index. Buttons without a key and buttons that are already in it are skipped.
+        :param buttons: an iterable of `Button`-s
+        :param priority: the priority of their group (lower is stronger)
+        :return: None
+        """
+        for button in buttons:
+            if button.key is None or button in self.entries:
+                continue
+
+            entry = self.entries[button] = priority, next(self._order), button
+            insort(self.stacks.setdefault(button.key, []), entry)
+
+    def remove(self, buttons):
+        """
+        Removes buttons from the index. Buttons that are not in it are skipped.
+        :param buttons: an iterable of `Button`-s
+        :return: None
+        """
+        for button in buttons:
+            entry = self.entries.pop(button, None)
+            if entry is None:
+                continue
+
+            stack = self.stacks[button.key]
+            stack.remove(entry)
+            if not stack:
+                del self.stacks[button.key]
+
+    def get_action(self, modified_key):
+        """
+        :param modified_key: a tuple (symbol, modifiers) where the modifiers are masked with `MODIFIERS_MASK`
+        :return: the action to perform when that key is pressed, or None if there is nothing to do.
+        """
+        stack = self.stacks.get(modified_key)
+        if stack:
+            return stack[0][-1].action
+        return self.key_to_action.get(modified_key)
@@ -1,5 +1,6 @@
 from consts import *
 from src.abstracts.image_graphics import ImageGraphics
+from src.sprite_batch import interface_sprite_batch
 from src.user_interface.button import Button
 
 if True:
@@ -8,8 +9,10 @@ if True:
 
 class ImageButton(Button):
     """
-    This is a button with an image inside
+    This is a button with an image inside.
+    The image is drawn through the `interface_sprite_batch`, at the end of the draw segment of the button.
     """
+    image_sprite = None
     def __init__(self, x, y, action=lambda: None, image_name=None, text="",
                  start_hidden=False,
                  width=IMAGES_SIZE, height=IMAGES_SIZE,
@@ -36,21 +39,31 @@ class ImageButton(Button):
         scale_x = ((self.width - 2 * self.pad_x) / self.image_sprite.width) * scale_x
         scale_y = ((self.height - 2 * self.pad_y) / self.image_sprite.height) * scale_y
         self.image_sprite.update(scale_x=scale_x, scale_y=scale_y)
+        self.image_sprite.visible = not self.is_hidden
+        interface_sprite_batch.add(self, self.image_sprite)
 
-        self.child_graphics_objects.text.y_padding = self.height
+        self.child_graphics_objects.text.set_parent_graphics(self, (self.width / 2, self.height))
 
-    def draw(self):
+    @Button.is_hidden.setter
+    def is_hidden(self, is_hidden):
         """
-        Draws the button and the image
+        Hides or shows the image together with the button.
+        """
+        Button.is_hidden.fset(self, is_hidden)
+        if self.image_sprite is not None:
+            self.image_sprite.visible = not is_hidden
+
+    def unload(self):
+        """
+        Removes the image of the button from the `interface_sprite_batch`.
         :return: None
         """
-        super(ImageButton, self).draw()
-        self.image_sprite.draw()
+        interface_sprite_batch.remove(self)
 
-    def move(self):
+    def update_transform(self):
         """
-        Moves the button along side the image
+        Moves the image along side the button
         :return: None
         """
-        super(ImageButton, self).move()
+        super(ImageButton, self).update_transform()
         self.image_sprite.update(self.x + self.pad_x / 2, self.y + self.pad_y / 2)
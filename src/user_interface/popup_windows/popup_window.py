@@ -4,7 +4,7 @@ from consts import *
 from src.abstracts.graphics_object import GraphicsObject
 from src.main_loop import MainLoop
 from src.main_window import MainWindow
-from src.shape_drawing import draw_rect, draw_rect_with_outline
+from src.retained_shapes import OutlinedRect, Rect
 from src.user_interface.button import Button
 from src.user_interface.text_graphics import Text
 from usefuls import with_args
@@ -14,7 +14,12 @@ class PopupWindow(GraphicsObject):
     """
     A window that pops up sometime.
     It can contain buttons, text and maybe images?
+    All of it is drawn in the popup layer, over the rest of the user interface.
+    Every window starts a draw segment of its own (see `DrawLayers`), so it covers the windows beneath it.
     """
+    layer = POPUP_LAYER
+    starts_draw_segment = True
+
     def __init__(self, x, y, text, user_interface, buttons,
                  width=TEXTBOX_WIDTH, height=TEXTBOX_HEIGHT, color=TEXTBOX_OUTLINE_COLOR, title="window!"):
         """
@@ -29,6 +34,12 @@ class PopupWindow(GraphicsObject):
         self.__is_active = False
         self.outline_color = color
 
+        self.frame = OutlinedRect(self.x, self.y, self.width, self.height, TEXTBOX_COLOR, self.outline_color,
+                                  self.outline_width)
+        self.upper_part = Rect(*self.upper_part_location, self.width + TEXTBOX_OUTLINE_WIDTH,
+                               TEXTBOX_UPPER_PART_HEIGHT, self.outline_color)
+        # ^ the rectangles of the window, they are only written again when the window moves or (de)activates
+
         title_text = Text(title, self.x, self.y, self, ((self.width / 2) + 2, self.height + 22),
                           color=BLACK, align='left', max_width=self.width)
         information_text = Text(text, self.x, self.y, self, ((self.width / 2), 6 * (self.height / 7)))
@@ -59,6 +70,16 @@ class PopupWindow(GraphicsObject):
             *buttons,
         ]
 
+    @property
+    def outline_width(self):
+        return TEXTBOX_OUTLINE_WIDTH - (0 if self.__is_active else 2)
+        # TODO: make self.outline_width a thing instead of the const
+
+    @property
+    def upper_part_location(self):
+        """The bottom left corner of the upper part of the window (where it can be moved)"""
+        return self.x - (TEXTBOX_OUTLINE_WIDTH / 2), self.y + self.height
+
     def is_mouse_in(self):
         """
         Returns whether or not the mouse is pressing the upper part of the window (where it can be moved)
@@ -68,6 +89,13 @@ class PopupWindow(GraphicsObject):
         return self.x < x < self.x + self.width and \
             self.y < y < self.y + TEXTBOX_HEIGHT + TEXTBOX_UPPER_PART_HEIGHT
 
+    def get_bounding_box(self):
+        """
+        Returns the rectangle of the window, including its upper part.
+        :return: a tuple (min_x, min_y, max_x, max_y)
+        """
+        return self.x, self.y, self.x + self.width, self.y + TEXTBOX_HEIGHT + TEXTBOX_UPPER_PART_HEIGHT
+
     def mark_as_selected(self):
         """
         required for the API
@@ -90,15 +118,20 @@ class PopupWindow(GraphicsObject):
         Basically a rectangle.
         :return: None
         """
-        draw_rect_with_outline(self.x, self.y,
-                               self.width, self.height,
-                               TEXTBOX_COLOR, self.outline_color,
-                               TEXTBOX_OUTLINE_WIDTH - (0 if self.__is_active else 2))
-        # TODO: make self.outline_width a thing instead of the const
+        self.frame.location = self.location
+        self.frame.outline_width = self.outline_width
+        self.frame.draw()
+
+        self.upper_part.location = self.upper_part_location
+        self.upper_part.draw()
 
-        draw_rect(self.x - (TEXTBOX_OUTLINE_WIDTH / 2), self.y + self.height,
-                  self.width + TEXTBOX_OUTLINE_WIDTH, TEXTBOX_UPPER_PART_HEIGHT,
-                  self.outline_color)
+    def unload(self):
+        """
+        Deletes the rectangles of the window.
+        :return: None
+        """
+        self.frame.delete()
+        self.upper_part.delete()
 
     def activate(self):
         """
@@ -1,7 +1,65 @@
+from collections import OrderedDict
+
 import pyglet
 
 from consts import *
 from src.abstracts.graphics_object import GraphicsObject
+from src.text_batch import text_batch
+
+
+class TextDocumentCache:
+    """
+    Keeps the pyglet documents of the strings that were displayed recently, so texts with the same string, font, color
+    and alignment share one document instead of decoding and styling it again.
+
+    The documents are never changed after they are created (a `Text` that changes its string switches to another
+    document), so it is safe for many labels to display the same document.
+    Only the last `max_size` documents that were asked for are kept.
+    """
+    def __init__(self, max_size=TEXT_DOCUMENT_CACHE_SIZE):
+        """
+        Initiates an empty cache.
+        :param max_size: the maximum amount of documents that are kept.
+        """
+        self.max_size = max_size
+        self.documents = OrderedDict()
+        # ^ maps (text, font_name, font_size, color, align) to a `pyglet.text.document.UnformattedDocument`
+        self.hit_count = 0
+        self.miss_count = 0
+
+    def get_document(self, text, font_size, color, align, font_name=DEFAULT_FONT):
+        """
+        Returns a styled document of a string, creates it if it is not in the cache.
+        :param text: the string
+        :param font_size: the size of the font
+        :param color: an RGBA tuple
+        :param align: 'left', 'center' or 'right'
+        :param font_name: the name of the font
+        :return: a `pyglet.text.document.UnformattedDocument`
+        """
+        key = text, font_name, font_size, color, align
+        document = self.documents.get(key)
+        if document is not None:
+            self.hit_count += 1
+            self.documents.move_to_end(key)
+            return document
+
+        self.miss_count += 1
+        document = pyglet.text.document.UnformattedDocument(text)
+        document.set_style(0, len(text), {
+            'font_name': font_name,
+            'font_size': font_size,
+            'color': color,
+            'align': align,
+        })
+
+        self.documents[key] = document
+        if len(self.documents) > self.max_size:
+            self.documents.popitem(last=False)
+        return document
+
+
+text_document_cache = TextDocumentCache()
 
 
 class Text(GraphicsObject):
@@ -11,7 +69,16 @@ class Text(GraphicsObject):
     The text that is drawn on the screen is kept because if it is created each
     time the screen is updated (like it was before) the program crashes and says it is out of memory.
     Apparently pyglet is having a lot of trouble drawing text.
+
+    For the same reason the label is created only once: `set_text` only gives it another document (from the
+    `text_document_cache`), and the label is deleted when the text is unregistered.
+
+    All of the labels are drawn together through the `text_batch`, at the end of their draw segments (see `DrawLayers`).
+    A text is in the layer of its parent, or in the user interface layer if it has none.
     """
+    layer = UI_LAYER
+    has_draw = False
+
     def __init__(self, text, x, y,
                  parent_graphics=None,
                  padding=(0, DEFAULT_TEXT_Y_PADDING),
@@ -40,52 +107,116 @@ class Text(GraphicsObject):
         :param font_size: THE FONT SIZE!!!!!!!!!!!!!!!
         :param color: the text color- defaults to white.
         """
+        if parent_graphics is not None:
+            self.layer = parent_graphics.layer
         super(Text, self).__init__(x, y, centered=True)
-        self._text = text
-        self.parent_graphics = parent_graphics
-        self.x_padding, self.y_padding = padding
+        self._text = None  # set by `set_text`
+        self.padding = padding
         self.is_button = is_button  # whether or not it is on a text on a button
-        self.is_hidden = start_hidden
+        self._is_hidden = start_hidden
         self.max_width = max_width
         self.font_size = font_size
         self.align = align
         self.color = color
 
         self.label = None
+        if parent_graphics is not None:
+            self.set_parent_graphics(parent_graphics, padding)
         self.set_text(text)
 
     @property
     def text(self):
         return self._text
 
+    @property
+    def is_hidden(self):
+        return self._is_hidden
+
+    @is_hidden.setter
+    def is_hidden(self, is_hidden):
+        """
+        Hides or shows the text. A hidden text has no label at all (an invisible pyglet label is laid out again into its
+        batch whenever its document, position or batch are set), so it is not drawn and it costs nothing.
+        When it is shown, its label is created with its current string, location and draw segment.
+        """
+        if is_hidden == self._is_hidden:
+            return
+
+        self._is_hidden = is_hidden
+        if is_hidden:
+            self.delete_label()
+        else:
+            self.create_label()
+
+    def create_label(self):
+        """
+        Creates the label of the text in the `text_batch` (deletes the old one if there is one).
+        It is called when the text is created (unless it starts hidden) and whenever it is shown.
+        :return: None
+        """
+        self.delete_label()
+
+        batch, group = text_batch.get_batch(self)
+        self.label = pyglet.text.DocumentLabel(
+            text_document_cache.get_document(self._text, self.font_size, self.color + (255,), self.align),
+            x=self.x, y=self.y,
+            width=self.max_width,
+            multiline=True,
+            anchor_x='center', anchor_y='top',
+            batch=batch, group=group,
+        )
+        text_batch.add(self, self.label)
+
+    def delete_label(self):
+        """
+        Takes the label of the text out of the `text_batch` and deletes it (and its vertex lists), if it has one.
+        :return: None
+        """
+        if self.label is not None:
+            text_batch.remove(self)
+            self.label.delete()
+            self.label = None
+
     def set_text(self, text):
         """
         The correct way to update the text of a `Text` object.
         updates the text and corrects the lines and everything necessary.
+        The label is reused, it is only laid out again with the document of the new text.
         :param text: a string which is the new text.
         :return: None
         """
+        if text == self._text:
+            return
+
         self._text = text
-        self.label = pyglet.text.Label(self._text,
-                                       font_name=DEFAULT_FONT,
-                                       font_size=self.font_size,
-                                       x=self.x + self.x_padding, y=(self.y + self.y_padding),
-                                       color=self.color + (255,),
-                                       anchor_x='center', anchor_y='top',
-                                       align=self.align)
-
-        self.label.width = self.max_width
-        self.label.multiline = True
-        self.x, self.y = self.label.x, self.label.y
-        self.move()
+        if self.parent_graphics is None:
+            padding_x, padding_y = self.padding
+            self.x, self.y = self.x + padding_x, self.y + padding_y
+
+        if self._is_hidden:
+            return  # the label is created with the new text when the text is shown
+        if self.label is None:
+            self.create_label()
+        else:
+            self.label.begin_update()
+            self.label.document = text_document_cache.get_document(text, self.font_size, self.color + (255,),
+                                                                   self.align)
+            self.label.position = self.x, self.y
+            self.label.end_update()
+
+    def unload(self):
+        """
+        Deletes the label of the text (and its vertex lists).
+        :return: None
+        """
+        self.delete_label()
 
     def draw(self):
         """
-        Draws the text to the screen
+        The label is drawn by the `text_batch` at the end of its draw segment, there is nothing to draw here.
         :return: None
         """
-        if not self.is_hidden:
-            self.label.draw()
+        pass
 
     def show(self):
         """
@@ -101,16 +232,13 @@ class Text(GraphicsObject):
         """
         self.is_hidden = True
 
-    def move(self):
+    def update_transform(self):
         """
-        Moves the text according to the parent object's location.
+        Moves the label to the location of the text (after the text or its parent moved).
         :return: None
         """
-        if self.parent_graphics is None:
-            self.label.x, self.label.y = self.x, self.y
-            return
-        self.x, self.y = self.parent_graphics.x + self.x_padding, (self.parent_graphics.y + self.y_padding)
-        self.label.x, self.label.y = self.x, self.y
+        if self.label is not None and self.label.position != (self.x, self.y):  # moving a label goes over all of its vertices
+            self.label.position = self.x, self.y
 
     def __str__(self):
         return f"Text Graphics: '{self.text}'"
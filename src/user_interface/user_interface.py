@@ -1,6 +1,5 @@
+import time
 from collections import namedtuple
-from functools import reduce
-from operator import concat
 
 from pyglet.window import key
 
@@ -8,8 +7,10 @@ from consts import *
 from exceptions import *
 from src.main_loop import MainLoop
 from src.main_window import MainWindow
-from src.shape_drawing import draw_pause_rectangles, draw_rect
+from src.retained_shapes import Rect
+from src.shape_drawing import flush_shape_batch
 from src.user_interface.button import Button
+from src.user_interface.hotkey_index import HotkeyIndex
 from src.user_interface.popup_windows.popup_error import PopupError
 from src.user_interface.popup_windows.popup_text_box import PopupTextBox
 from src.user_interface.popup_windows.popup_window import PopupWindow
@@ -58,6 +59,8 @@ class UserInterface:
         """
         Initiates the UserInterface class!
         `key_to_action` is a dictionary from keys and their modifiers to actions to perform when that key is pressed.
+        `hotkeys` is a `HotkeyIndex` of those actions and the keys of all of the shown buttons.
+        `repeating_keys` are the keys whose action is repeated while they are held.
         `button_arguments` is a list of arguments for `Button` objects that will be created after
         the `MainWindow` is initiated.
 
@@ -71,7 +74,13 @@ class UserInterface:
             (key.ESCAPE, NO_MODIFIER): with_args(self.set_mode, SIMULATION_MODE),
             (key.N, NO_MODIFIER): self.create_ball,
             (key.T, NO_MODIFIER): self.toggle_screen_clearing,
+            (key.P, CTRL_MODIFIER): self.toggle_profiling,
+            (key.B, CTRL_MODIFIER): self.toggle_shape_batching,
         }
+        self.hotkeys = HotkeyIndex(self.key_to_action)
+        self.repeating_keys = {(key.N, NO_MODIFIER)}
+        self.held_key = None  # the repeating key that is held now, if any.
+        self.next_repeat_time = None  # the time the action of the held key is repeated next.
 
         self.action_at_press_by_mode = {
             SIMULATION_MODE: self.view_mode_at_press,
@@ -108,6 +117,13 @@ class UserInterface:
 
         self.balls = []
 
+        self.side_window_rect = None
+        self.pause_rects = None
+        # ^ the `Rect`-s of the side window and of the pause sign, created when they are first shown (they need a GL
+        # context, which the user interface is created before)
+
+        self.profiler_report = None  # the report of the last time the main loop was profiled (see `toggle_profiling`)
+
     @property
     def active_window(self):
         return self.__active_window
@@ -121,6 +137,9 @@ class UserInterface:
             window.activate()
         self.__active_window = window
 
+        if isinstance(window, PopupTextBox):
+            self.stop_key_repeat()  # the keys are typed into the text box now, they are not actions
+
     @property
     def selected_object(self):
         return self.__selected_object
@@ -137,12 +156,22 @@ class UserInterface:
     def show(self):
         """
         This is like the `draw` method of GraphicObject`s.
+        It is drawn at the bottom of the user interface layer (see `MainLoop.draw_layers`), beneath the buttons.
         :return: None
         """
-        draw_rect(WINDOW_WIDTH - self.WIDTH, 0, self.WIDTH, WINDOW_HEIGHT, MODES_TO_COLORS[self.mode])
+        if self.side_window_rect is None:
+            self.side_window_rect = Rect(WINDOW_WIDTH - self.WIDTH, 0, self.WIDTH, WINDOW_HEIGHT)
+        self.side_window_rect.color = MODES_TO_COLORS[self.mode]
+        self.side_window_rect.draw()
         # ^ the window rectangle itself
+
         if MainLoop.instance.is_paused:
-            draw_pause_rectangles()
+            if self.pause_rects is None:
+                x, y = PAUSE_RECT_COORDINATES
+                self.pause_rects = [Rect(x, y, PAUSE_RECT_WIDTH, PAUSE_RECT_HEIGHT, RED),
+                                    Rect(x + 2 * PAUSE_RECT_WIDTH, y, PAUSE_RECT_WIDTH, PAUSE_RECT_HEIGHT, RED)]
+            for rect in self.pause_rects:
+                rect.draw()
 
     def drag_object(self):
         """
@@ -171,7 +200,7 @@ class UserInterface:
         sprite, text, buttons_id = graphics_object.start_viewing(self)
         if sprite is not None:
             sprite.update(*VIEWING_IMAGE_COORDINATES)
-            MainLoop.instance.insert_to_loop(sprite.draw)
+            MainLoop.instance.draw_layers.add(self.draw_object_view_sprite, UI_LAYER, self.draw_object_view_sprite)
 
         x, y = VIEWING_TEXT_COORDINATES
         self.object_view = ObjectView(sprite, Text(text, x, y, max_width=SIDE_WINDOW_WIDTH), graphics_object)
@@ -179,6 +208,14 @@ class UserInterface:
         if buttons_id is not None:
             self.adjust_viewed_text_to_buttons(buttons_id + 1)
 
+    def draw_object_view_sprite(self):
+        """
+        Draws the sprite of the viewed object in the side window (over the shapes that were drawn before it)
+        :return: None
+        """
+        flush_shape_batch()
+        self.object_view.sprite.draw()
+
     def adjust_viewed_text_to_buttons(self, buttons_id):
         """
         This is called when the buttons of the viewed object are changed.
@@ -203,7 +240,7 @@ class UserInterface:
             self.object_view.viewed_object.end_viewing(self)
             MainLoop.instance.unregister_graphics_object(self.object_view.text)
             if self.object_view.sprite is not None:
-                MainLoop.instance.remove_from_loop(self.object_view.sprite.draw)
+                MainLoop.instance.draw_layers.remove(self.draw_object_view_sprite)
 
             self.object_view = None
             self.scrolled_view = None
@@ -261,6 +298,7 @@ class UserInterface:
         :return: None
         """
         self.buttons[MAIN_BUTTONS_ID] = [Button(*args, **kwargs) for args, kwargs in self.button_arguments]
+        self.hotkeys.add(self.buttons[MAIN_BUTTONS_ID], MAIN_BUTTONS_ID)
 
     def set_mode(self, new_mode):
         """
@@ -314,18 +352,20 @@ class UserInterface:
         Happens when the mouse is pressed.
         Decides what to do according to the mode we are now in.
         The choosing of a selected and dragged objects should be performed BEFORE this is called!
+        Only the visible buttons under the mouse are tested (see `MainLoop.get_button_the_mouse_is_on`).
         :return: None
         """
-        for button in reversed(reduce(concat, list(self.buttons.values()))):
-            if not button.is_hidden and button.is_mouse_in():
-                button.action()
-                break
+        button = MainLoop.instance.get_button_the_mouse_is_on()
+        if button is not None:
+            button.action()
         else:
             self.action_at_press_by_mode[self.mode]()
 
     def on_key_pressed(self, symbol, modifiers):
         """
         Called when a key is pressed
+        The action of the key is found in `self.hotkeys` (a shown button with that key, or the action of the key).
+        If it is one of the `self.repeating_keys`, the action is repeated while the key is held.
         :param symbol:
         :param modifiers:
         :return:
@@ -333,13 +373,62 @@ class UserInterface:
         if isinstance(self.active_window, PopupTextBox):
             self.active_window.pressed(symbol, modifiers)
         else:
-            modified_key = (symbol, int(bin(modifiers)[2:][-4:], base=2))
-            for button_id in sorted(list(self.buttons)):
-                for button in self.buttons[button_id]:
-                    if button.key == modified_key:
-                        button.action()
-                        return
-            self.key_to_action.get(modified_key, lambda: None)()
+            modified_key = symbol, modifiers & MODIFIERS_MASK
+            action = self.hotkeys.get_action(modified_key)
+            if action is not None:
+                action()
+
+            if modified_key in self.repeating_keys:
+                self.start_key_repeat(modified_key)
+
+    def on_key_released(self, symbol, modifiers):
+        """
+        Called when a key is released. If it was the held repeating key, its action stops repeating.
+        :param symbol:
+        :param modifiers:
+        :return: None
+        """
+        if self.held_key is not None and self.held_key[0] == symbol:
+            self.stop_key_repeat()
+
+    def start_key_repeat(self, modified_key):
+        """
+        Starts repeating the action of a held key (after `KEY_REPEAT_DELAY` seconds).
+        The repeating is only in the main loop while a key is held.
+        :param modified_key: a tuple (symbol, modifiers)
+        :return: None
+        """
+        if self.held_key is None:
+            MainLoop.instance.insert_to_loop(self.repeat_held_key)
+        self.held_key = modified_key
+        self.next_repeat_time = time.time() + KEY_REPEAT_DELAY
+
+    def stop_key_repeat(self):
+        """
+        Stops repeating the action of the held key. If no key is held, does nothing.
+        :return: None
+        """
+        if self.held_key is None:
+            return
+
+        MainLoop.instance.remove_from_loop(self.repeat_held_key)
+        self.held_key = None
+        self.next_repeat_time = None
+
+    def repeat_held_key(self):
+        """
+        Performs the action of the held key again (through `self.hotkeys`) if it is time to.
+        This is called every tick while a repeating key is held.
+        :return: None
+        """
+        now = time.time()
+        if now < self.next_repeat_time:
+            return
+
+        self.next_repeat_time = now + KEY_REPEAT_INTERVAL
+        action = self.hotkeys.get_action(self.held_key)
+        if action is not None:
+            action()
 
     def view_mode_at_press(self):
         """
@@ -403,9 +492,11 @@ class UserInterface:
         if buttons_id is None:
             for other_buttons_id in self.buttons:
                 self.hide_buttons(other_buttons_id)
+            return
 
         for button in self.buttons[buttons_id]:
             button.hide()
+        self.hotkeys.remove(self.buttons[buttons_id])
 
     def show_buttons(self, buttons_id):
         """
@@ -415,6 +506,7 @@ class UserInterface:
         """
         for button in self.buttons[buttons_id]:
             button.show()
+        self.hotkeys.add(self.buttons[buttons_id], buttons_id)
         self.showing_buttons_id = buttons_id
 
     def end_string_request(self):
@@ -525,6 +617,7 @@ class UserInterface:
                 key=(key.ENTER, NO_MODIFIER),
             ),
         ]
+        self.hotkeys.add(self.buttons[buttons_id + 1], buttons_id + 1)
         self.showing_buttons_id = buttons_id + 1
         return buttons_id
 
@@ -536,6 +629,7 @@ class UserInterface:
         """
         for button in self.buttons[buttons_id] + self.buttons[buttons_id + 1]:
             MainLoop.instance.unregister_graphics_object(button)
+        self.hotkeys.remove(self.buttons[buttons_id] + self.buttons[buttons_id + 1])
         del self.buttons[buttons_id]
         del self.buttons[buttons_id + 1]
 
@@ -555,14 +649,16 @@ class UserInterface:
         self.active_window = window
         self.selected_object = window
         self.buttons[WINDOW_BUTTONS_ID] = self.buttons.get(WINDOW_BUTTONS_ID, []) + list(buttons)
+        self.hotkeys.add(buttons, WINDOW_BUTTONS_ID)
 
         for button in buttons:
-            MainLoop.instance.move_to_front(button)
+            MainLoop.instance.move_to_front(button, POPUP_LAYER)
 
         def remove_buttons():
             for button in buttons:
                 self.buttons[WINDOW_BUTTONS_ID].remove(button)
                 MainLoop.instance.unregister_graphics_object(button)
+            self.hotkeys.remove(buttons)
         window.remove_buttons = remove_buttons
 
     def unregister_window(self, window):
@@ -586,3 +682,25 @@ class UserInterface:
 
     def toggle_screen_clearing(self):
         MainLoop.instance.is_clearing_screen = not MainLoop.instance.is_clearing_screen
+
+    def toggle_profiling(self):
+        """
+        Starts profiling the main loop, or if it is already profiled, stops and keeps the report of the times of all of
+        its parts in `self.profiler_report`.
+        :return: the report (see `FrameProfiler.report`), or None if the profiling just started.
+        """
+        if MainLoop.instance.profiler is None:
+            MainLoop.instance.start_profiling()
+            return None
+
+        self.profiler_report = MainLoop.instance.stop_profiling().report()
+        return self.profiler_report
+
+    @staticmethod
+    def toggle_shape_batching():
+        """
+        Toggles between drawing the shapes of a frame together and one by one.
+        The amount of draw calls the shapes of the last frame took is in `shape_batch.last_frame_draw_call_count`.
+        :return: None
+        """
+        MainLoop.instance.toggle_shape_batching()
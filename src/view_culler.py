@@ -0,0 +1,207 @@
+from consts import *
+
+
+class ViewCuller:
+    """
+    Keeps the objects that are off the screen out of the draw calls of the main loop.
+
+    The bounding box of every culled object (`GraphicsObject.get_bounding_box`) is cached, and is only calculated again
+    when the object moves (when its `x` or `y` are set, just like in the `SpatialHash`). Once a frame, in `update`, only
+    the objects whose bounding boxes changed are tested against the screen. An object that went off the screen is
+    suspended in the `DrawLayers` (so the loop does not even go over its `draw`), and is resumed later.
+    That way a frame costs as much as the objects that are on the screen and the objects that moved, no matter how many
+    objects are off the screen.
+
+    Objects that are farther than `off_screen_margin` from the screen can also be frozen (their `move` is suspended as
+    well until they are moved back, by dragging them for example) or removed altogether, by setting
+    `off_screen_action` to `FREEZE` or `REMOVE` (see `set_off_screen_action`). The rows of the `BallWorld` follow the
+    same setting.
+
+    The objects of the layers beneath the user interface (the world and the background) are tested against
+    `world_view_rect`, since the side window covers the rest of the screen. The objects of the other layers are tested
+    against the whole screen (`view_rect`).
+
+    Objects without a bounding box are never culled.
+    """
+    FREEZE = "freeze"
+    REMOVE = "remove"
+
+    def __init__(self, main_loop, view_rect=SCREEN_RECT, world_view_rect=WORLD_VIEW_RECT):
+        """
+        Initiates the culler.
+        :param main_loop: the `MainLoop` whose draws and calls are suspended and resumed.
+        :param view_rect: the rectangle of the screen (min_x, min_y, max_x, max_y)
+        :param world_view_rect: the rectangle of the screen that the world is seen in (the same)
+        """
+        self.main_loop = main_loop
+        self.scheduler = main_loop.scheduler
+        self.view_rect = view_rect
+        self.world_view_rect = world_view_rect
+
+        self.bounding_boxes = {}
+        # ^ maps every culled object that was tested to its bounding box at the time (or None if it has none)
+        self.moved_objects = {}
+        # ^ objects that were inserted or moved since the last update (the keys), they are tested again on the next one.
+        self.off_screen_objects = set()  # the objects whose `draw` is suspended now.
+        self.frozen_objects = set()  # the objects whose `move` is suspended now.
+
+        self.off_screen_action = None
+        # ^ what is done to objects that are far off the screen: None, `FREEZE` or `REMOVE`.
+        self.off_screen_margin = OFF_SCREEN_MARGIN
+
+    def insert(self, graphics_object):
+        """
+        Starts culling a graphics object. It is tested on the next update.
+        :param graphics_object: a registered `GraphicsObject`
+        :return: None
+        """
+        graphics_object.view_culler = self
+        self.mark_moved(graphics_object)
+
+    def remove(self, graphics_object):
+        """
+        Stops culling a graphics object, if it is culled its calls are resumed. If it is not culled, does nothing.
+        :param graphics_object: a `GraphicsObject`
+        :return: None
+        """
+        if graphics_object.view_culler is self:
+            graphics_object.view_culler = None
+            graphics_object.is_view_moved = False
+
+        self.bounding_boxes.pop(graphics_object, None)
+        self.moved_objects.pop(graphics_object, None)
+        self._set_on_screen(graphics_object, True)
+        self._set_frozen(graphics_object, False)
+
+    def __contains__(self, graphics_object):
+        return graphics_object.view_culler is self
+
+    def mark_moved(self, graphics_object):
+        """
+        Marks that a graphics object moved, so it will be tested again on the next update.
+        :param graphics_object: a `GraphicsObject` that is culled
+        :return: None
+        """
+        graphics_object.is_view_moved = True
+        self.moved_objects[graphics_object] = None
+
+    def retest(self, graphics_object):
+        """
+        Tests a graphics object again on the next update even if it did not move (when its layer changed, for example).
+        :param graphics_object: a `GraphicsObject` that is culled
+        :return: None
+        """
+        self.bounding_boxes.pop(graphics_object, None)
+        self.mark_moved(graphics_object)
+
+    def set_off_screen_action(self, off_screen_action, off_screen_margin=OFF_SCREEN_MARGIN):
+        """
+        Sets what is done to objects that are far off the screen, and tests all of the objects again on the next update.
+        :param off_screen_action: None, `FREEZE` or `REMOVE`
+        :param off_screen_margin: the distance (in pixels) from the screen from which objects are far.
+        :return: None
+        """
+        self.off_screen_action = off_screen_action
+        self.off_screen_margin = off_screen_margin
+
+        for graphics_object in self.bounding_boxes:
+            self.mark_moved(graphics_object)
+        self.bounding_boxes.clear()
+
+    def get_view_rect(self, graphics_object):
+        """
+        :param graphics_object: a culled `GraphicsObject`
+        :return: the rectangle of the screen that the object can be seen in (see `world_view_rect`)
+        """
+        if self.main_loop.draw_layers.get_layer(graphics_object) < UI_LAYER:
+            return self.world_view_rect
+        return self.view_rect
+
+    def get_far_rect(self, view_rect=None):
+        """
+        :param view_rect: the rectangle of the screen the objects are seen in, `world_view_rect` by default.
+        :return: the rectangle (min_x, min_y, max_x, max_y) outside of which objects are frozen or removed.
+        """
+        min_x, min_y, max_x, max_y = self.world_view_rect if view_rect is None else view_rect
+        margin = self.off_screen_margin
+        return min_x - margin, min_y - margin, max_x + margin, max_y + margin
+
+    @staticmethod
+    def is_intersecting(bounding_box, rect):
+        """
+        :param bounding_box: a tuple (min_x, min_y, max_x, max_y)
+        :param rect: the same
+        :return: whether or not the two rectangles intersect.
+        """
+        min_x, min_y, max_x, max_y = bounding_box
+        rect_min_x, rect_min_y, rect_max_x, rect_max_y = rect
+        return min_x <= rect_max_x and max_x >= rect_min_x and min_y <= rect_max_y and max_y >= rect_min_y
+
+    def update(self):
+        """
+        Tests the objects that moved since the last update against the screen, and suspends or resumes their calls.
+        :return: None
+        """
+        if not self.moved_objects:
+            return
+
+        removed = []
+        for graphics_object in self.moved_objects:
+            graphics_object.is_view_moved = False
+
+            bounding_box = graphics_object.get_bounding_box()
+            if graphics_object in self.bounding_boxes and self.bounding_boxes[graphics_object] == bounding_box:
+                continue  # it was set to the location it was already in
+            self.bounding_boxes[graphics_object] = bounding_box
+
+            view_rect = self.get_view_rect(graphics_object)
+            is_on_screen = bounding_box is None or self.is_intersecting(bounding_box, view_rect)
+            self._set_on_screen(graphics_object, is_on_screen)
+
+            is_far = not is_on_screen and not self.is_intersecting(bounding_box, self.get_far_rect(view_rect))
+            if is_far and self.off_screen_action == self.REMOVE:
+                removed.append(graphics_object)
+            else:
+                self._set_frozen(graphics_object, is_far and self.off_screen_action == self.FREEZE)
+
+        self.moved_objects.clear()
+
+        for graphics_object in removed:
+            self.main_loop.unregister_graphics_object(graphics_object)
+
+    def _set_on_screen(self, graphics_object, is_on_screen):
+        """
+        Suspends or resumes the `draw` of an object and tells it whether or not it is on the screen.
+        If the object is already on the screen (or off it), does nothing.
+        :return: None
+        """
+        if is_on_screen == (graphics_object not in self.off_screen_objects):
+            return
+
+        if is_on_screen:
+            self.off_screen_objects.discard(graphics_object)
+        else:
+            self.off_screen_objects.add(graphics_object)
+
+        draw_layers = self.main_loop.draw_layers
+        if is_on_screen:
+            draw_layers.resume(graphics_object, draw_layers.OFF_SCREEN)
+        else:
+            draw_layers.suspend(graphics_object, draw_layers.OFF_SCREEN)
+        graphics_object.set_on_screen(is_on_screen)
+
+    def _set_frozen(self, graphics_object, is_frozen):
+        """
+        Suspends or resumes the `move` of an object. If it is already frozen (or not), does nothing.
+        :return: None
+        """
+        if is_frozen == (graphics_object in self.frozen_objects):
+            return
+
+        if is_frozen:
+            self.frozen_objects.add(graphics_object)
+        else:
+            self.frozen_objects.discard(graphics_object)
+
+        for handle in self.scheduler.get_handles(graphics_object.move):
+            (self.scheduler.suspend if is_frozen else self.scheduler.resume)(handle)
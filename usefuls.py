@@ -159,3 +159,143 @@ def rotated_coordinates(coordinates, center, angle):
     x, y = (x - cx), (y - cy)
     rotated = (x + y*1j) * cmath.rect(1, angle)
     return rotated.real + cx, rotated.imag + cy
+
+
+class DoubleEndedOrderedSet:
+    """
+    An ordered collection of unique (hashable) items.
+    Items can be added to either end of it, removed from it and moved to its end, all in O(1).
+
+    It is built out of two dictionaries (which keep their insertion order):
+        `_head` holds the items that were added to the start, from the last one added to the first one.
+        `_tail` holds the items that were added to the end, from the first one added to the last one.
+    Iterating over the set yields the items of `_head` reversed and then the items of `_tail`.
+    The values of the dictionaries are the orders of the items (see `get_order`), negative in `_head`.
+
+    A tuple of the items is cached so iterating the same unchanged set over and over (every tick of the main loop for
+    example) does not copy it every time.
+    """
+    def __init__(self, items=()):
+        """
+        Initiates the set with the given items (in order).
+        :param items: an iterable of hashable items.
+        """
+        self._head = {}
+        self._tail = {}
+        self._next_head_order = -1
+        self._next_tail_order = 0
+        self._cached_tuple = None
+
+        for item in items:
+            self.append(item)
+
+    def append(self, item):
+        """
+        Adds an item to the end of the set. If the item is already in the set, it is moved to the end.
+        :param item: a hashable object
+        :return: None
+        """
+        self.discard(item)
+        self._tail[item] = self._next_tail_order
+        self._next_tail_order += 1
+        self._cached_tuple = None
+
+    def appendleft(self, item):
+        """
+        Adds an item to the start of the set. If the item is already in the set, it is moved to the start.
+        :param item: a hashable object
+        :return: None
+        """
+        self.discard(item)
+        self._head[item] = self._next_head_order
+        self._next_head_order -= 1
+        self._cached_tuple = None
+
+    def discard(self, item):
+        """
+        Removes an item from the set if it is in it. If it is not, does nothing.
+        :param item: a hashable object
+        :return: None
+        """
+        if self._tail.pop(item, self) is self and self._head.pop(item, self) is self:
+            return
+        self._cached_tuple = None
+
+    def remove(self, item):
+        """
+        Removes an item from the set, just like `list.remove`.
+        :param item: a hashable object
+        :raises: ValueError if the item is not in the set.
+        :return: None
+        """
+        if item not in self:
+            raise ValueError(f"{item!r} is not in the set")
+        self.discard(item)
+
+    def clear(self):
+        """Removes all of the items from the set"""
+        self._head.clear()
+        self._tail.clear()
+        self._cached_tuple = None
+
+    def get_order(self, item):
+        """
+        Returns a number that tells the place of an item in the set: items that come later have larger orders.
+        It is meant to be used as a sorting key, the orders are not consecutive.
+        :param item: an item in the set
+        :raises: ValueError if the item is not in the set.
+        :return: an `int`
+        """
+        order = self._tail.get(item)
+        if order is None:
+            order = self._head.get(item)
+        if order is None:
+            raise ValueError(f"{item!r} is not in the set")
+        return order
+
+    def get_first(self):
+        """
+        :raises: IndexError if the set is empty.
+        :return: the first item in the set.
+        """
+        if self._head:
+            return next(reversed(self._head))
+        if self._tail:
+            return next(iter(self._tail))
+        raise IndexError("the set is empty")
+
+    def get_last(self):
+        """
+        :raises: IndexError if the set is empty.
+        :return: the last item in the set.
+        """
+        if self._tail:
+            return next(reversed(self._tail))
+        if self._head:
+            return next(iter(self._head))
+        raise IndexError("the set is empty")
+
+    def as_tuple(self):
+        """
+        Returns a tuple of all of the items in the set in order.
+        The tuple is cached until the next time the set is changed.
+        :return: a `tuple`
+        """
+        if self._cached_tuple is None:
+            self._cached_tuple = tuple(reversed(self._head)) + tuple(self._tail)
+        return self._cached_tuple
+
+    def __contains__(self, item):
+        return item in self._tail or item in self._head
+
+    def __len__(self):
+        return len(self._head) + len(self._tail)
+
+    def __iter__(self):
+        return iter(self.as_tuple())
+
+    def __reversed__(self):
+        return reversed(self.as_tuple())
+
+    def __repr__(self):
+        return f"DoubleEndedOrderedSet({list(self)!r})"